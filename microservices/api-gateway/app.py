@@ -1,17 +1,38 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
 import sys
+import time
+import metrics
+import tracing
+import deadline
+import identity
 from config import Config
 from services import UserManagementServiceClient, ExercisesServiceClient, ScoresServiceClient
+from health import HealthProber
+from resilience import CircuitBreaker, RetryPolicy
+from balancer import LoadBalancer
+from json_provider import FastJSONProvider
+from compression import ResponseCompressor
+from identity import IdentitySigner
+from coalesce import SingleFlight
+from bulkhead import Bulkhead, BulkheadFullError, route_bulkheads
 from middleware import AuthMiddleware, RequestLoggingMiddleware, require_auth, require_admin
+from proxy import passthrough
+from batch import BatchDispatcher, batch_response
+from attempts import record_attempt
+from ratelimit import RateLimiter, rate_limit, enforce_rate_limit
+from response_cache import ResponseCache, cached_response, invalidates
 
 # Setup logging
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.addFilter(tracing.RequestIdFilter())
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
     handlers=[
-        logging.StreamHandler(sys.stdout)
+        _log_handler
     ]
 )
 logger = logging.getLogger(__name__)
@@ -26,23 +47,58 @@ def get_json_or_fail():
         return None, jsonify({"status": "fail", "message": INVALID_PAYLOAD_MSG}), 400
     return data, None, None
 
-def _check_service_health(client):
-    try:
-        _, status_code = client.health_check()
-    except Exception:
-        status_code = 503
+def _shed_response():
+    return jsonify({"status": "error", "message": "Gateway overloaded, please retry"}), 503
+
+def _pool_options(config):
     return {
-        "status": "healthy" if status_code == 200 else "unhealthy",
-        "response_code": status_code
+        "single_flight": SingleFlight() if config.get('SINGLE_FLIGHT_ENABLED', True) else None,
+        "retry_policy": RetryPolicy.from_config(config),
+        "pool_block": config.get('UPSTREAM_POOL_BLOCK', False),
+        "keep_alive": config.get('UPSTREAM_KEEP_ALIVE', True),
+        "idle_timeout": config.get('UPSTREAM_POOL_IDLE_TIMEOUT', 2.0)
     }
 
 def register_middlewares(app):
     @app.before_request
     def before_request():
+        g.request_started = time.monotonic()
+        tracing.start_request(request.headers.get(tracing.REQUEST_ID_HEADER))
+        deadline.start(app.config['ROUTE_TIMEOUTS'].get(request.endpoint, app.config['REQUEST_TIMEOUT']),
+                       request.headers.get(deadline.DEADLINE_HEADER))
+        metrics.REQUESTS_IN_FLIGHT.inc()
         RequestLoggingMiddleware.log_request()
+        bulkhead = app.extensions['route_bulkheads'].get(request.endpoint)
+        if bulkhead is not None:
+            try:
+                bulkhead.acquire()
+            except BulkheadFullError:
+                return _shed_response()
+            g.route_bulkhead = bulkhead
     @app.after_request
     def after_request(response):
+        duration = time.monotonic() - g.request_started
+        metrics.observe_request(metrics.route_label(request.url_rule), request.method, response.status_code, duration)
+        response.headers[tracing.REQUEST_ID_HEADER] = tracing.current_request_id()
+        response.headers['Server-Timing'] = tracing.server_timing_header(duration)
         return RequestLoggingMiddleware.log_response(response)
+    # Registered last so it runs first and the request metrics include compression time
+    @app.after_request
+    def compress_response(response):
+        compressor = app.extensions['compressor']
+        if compressor is None:
+            return response
+        with tracing.timed('compress'):
+            return compressor.compress_response(response, request.headers.get('Accept-Encoding'))
+    @app.teardown_request
+    def teardown_request(error):
+        if 'request_started' in g:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        if 'route_bulkhead' in g:
+            g.route_bulkhead.release(time.monotonic() - g.request_started)
+        tracing.end_request()
+        deadline.end()
+        identity.end()
 
 def register_error_handlers(app, logger):
     @app.errorhandler(404)
@@ -56,7 +112,8 @@ def register_error_handlers(app, logger):
         logger.error(f"Internal server error: {str(error)}")
         return jsonify({"status": "error", "message": "Internal server error"}), 500
 
-def register_health_route(app, user_management_client, exercises_client, scores_client):
+def register_health_route(app, user_management_client, exercises_client, scores_client, auth_middleware, health_prober,
+                          exercise_cache):
     @app.route('/health', methods=['GET'])
     def health_check():
         # Simple health check - API Gateway is healthy if it can respond
@@ -69,19 +126,15 @@ def register_health_route(app, user_management_client, exercises_client, scores_
     @app.route('/health/detailed', methods=['GET'])
     def detailed_health_check():
         try:
-            statuses = [
-                _check_service_health(user_management_client),
-                _check_service_health(exercises_client),
-                _check_service_health(scores_client)
-            ]
-            overall_status = 200 if all(s["response_code"] == 200 for s in statuses) else 503
+            statuses = health_prober.snapshot()
+            for name, status in statuses.items():
+                status["circuit"] = health_prober.clients[name].circuit_stats()
+                status["retries"] = health_prober.clients[name].retry_stats()
+                status["bulkhead"] = health_prober.clients[name].bulkhead_stats()
+            overall_status = 200 if all(s["response_code"] == 200 for s in statuses.values()) else 503
             gateway_status = {
                 "status": "healthy" if overall_status == 200 else "unhealthy",
-                "services": {
-                    "user_management_service": statuses[0],
-                    "exercises_service": statuses[1],
-                    "scores_service": statuses[2]
-                }
+                "services": statuses
             }
             return jsonify(gateway_status), overall_status
         except Exception as e:
@@ -90,8 +143,33 @@ def register_health_route(app, user_management_client, exercises_client, scores_
                 "error": str(e)
             }), 503
 
+    # Prometheus scrape endpoint, aggregated over all gunicorn workers
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
+
+    # Upstream connection pool statistics for pool sizing
+    @app.route('/health/pools', methods=['GET'])
+    def pool_stats():
+        return jsonify({
+            "user_management_service": user_management_client.pool_stats(),
+            "exercises_service": exercises_client.pool_stats(),
+            "scores_service": scores_client.pool_stats()
+        }), 200
+
+    # Gateway cache statistics
+    @app.route('/health/caches', methods=['GET'])
+    def cache_stats():
+        return jsonify({
+            "auth_tokens": auth_middleware.cache_stats(),
+            "exercise_responses": exercise_cache.stats()
+        }), 200
+
 def register_auth_routes(app, user_management_client, auth_middleware):
     @app.route('/auth/register', methods=['POST'])
+    @rate_limit
+    @passthrough(user_management_client, '/api/auth/register')
     def register():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -100,6 +178,8 @@ def register_auth_routes(app, user_management_client, auth_middleware):
         return jsonify(response), status_code
 
     @app.route('/auth/login', methods=['POST'])
+    @rate_limit
+    @passthrough(user_management_client, '/api/auth/login')
     def login():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -109,13 +189,18 @@ def register_auth_routes(app, user_management_client, auth_middleware):
 
     @app.route('/auth/logout', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
     def logout():
         headers = dict(request.headers)
         response, status_code = user_management_client.logout(headers)
+        if status_code == 200:
+            auth_middleware.invalidate_token(auth_middleware.extract_token_from_header())
         return jsonify(response), status_code
 
     @app.route('/auth/status', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(user_management_client, '/api/auth/status')
     def get_user_status():
         headers = dict(request.headers)
         response, status_code = user_management_client.get_user_status(headers)
@@ -124,6 +209,8 @@ def register_auth_routes(app, user_management_client, auth_middleware):
 def register_users_routes(app, user_management_client, auth_middleware):
     @app.route('/users/', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(user_management_client, '/api/users/')
     def get_all_users():
         headers = dict(request.headers)
         response, status_code = user_management_client.get_all_users(headers)
@@ -131,6 +218,8 @@ def register_users_routes(app, user_management_client, auth_middleware):
 
     @app.route('/users/<int:user_id>', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(user_management_client, '/api/users/{user_id}')
     def get_single_user(user_id):
         headers = dict(request.headers)
         response, status_code = user_management_client.get_single_user(user_id, headers)
@@ -138,6 +227,8 @@ def register_users_routes(app, user_management_client, auth_middleware):
 
     @app.route('/users/', methods=['POST'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(user_management_client, '/api/users/')
     def add_user():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -148,6 +239,8 @@ def register_users_routes(app, user_management_client, auth_middleware):
 
     @app.route('/users/admin_create', methods=['POST'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(user_management_client, '/api/users/admin_create')
     def admin_create_user():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -156,9 +249,12 @@ def register_users_routes(app, user_management_client, auth_middleware):
         response, status_code = user_management_client.admin_create_user(data, headers)
         return jsonify(response), status_code
 
-def register_exercises_routes(app, exercises_client, auth_middleware):
+def register_exercises_routes(app, exercises_client, auth_middleware, exercise_cache):
     @app.route('/exercises/', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @cached_response(exercise_cache, 'exercises')
+    @passthrough(exercises_client, '/api/exercises/')
     def get_all_exercises():
         headers = dict(request.headers)
         response, status_code = exercises_client.get_all_exercises(headers)
@@ -166,6 +262,9 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
 
     @app.route('/exercises/<int:exercise_id>', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @cached_response(exercise_cache, 'exercise:{exercise_id}')
+    @passthrough(exercises_client, '/api/exercises/{exercise_id}')
     def get_single_exercise(exercise_id):
         headers = dict(request.headers)
         response, status_code = exercises_client.get_single_exercise(exercise_id, headers)
@@ -173,6 +272,9 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
 
     @app.route('/exercises/', methods=['POST'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @invalidates(exercise_cache, 'exercises')
+    @passthrough(exercises_client, '/api/exercises/')
     def create_exercise():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -183,6 +285,9 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
 
     @app.route('/exercises/<int:exercise_id>', methods=['PUT'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @invalidates(exercise_cache, 'exercises', 'exercise:{exercise_id}')
+    @passthrough(exercises_client, '/api/exercises/{exercise_id}')
     def update_exercise(exercise_id):
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -193,6 +298,9 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
 
     @app.route('/exercises/<int:exercise_id>', methods=['DELETE'])
     @require_admin(auth_middleware)
+    @rate_limit
+    @invalidates(exercise_cache, 'exercises', 'exercise:{exercise_id}')
+    @passthrough(exercises_client, '/api/exercises/{exercise_id}')
     def delete_exercise(exercise_id):
         headers = dict(request.headers)
         response, status_code = exercises_client.delete_exercise(exercise_id, headers)
@@ -200,6 +308,8 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
 
     @app.route('/exercises/validate_code', methods=['POST'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(exercises_client, '/api/exercises/validate_code')
     def validate_code():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -208,9 +318,23 @@ def register_exercises_routes(app, exercises_client, auth_middleware):
         response, status_code = exercises_client.validate_code(data, headers)
         return jsonify(response), status_code
 
+def register_attempt_route(app, exercises_client, scores_client, auth_middleware):
+    @app.route('/exercises/attempt', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    def attempt_exercise():
+        data, error_response, error_code = get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = record_attempt(exercises_client, scores_client, data, headers)
+        return jsonify(response), status_code
+
 def register_scores_routes(app, scores_client, auth_middleware):
     @app.route('/scores/', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(scores_client, '/api/scores/')
     def get_all_scores():
         headers = dict(request.headers)
         response, status_code = scores_client.get_all_scores(headers)
@@ -218,6 +342,8 @@ def register_scores_routes(app, scores_client, auth_middleware):
 
     @app.route('/scores/user', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(scores_client, '/api/scores/user')
     def get_scores_by_user():
         headers = dict(request.headers)
         response, status_code = scores_client.get_scores_by_user(headers)
@@ -225,6 +351,8 @@ def register_scores_routes(app, scores_client, auth_middleware):
 
     @app.route('/scores/user/<int:score_id>', methods=['GET'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(scores_client, '/api/scores/user/{score_id}')
     def get_single_score_by_user(score_id):
         headers = dict(request.headers)
         response, status_code = scores_client.get_single_score_by_user(score_id, headers)
@@ -232,6 +360,8 @@ def register_scores_routes(app, scores_client, auth_middleware):
 
     @app.route('/scores/', methods=['POST'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(scores_client, '/api/scores/')
     def create_score():
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -242,6 +372,8 @@ def register_scores_routes(app, scores_client, auth_middleware):
 
     @app.route('/scores/<int:exercise_id>', methods=['PUT'])
     @require_auth(auth_middleware)
+    @rate_limit
+    @passthrough(scores_client, '/api/scores/{exercise_id}')
     def update_score(exercise_id):
         data, error_response, error_code = get_json_or_fail()
         if error_response:
@@ -250,35 +382,135 @@ def register_scores_routes(app, scores_client, auth_middleware):
         response, status_code = scores_client.update_score(exercise_id, data, headers)
         return jsonify(response), status_code
 
+def register_batch_route(app, user_management_client, exercises_client, scores_client, auth_middleware):
+    # Writes with gateway side effects (logout, exercise changes) are not batchable
+    dispatcher = BatchDispatcher(max_workers=app.config.get('BATCH_MAX_WORKERS', 8))
+    dispatcher.add('GET', '/auth/status', 'get_user_status',
+                   lambda headers: user_management_client.get_user_status(headers))
+    dispatcher.add('GET', '/users/', 'get_all_users',
+                   lambda headers: user_management_client.get_all_users(headers))
+    dispatcher.add('GET', '/users/<int:user_id>', 'get_single_user',
+                   lambda headers, user_id: user_management_client.get_single_user(user_id, headers))
+    dispatcher.add('GET', '/exercises/', 'get_all_exercises',
+                   lambda headers: exercises_client.get_all_exercises(headers))
+    dispatcher.add('GET', '/exercises/<int:exercise_id>', 'get_single_exercise',
+                   lambda headers, exercise_id: exercises_client.get_single_exercise(exercise_id, headers))
+    dispatcher.add('POST', '/exercises/validate_code', 'validate_code',
+                   lambda headers, data: exercises_client.validate_code(data, headers))
+    dispatcher.add('POST', '/exercises/attempt', 'attempt_exercise',
+                   lambda headers, data: record_attempt(exercises_client, scores_client, data, headers))
+    dispatcher.add('GET', '/scores/', 'get_all_scores',
+                   lambda headers: scores_client.get_all_scores(headers))
+    dispatcher.add('GET', '/scores/user', 'get_scores_by_user',
+                   lambda headers: scores_client.get_scores_by_user(headers))
+    dispatcher.add('GET', '/scores/user/<int:score_id>', 'get_single_score_by_user',
+                   lambda headers, score_id: scores_client.get_single_score_by_user(score_id, headers))
+    dispatcher.add('POST', '/scores/', 'create_score',
+                   lambda headers, data: scores_client.create_score(data, headers))
+    dispatcher.add('PUT', '/scores/<int:exercise_id>', 'update_score',
+                   lambda headers, data, exercise_id: scores_client.update_score(exercise_id, data, headers))
+
+    @app.route('/batch', methods=['POST'])
+    @require_auth(auth_middleware)
+    def batch():
+        data, error_response, error_code = get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        items = data.get('requests')
+        max_requests = app.config.get('BATCH_MAX_REQUESTS', 10)
+        if not isinstance(items, list) or not items or len(items) > max_requests:
+            return jsonify({"status": "fail", "message": f"Batch must contain 1 to {max_requests} requests"}), 400
+
+        results, runnable, cost = dispatcher.prepare(items, app.extensions['rate_limiter'].cost_of)
+
+        # One charge for the whole batch, weighted like the individual routes
+        limited = enforce_rate_limit(cost)
+        if limited:
+            return limited
+
+        # The token was verified once for the batch; sub-requests forward it upstream as-is
+        headers = {"Authorization": request.headers.get('Authorization')}
+        outcomes = dispatcher.run([item for _, item in runnable], headers)
+        for (index, _), outcome in zip(runnable, outcomes):
+            results[index] = outcome
+
+        return jsonify(batch_response(items, results)), 200
+
 def create_app():
     app = Flask(__name__)
     app.url_map.strict_slashes = False
     app.config.from_object(Config)
+    app.json = FastJSONProvider(app)
+    if app.config['TRUSTED_PROXY_HOPS']:
+        # request.remote_addr becomes the client the trusted proxies saw, which the rate limiter keys on
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
     CORS(app, 
          origins=app.config['CORS_ORIGINS'],
-         allow_headers=['Content-Type', 'Authorization'],
+         allow_headers=['Content-Type', 'Authorization', tracing.REQUEST_ID_HEADER, deadline.DEADLINE_HEADER],
+         expose_headers=[tracing.REQUEST_ID_HEADER, 'Server-Timing'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
          supports_credentials=True)
     user_management_client = UserManagementServiceClient(
         app.config['USER_MANAGEMENT_SERVICE_URL'], 
-        timeout=app.config.get('REQUEST_TIMEOUT', 30)
+        timeout=app.config.get('REQUEST_TIMEOUT', 30),
+        pool_maxsize=app.config['USER_MANAGEMENT_SERVICE_MAX_CONNECTIONS'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'user_management_service'),
+        balancer=LoadBalancer.from_config(app.config, 'user_management_service', app.config['USER_MANAGEMENT_SERVICE_URL']),
+        bulkhead=Bulkhead.from_config(app.config, 'user_management_service',
+                                      app.config['USER_MANAGEMENT_SERVICE_MAX_CONNECTIONS']),
+        **_pool_options(app.config)
     )
     exercises_client = ExercisesServiceClient(
         app.config['EXERCISES_SERVICE_URL'],
-        timeout=app.config.get('REQUEST_TIMEOUT', 30)
+        timeout=app.config.get('REQUEST_TIMEOUT', 30),
+        pool_maxsize=app.config['EXERCISES_SERVICE_MAX_CONNECTIONS'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'exercises_service'),
+        balancer=LoadBalancer.from_config(app.config, 'exercises_service', app.config['EXERCISES_SERVICE_URL']),
+        bulkhead=Bulkhead.from_config(app.config, 'exercises_service', app.config['EXERCISES_SERVICE_MAX_CONNECTIONS']),
+        **_pool_options(app.config)
     )
     scores_client = ScoresServiceClient(
         app.config['SCORES_SERVICE_URL'],
-        timeout=app.config.get('REQUEST_TIMEOUT', 30)
+        timeout=app.config.get('REQUEST_TIMEOUT', 30),
+        pool_maxsize=app.config['SCORES_SERVICE_MAX_CONNECTIONS'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'scores_service'),
+        balancer=LoadBalancer.from_config(app.config, 'scores_service', app.config['SCORES_SERVICE_URL']),
+        bulkhead=Bulkhead.from_config(app.config, 'scores_service', app.config['SCORES_SERVICE_MAX_CONNECTIONS']),
+        **_pool_options(app.config)
+    )
+    auth_middleware = AuthMiddleware(
+        user_management_client,
+        cache_ttl=app.config.get('AUTH_CACHE_TTL', 30),
+        negative_cache_ttl=app.config.get('AUTH_CACHE_NEGATIVE_TTL', 5),
+        cache_max_size=app.config.get('AUTH_CACHE_MAX_SIZE', 1024),
+        identity_signer=IdentitySigner.from_config(app.config)
+    )
+    app.extensions['rate_limiter'] = RateLimiter.from_config(app.config)
+    app.extensions['route_bulkheads'] = route_bulkheads(app.config)
+    app.extensions['compressor'] = ResponseCompressor.from_config(app.config)
+    exercise_cache = ResponseCache(
+        max_size=app.config.get('EXERCISE_CACHE_MAX_SIZE', 512),
+        ttl=app.config.get('EXERCISE_CACHE_TTL', 60)
+    )
+    health_prober = HealthProber(
+        {
+            "user_management_service": user_management_client,
+            "exercises_service": exercises_client,
+            "scores_service": scores_client
+        },
+        interval=app.config.get('HEALTH_PROBE_INTERVAL', 10),
+        timeout=app.config.get('HEALTH_CHECK_TIMEOUT', 2)
     )
-    auth_middleware = AuthMiddleware(user_management_client)
     register_middlewares(app)
     register_error_handlers(app, logger)
-    register_health_route(app, user_management_client, exercises_client, scores_client)
+    register_health_route(app, user_management_client, exercises_client, scores_client, auth_middleware, health_prober,
+                          exercise_cache)
     register_auth_routes(app, user_management_client, auth_middleware)
     register_users_routes(app, user_management_client, auth_middleware)
-    register_exercises_routes(app, exercises_client, auth_middleware)
+    register_exercises_routes(app, exercises_client, auth_middleware, exercise_cache)
     register_scores_routes(app, scores_client, auth_middleware)
+    register_attempt_route(app, exercises_client, scores_client, auth_middleware)
+    register_batch_route(app, user_management_client, exercises_client, scores_client, auth_middleware)
     return app
 
 app = create_app()
@@ -0,0 +1,613 @@
+"""Asyncio (ASGI) serving mode of the API Gateway.
+
+Exposes the same routes as app.create_app() but proxies through
+non-blocking upstream clients, so one worker process can hold many
+in-flight requests. The sync Flask app remains the default; run this
+mode with e.g.
+
+    gunicorn --config gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+"""
+import asyncio
+import logging
+import sys
+import time
+import metrics
+import tracing
+import deadline
+import identity
+from functools import wraps
+from quart import Quart, request, jsonify, g, current_app, Response
+from quart.json.provider import DefaultJSONProvider as QuartJSONProvider
+from quart_cors import cors
+from config import Config
+from async_services import AsyncUserManagementServiceClient, AsyncExercisesServiceClient, AsyncScoresServiceClient
+from health import AsyncHealthProber
+from resilience import CircuitBreaker, RetryPolicy
+from balancer import LoadBalancer
+from json_provider import FastJSONMixin
+from compression import ResponseCompressor
+from identity import IdentitySigner
+from coalesce import AsyncSingleFlight
+from bulkhead import AsyncBulkhead, BulkheadFullError, route_bulkheads
+from ratelimit import RateLimiter, client_key, RATE_LIMITED_MSG
+from attempts import record_attempt_async
+from batch import AsyncBatchDispatcher, batch_response
+from response_cache import ResponseCache, async_cached_response, async_invalidates
+from middleware import AuthMiddleware, AUTH_TOKEN_REQUIRED_MSG, INVALID_TOKEN_MSG, ADMIN_REQUIRED_MSG
+
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.addFilter(tracing.RequestIdFilter())
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s',
+    handlers=[
+        _log_handler
+    ]
+)
+logger = logging.getLogger(__name__)
+
+INVALID_PAYLOAD_MSG = "Invalid payload"
+
+class FastQuartJSONProvider(FastJSONMixin, QuartJSONProvider):
+    """Quart JSON provider backed by orjson"""
+
+class AsyncAuthMiddleware(AuthMiddleware):
+    """Authentication middleware for the asyncio gateway"""
+
+    def extract_token_from_header(self) -> str:
+        """Extract token from Authorization header"""
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return ""
+        try:
+            return auth_header.split(' ')[1]
+        except IndexError:
+            return ""
+
+    async def verify_token(self, token: str) -> dict:
+        """Verify token with user management service"""
+        key = self._token_key(token)
+        user_data = self._cached_verification(key)
+        if user_data is not None:
+            return user_data
+        response, status_code = await self.user_management_client.verify_token(token)
+        return self._remember_verification(key, response, status_code)
+
+    async def _get_user_data(self):
+        token = self.extract_token_from_header()
+        if not token:
+            return None, jsonify({"status": "fail", "message": AUTH_TOKEN_REQUIRED_MSG}), 401
+        with tracing.timed('auth'):
+            user_data = await self.verify_token(token)
+        if not user_data:
+            return None, jsonify({"status": "fail", "message": INVALID_TOKEN_MSG}), 401
+        self._forward_identity(user_data, token)
+        return user_data, None, None
+
+def require_auth(auth_middleware: AsyncAuthMiddleware):
+    """Decorator to require authentication"""
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            user_data, error_response, error_code = await auth_middleware._get_user_data()
+            if error_response:
+                return error_response, error_code
+            g.current_user = user_data
+            return await f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def require_admin(auth_middleware: AsyncAuthMiddleware):
+    """Decorator to require admin privileges"""
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            user_data, error_response, error_code = await auth_middleware._get_user_data()
+            if error_response:
+                return error_response, error_code
+            if not user_data.get('admin'):
+                logger.warning(f"User {user_data.get('username', 'unknown')} attempted admin action without privileges")
+                return jsonify({"status": "fail", "message": ADMIN_REQUIRED_MSG}), 403
+            g.current_user = user_data
+            return await f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+async def enforce_rate_limit(cost=None):
+    """Charge the current client; returns a 429 response when over the limit, else None"""
+    if not current_app.config.get('RATE_LIMIT_ENABLED'):
+        return None
+    limiter = current_app.extensions['rate_limiter']
+    key = client_key(g.get('current_user'), request.remote_addr)
+    if cost is None:
+        cost = limiter.cost_of(request.endpoint)
+    if limiter.blocking:
+        # The SQLite backend waits on other workers' locks; keep that off the event loop
+        allowed, retry_after = await asyncio.get_running_loop().run_in_executor(None, limiter.check, key, cost)
+    else:
+        allowed, retry_after = limiter.check(key, cost)
+    if allowed:
+        return None
+    response = jsonify({"status": "fail", "message": RATE_LIMITED_MSG})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def rate_limit(f):
+    """Decorator: enforce the app's RateLimiter. Place it below the auth decorators."""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        limited = await enforce_rate_limit()
+        if limited:
+            return limited
+        return await f(*args, **kwargs)
+    return decorated_function
+
+async def get_json_or_fail():
+    if not request.is_json:
+        return None, jsonify({"status": "fail", "message": INVALID_PAYLOAD_MSG}), 400
+    data = await request.get_json(silent=True)
+    if data is None:
+        return None, jsonify({"status": "fail", "message": INVALID_PAYLOAD_MSG}), 400
+    return data, None, None
+
+def _shed_response():
+    return jsonify({"status": "error", "message": "Gateway overloaded, please retry"}), 503
+
+def _client_options(config, name, maxsize):
+    return {
+        "timeout": config.get('REQUEST_TIMEOUT', 30),
+        "pool_maxsize": maxsize,
+        "single_flight": AsyncSingleFlight() if config.get('SINGLE_FLIGHT_ENABLED', True) else None,
+        "retry_policy": RetryPolicy.from_config(config),
+        "bulkhead": AsyncBulkhead.from_config(config, name, maxsize),
+        "keep_alive": config.get('UPSTREAM_KEEP_ALIVE', True),
+        "idle_timeout": config.get('UPSTREAM_POOL_IDLE_TIMEOUT', 2.0)
+    }
+
+def register_middlewares(app, clients):
+    @app.before_request
+    async def before_request():
+        g.request_started = time.monotonic()
+        tracing.start_request(request.headers.get(tracing.REQUEST_ID_HEADER))
+        deadline.start(app.config['ROUTE_TIMEOUTS'].get(request.endpoint, app.config['REQUEST_TIMEOUT']),
+                       request.headers.get(deadline.DEADLINE_HEADER))
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        logger.info(f"{request.method} {request.path} - {request.remote_addr}")
+        bulkhead = app.extensions['route_bulkheads'].get(request.endpoint)
+        if bulkhead is not None:
+            try:
+                await bulkhead.acquire()
+            except BulkheadFullError:
+                return _shed_response()
+            g.route_bulkhead = bulkhead
+    @app.after_request
+    async def after_request(response):
+        duration = time.monotonic() - g.request_started
+        metrics.observe_request(metrics.route_label(request.url_rule), request.method, response.status_code, duration)
+        response.headers[tracing.REQUEST_ID_HEADER] = tracing.current_request_id()
+        response.headers['Server-Timing'] = tracing.server_timing_header(duration)
+        logger.info(f"{request.method} {request.path} - Response: {response.status_code}")
+        return response
+    # Registered last so it runs first and the request metrics include compression time
+    @app.after_request
+    async def compress_response(response):
+        compressor = app.extensions['compressor']
+        if compressor is None:
+            return response
+        with tracing.timed('compress'):
+            return await compressor.compress_async_response(response, request.headers.get('Accept-Encoding'))
+    @app.teardown_request
+    async def teardown_request(error):
+        if 'request_started' in g:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+        if 'route_bulkhead' in g:
+            g.route_bulkhead.release(time.monotonic() - g.request_started)
+        tracing.end_request()
+        deadline.end()
+        identity.end()
+    @app.after_serving
+    async def close_clients():
+        for client in clients:
+            await client.close()
+
+def register_error_handlers(app, logger):
+    @app.errorhandler(404)
+    async def not_found(error):
+        return jsonify({"status": "fail", "message": "Endpoint not found"}), 404
+    @app.errorhandler(405)
+    async def method_not_allowed(error):
+        return jsonify({"status": "fail", "message": "Method not allowed"}), 405
+    @app.errorhandler(500)
+    async def internal_error(error):
+        logger.error(f"Internal server error: {str(error)}")
+        return jsonify({"status": "error", "message": "Internal server error"}), 500
+
+def register_health_route(app, user_management_client, exercises_client, scores_client, auth_middleware, health_prober,
+                          exercise_cache):
+    @app.route('/health', methods=['GET'])
+    async def health_check():
+        return jsonify({
+            "status": "healthy",
+            "message": "API Gateway is running"
+        }), 200
+
+    @app.route('/health/detailed', methods=['GET'])
+    async def detailed_health_check():
+        try:
+            statuses = await health_prober.snapshot()
+            for name, status in statuses.items():
+                status["circuit"] = health_prober.clients[name].circuit_stats()
+                status["retries"] = health_prober.clients[name].retry_stats()
+                status["bulkhead"] = health_prober.clients[name].bulkhead_stats()
+            overall_status = 200 if all(s["response_code"] == 200 for s in statuses.values()) else 503
+            gateway_status = {
+                "status": "healthy" if overall_status == 200 else "unhealthy",
+                "services": statuses
+            }
+            return jsonify(gateway_status), overall_status
+        except Exception as e:
+            return jsonify({
+                "status": "unhealthy",
+                "error": str(e)
+            }), 503
+
+    @app.route('/metrics', methods=['GET'])
+    async def prometheus_metrics():
+        body, content_type = metrics.render()
+        return Response(body, content_type=content_type)
+
+    @app.route('/health/pools', methods=['GET'])
+    async def pool_stats():
+        return jsonify({
+            "user_management_service": user_management_client.pool_stats(),
+            "exercises_service": exercises_client.pool_stats(),
+            "scores_service": scores_client.pool_stats()
+        }), 200
+
+    @app.route('/health/caches', methods=['GET'])
+    async def cache_stats():
+        return jsonify({
+            "auth_tokens": auth_middleware.cache_stats(),
+            "exercise_responses": exercise_cache.stats()
+        }), 200
+
+def register_auth_routes(app, user_management_client, auth_middleware):
+    @app.route('/auth/register', methods=['POST'])
+    @rate_limit
+    async def register():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        response, status_code = await user_management_client.register(data)
+        return jsonify(response), status_code
+
+    @app.route('/auth/login', methods=['POST'])
+    @rate_limit
+    async def login():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        response, status_code = await user_management_client.login(data)
+        return jsonify(response), status_code
+
+    @app.route('/auth/logout', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def logout():
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.logout(headers)
+        if status_code == 200:
+            auth_middleware.invalidate_token(auth_middleware.extract_token_from_header())
+        return jsonify(response), status_code
+
+    @app.route('/auth/status', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_user_status():
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.get_user_status(headers)
+        return jsonify(response), status_code
+
+def register_users_routes(app, user_management_client, auth_middleware):
+    @app.route('/users/', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_all_users():
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.get_all_users(headers)
+        return jsonify(response), status_code
+
+    @app.route('/users/<int:user_id>', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_single_user(user_id):
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.get_single_user(user_id, headers)
+        return jsonify(response), status_code
+
+    @app.route('/users/', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def add_user():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.add_user(data, headers)
+        return jsonify(response), status_code
+
+    @app.route('/users/admin_create', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def admin_create_user():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await user_management_client.admin_create_user(data, headers)
+        return jsonify(response), status_code
+
+def register_exercises_routes(app, exercises_client, auth_middleware, exercise_cache):
+    @app.route('/exercises/', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    @async_cached_response(exercise_cache, 'exercises')
+    async def get_all_exercises():
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.get_all_exercises(headers)
+        return jsonify(response), status_code
+
+    @app.route('/exercises/<int:exercise_id>', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    @async_cached_response(exercise_cache, 'exercise:{exercise_id}')
+    async def get_single_exercise(exercise_id):
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.get_single_exercise(exercise_id, headers)
+        return jsonify(response), status_code
+
+    @app.route('/exercises/', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    @async_invalidates(exercise_cache, 'exercises')
+    async def create_exercise():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.create_exercise(data, headers)
+        return jsonify(response), status_code
+
+    @app.route('/exercises/<int:exercise_id>', methods=['PUT'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    @async_invalidates(exercise_cache, 'exercises', 'exercise:{exercise_id}')
+    async def update_exercise(exercise_id):
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.update_exercise(exercise_id, data, headers)
+        return jsonify(response), status_code
+
+    @app.route('/exercises/<int:exercise_id>', methods=['DELETE'])
+    @require_admin(auth_middleware)
+    @rate_limit
+    @async_invalidates(exercise_cache, 'exercises', 'exercise:{exercise_id}')
+    async def delete_exercise(exercise_id):
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.delete_exercise(exercise_id, headers)
+        return jsonify(response), status_code
+
+    @app.route('/exercises/validate_code', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def validate_code():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await exercises_client.validate_code(data, headers)
+        return jsonify(response), status_code
+
+def register_attempt_route(app, exercises_client, scores_client, auth_middleware):
+    @app.route('/exercises/attempt', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def attempt_exercise():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await record_attempt_async(exercises_client, scores_client, data, headers)
+        return jsonify(response), status_code
+
+def register_scores_routes(app, scores_client, auth_middleware):
+    @app.route('/scores/', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_all_scores():
+        headers = dict(request.headers)
+        response, status_code = await scores_client.get_all_scores(headers)
+        return jsonify(response), status_code
+
+    @app.route('/scores/user', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_scores_by_user():
+        headers = dict(request.headers)
+        response, status_code = await scores_client.get_scores_by_user(headers)
+        return jsonify(response), status_code
+
+    @app.route('/scores/user/<int:score_id>', methods=['GET'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def get_single_score_by_user(score_id):
+        headers = dict(request.headers)
+        response, status_code = await scores_client.get_single_score_by_user(score_id, headers)
+        return jsonify(response), status_code
+
+    @app.route('/scores/', methods=['POST'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def create_score():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await scores_client.create_score(data, headers)
+        return jsonify(response), status_code
+
+    @app.route('/scores/<int:exercise_id>', methods=['PUT'])
+    @require_auth(auth_middleware)
+    @rate_limit
+    async def update_score(exercise_id):
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        headers = dict(request.headers)
+        response, status_code = await scores_client.update_score(exercise_id, data, headers)
+        return jsonify(response), status_code
+
+def register_batch_route(app, user_management_client, exercises_client, scores_client, auth_middleware):
+    # Writes with gateway side effects (logout, exercise changes) are not batchable
+    dispatcher = AsyncBatchDispatcher()
+    dispatcher.add('GET', '/auth/status', 'get_user_status',
+                   lambda headers: user_management_client.get_user_status(headers))
+    dispatcher.add('GET', '/users/', 'get_all_users',
+                   lambda headers: user_management_client.get_all_users(headers))
+    dispatcher.add('GET', '/users/<int:user_id>', 'get_single_user',
+                   lambda headers, user_id: user_management_client.get_single_user(user_id, headers))
+    dispatcher.add('GET', '/exercises/', 'get_all_exercises',
+                   lambda headers: exercises_client.get_all_exercises(headers))
+    dispatcher.add('GET', '/exercises/<int:exercise_id>', 'get_single_exercise',
+                   lambda headers, exercise_id: exercises_client.get_single_exercise(exercise_id, headers))
+    dispatcher.add('POST', '/exercises/validate_code', 'validate_code',
+                   lambda headers, data: exercises_client.validate_code(data, headers))
+    dispatcher.add('POST', '/exercises/attempt', 'attempt_exercise',
+                   lambda headers, data: record_attempt_async(exercises_client, scores_client, data, headers))
+    dispatcher.add('GET', '/scores/', 'get_all_scores',
+                   lambda headers: scores_client.get_all_scores(headers))
+    dispatcher.add('GET', '/scores/user', 'get_scores_by_user',
+                   lambda headers: scores_client.get_scores_by_user(headers))
+    dispatcher.add('GET', '/scores/user/<int:score_id>', 'get_single_score_by_user',
+                   lambda headers, score_id: scores_client.get_single_score_by_user(score_id, headers))
+    dispatcher.add('POST', '/scores/', 'create_score',
+                   lambda headers, data: scores_client.create_score(data, headers))
+    dispatcher.add('PUT', '/scores/<int:exercise_id>', 'update_score',
+                   lambda headers, data, exercise_id: scores_client.update_score(exercise_id, data, headers))
+
+    @app.route('/batch', methods=['POST'])
+    @require_auth(auth_middleware)
+    async def batch():
+        data, error_response, error_code = await get_json_or_fail()
+        if error_response:
+            return error_response, error_code
+        items = data.get('requests')
+        max_requests = app.config.get('BATCH_MAX_REQUESTS', 10)
+        if not isinstance(items, list) or not items or len(items) > max_requests:
+            return jsonify({"status": "fail", "message": f"Batch must contain 1 to {max_requests} requests"}), 400
+
+        results, runnable, cost = dispatcher.prepare(items, app.extensions['rate_limiter'].cost_of)
+
+        # One charge for the whole batch, weighted like the individual routes
+        limited = await enforce_rate_limit(cost)
+        if limited:
+            return limited
+
+        # The token was verified once for the batch; sub-requests forward it upstream as-is
+        headers = {"Authorization": request.headers.get('Authorization')}
+        outcomes = await dispatcher.run([item for _, item in runnable], headers)
+        for (index, _), outcome in zip(runnable, outcomes):
+            results[index] = outcome
+
+        return jsonify(batch_response(items, results)), 200
+
+class ProxyFixMiddleware:
+    """ASGI counterpart of werkzeug's ProxyFix(x_for=hops): take the client address from X-Forwarded-For"""
+
+    def __init__(self, app, hops: int):
+        self.app = app
+        self.hops = hops
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] in ('http', 'websocket'):
+            values = [value.decode('latin-1') for name, value in scope['headers'] if name == b'x-forwarded-for']
+            forwarded = [item.strip() for item in ','.join(values).split(',') if item.strip()]
+            # Only the entries the trusted proxies appended; anything further left is up to the client
+            if len(forwarded) >= self.hops:
+                client = scope.get('client') or (None, 0)
+                scope = dict(scope, client=(forwarded[-self.hops], client[1]))
+        return await self.app(scope, receive, send)
+
+def create_async_app():
+    app = Quart(__name__)
+    app.url_map.strict_slashes = False
+    app.config.from_object(Config)
+    app.json = FastQuartJSONProvider(app)
+    if app.config['TRUSTED_PROXY_HOPS']:
+        app.asgi_app = ProxyFixMiddleware(app.asgi_app, app.config['TRUSTED_PROXY_HOPS'])
+    app = cors(app,
+               allow_origin=app.config['CORS_ORIGINS'],
+               allow_headers=['Content-Type', 'Authorization', tracing.REQUEST_ID_HEADER, deadline.DEADLINE_HEADER],
+               expose_headers=[tracing.REQUEST_ID_HEADER, 'Server-Timing'],
+               allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+               allow_credentials=True)
+    pool_maxsize = app.config.get('ASYNC_UPSTREAM_POOL_MAXSIZE', 200)
+    user_management_client = AsyncUserManagementServiceClient(
+        app.config['USER_MANAGEMENT_SERVICE_URL'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'user_management_service'),
+        balancer=LoadBalancer.from_config(app.config, 'user_management_service', app.config['USER_MANAGEMENT_SERVICE_URL']),
+        **_client_options(app.config, 'user_management_service', pool_maxsize)
+    )
+    exercises_client = AsyncExercisesServiceClient(
+        app.config['EXERCISES_SERVICE_URL'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'exercises_service'),
+        balancer=LoadBalancer.from_config(app.config, 'exercises_service', app.config['EXERCISES_SERVICE_URL']),
+        **_client_options(app.config, 'exercises_service', pool_maxsize)
+    )
+    scores_client = AsyncScoresServiceClient(
+        app.config['SCORES_SERVICE_URL'],
+        circuit_breaker=CircuitBreaker.from_config(app.config, 'scores_service'),
+        balancer=LoadBalancer.from_config(app.config, 'scores_service', app.config['SCORES_SERVICE_URL']),
+        **_client_options(app.config, 'scores_service', pool_maxsize)
+    )
+    auth_middleware = AsyncAuthMiddleware(
+        user_management_client,
+        cache_ttl=app.config.get('AUTH_CACHE_TTL', 30),
+        negative_cache_ttl=app.config.get('AUTH_CACHE_NEGATIVE_TTL', 5),
+        cache_max_size=app.config.get('AUTH_CACHE_MAX_SIZE', 1024),
+        identity_signer=IdentitySigner.from_config(app.config)
+    )
+    app.extensions['rate_limiter'] = RateLimiter.from_config(app.config)
+    app.extensions['route_bulkheads'] = route_bulkheads(app.config, AsyncBulkhead)
+    app.extensions['compressor'] = ResponseCompressor.from_config(app.config)
+    exercise_cache = ResponseCache(
+        max_size=app.config.get('EXERCISE_CACHE_MAX_SIZE', 512),
+        ttl=app.config.get('EXERCISE_CACHE_TTL', 60)
+    )
+    health_prober = AsyncHealthProber(
+        {
+            "user_management_service": user_management_client,
+            "exercises_service": exercises_client,
+            "scores_service": scores_client
+        },
+        interval=app.config.get('HEALTH_PROBE_INTERVAL', 10),
+        timeout=app.config.get('HEALTH_CHECK_TIMEOUT', 2)
+    )
+    register_middlewares(app, [user_management_client, exercises_client, scores_client])
+    register_error_handlers(app, logger)
+    register_health_route(app, user_management_client, exercises_client, scores_client, auth_middleware, health_prober,
+                          exercise_cache)
+    register_auth_routes(app, user_management_client, auth_middleware)
+    register_users_routes(app, user_management_client, auth_middleware)
+    register_exercises_routes(app, exercises_client, auth_middleware, exercise_cache)
+    register_scores_routes(app, scores_client, auth_middleware)
+    register_attempt_route(app, exercises_client, scores_client, auth_middleware)
+    register_batch_route(app, user_management_client, exercises_client, scores_client, auth_middleware)
+    return app
+
+app = create_async_app()
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,278 @@
+import asyncio
+import httpx
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+import metrics
+import tracing
+import deadline
+import identity
+from balancer import NoEndpointsError
+from bulkhead import BulkheadFullError
+from services import ServiceClient, UserManagementServiceClient, ExercisesServiceClient, ScoresServiceClient
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the inbound hop, which httpx recomputes for the upstream request, and
+# the identity header, which only the gateway may set
+HOP_HEADERS = {'host', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+               identity.IDENTITY_HEADER.lower()}
+
+class AsyncServiceClient(ServiceClient):
+    """Non-blocking base class for service clients.
+
+    Endpoint methods are inherited from the sync clients; because
+    _make_request is a coroutine here they return awaitables.
+    """
+
+    def __init__(self, base_url: str, timeout: int = 30, pool_maxsize: int = 100,
+                 keep_alive: bool = True, idle_timeout: float = 2.0, circuit_breaker=None, single_flight=None,
+                 retry_policy=None, bulkhead=None, balancer=None, **kwargs):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker
+        self.single_flight = single_flight
+        self.retry_policy = retry_policy
+        self.bulkhead = bulkhead
+        self.balancer = balancer
+        if circuit_breaker is not None:
+            metrics.set_circuit_state(self.SERVICE_NAME, circuit_breaker.state)
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self._client = None
+        self._in_flight = 0
+        self._requests = 0
+        self._connections_opened = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled client, created lazily so it binds to the serving event loop"""
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.pool_maxsize,
+                max_keepalive_connections=self.pool_maxsize if self.keep_alive else 0,
+                keepalive_expiry=self.idle_timeout
+            )
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        return self._client
+
+    def _tracer(self, timings: Dict[str, float]):
+        """httpcore trace hook recording when each phase of one request starts and ends"""
+        async def trace(event_name: str, info: Dict[str, Any]):
+            timings[event_name] = time.monotonic()
+            if event_name == 'connection.connect_tcp.complete':
+                self._connections_opened += 1
+        return trace
+
+    @staticmethod
+    def _phase(timings: Dict[str, float], start: str, end: str) -> Optional[float]:
+        if start in timings and end in timings:
+            return timings[end] - timings[start]
+        return None
+
+    def _observe(self, method: str, outcome, duration: float, timings: Dict[str, float]):
+        connect = self._phase(timings, 'connection.connect_tcp.started', 'connection.connect_tcp.complete')
+        tls = self._phase(timings, 'connection.start_tls.started', 'connection.start_tls.complete')
+        if connect is not None and tls is not None:
+            connect += tls
+        metrics.observe_upstream(
+            self.SERVICE_NAME, method, outcome, duration, connect,
+            wait=self._phase(timings, 'http11.send_request_headers.started', 'http11.receive_response_headers.complete'),
+            transfer=self._phase(timings, 'http11.receive_response_body.started', 'http11.receive_response_body.complete')
+        )
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for sizing the pool"""
+        opened = self._connections_opened
+        served = self._requests
+        return {
+            "max_connections": self.pool_maxsize,
+            "connections_in_use": self._in_flight,
+            "connections_opened": opened,
+            "requests": served,
+            "reuse_ratio": round(1 - opened / served, 4) if served else 0.0,
+            "single_flight": self.single_flight.stats() if self.single_flight is not None else None,
+            "replicas": self.balancer.stats() if self.balancer is not None else None
+        }
+
+    async def close(self):
+        """Close all pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _make_request(self, method: str, endpoint: str, route: Optional[str] = None,
+                            **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make non-blocking HTTP request to service, sharing identical concurrent GETs"""
+        key = self._coalesce_key(method, endpoint, kwargs)
+        if key is None:
+            return await self._isolated_request(method, endpoint, route, **kwargs)
+        return await self.single_flight.do(key, lambda: self._isolated_request(method, endpoint, route, **kwargs))
+
+    async def _isolated_request(self, method: str, endpoint: str, route: Optional[str],
+                                **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make non-blocking HTTP request within the bulkhead, shedding it when the bulkhead is full"""
+        try:
+            async with self._slot():
+                return await self._retrying_request(method, endpoint, route, **kwargs)
+        except BulkheadFullError as e:
+            return self._error_response(f"{self.base_url}{endpoint}", e)
+
+    async def _retrying_request(self, method: str, endpoint: str, route: Optional[str],
+                                **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make non-blocking HTTP request to service, retrying failed reads with jittered backoff"""
+        if not self._can_retry(method, route):
+            return await self._request_json(method, endpoint, **kwargs)
+        self.retry_policy.budget.record_call()
+        retries = 0
+        while True:
+            result = await self._hedged_request(method, endpoint, route, **kwargs)
+            delay = self._retry_delay(result[1], retries)
+            if delay is None:
+                return result
+            logger.info(f"Retrying {method} {self.base_url}{endpoint} after {result[1]} in {delay:.3f}s")
+            await asyncio.sleep(delay)
+            retries += 1
+
+    async def _observed_request(self, method: str, endpoint: str, route: Optional[str],
+                                **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        started = time.monotonic()
+        result = await self._request_json(method, endpoint, **kwargs)
+        self.retry_policy.observe(route, time.monotonic() - started, result[1])
+        return result
+
+    async def _hedged_request(self, method: str, endpoint: str, route: Optional[str],
+                              **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """One attempt; a second is sent when the first is slower than the route's hedge delay"""
+        hedge_delay = self.retry_policy.hedge_delay(route)
+        if hedge_delay is None:
+            return await self._observed_request(method, endpoint, route, **kwargs)
+        first = asyncio.ensure_future(self._observed_request(method, endpoint, route, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done or not self.retry_policy.budget.try_withdraw():
+            return await first
+        metrics.UPSTREAM_RETRIES.labels(self.SERVICE_NAME, 'hedge').inc()
+        pending = {first, asyncio.ensure_future(self._observed_request(method, endpoint, route, **kwargs))}
+        try:
+            # First good answer wins
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                result = next(iter(done)).result()
+                if result[1] not in self.retry_policy.RETRYABLE_STATUSES:
+                    break
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request_json(self, method: str, endpoint: str, **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make non-blocking HTTP request to service"""
+        url = f"{self.base_url}{endpoint}"
+        balancer = self.balancer
+        if balancer is not None and balancer.resolve_due:
+            # DNS lookups block, so they run off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, balancer.refresh)
+
+        headers = httpx.Headers({k: v for k, v in (kwargs.get('headers') or {}).items() if k.lower() not in HOP_HEADERS})
+        request_id = tracing.current_request_id()
+        if request_id:
+            headers[tracing.REQUEST_ID_HEADER] = request_id
+        expires = deadline.header_value()
+        if expires:
+            headers[deadline.DEADLINE_HEADER] = expires
+        signed_identity = identity.header_value()
+        if signed_identity:
+            headers[identity.IDENTITY_HEADER] = signed_identity
+        kwargs['headers'] = headers
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        try:
+            kwargs['timeout'] = deadline.call_timeout(kwargs['timeout'])
+        except deadline.DeadlineExceeded:
+            logger.warning(f"Deadline exceeded before calling {url}")
+            return {"status": "error", "message": "Service timeout"}, 504
+
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            logger.warning(f"Circuit open, failing fast for {url}")
+            metrics.UPSTREAM_REQUESTS.labels(self.SERVICE_NAME, method, 'circuit_open').inc()
+            metrics.set_circuit_state(self.SERVICE_NAME, breaker.state)
+            return {"status": "error", "message": "Service temporarily unavailable"}, 503
+
+        replica = None
+        if balancer is not None:
+            try:
+                replica = balancer.pick(refresh=False)
+            except NoEndpointsError as e:
+                if breaker is not None:
+                    breaker.record(False, 0.0)
+                return self._error_response(url, e)
+            url = f"{replica.url}{endpoint}"
+
+        self._in_flight += 1
+        self._requests += 1
+        metrics.UPSTREAM_IN_FLIGHT.labels(self.SERVICE_NAME).inc()
+        timings = {}
+        started = time.monotonic()
+        success = False
+        cancelled = False
+        outcome = 'error'
+        server_timing = None
+        try:
+            logger.info(f"Making {method} request to {url}")
+
+            response = await self.client.request(method, url, extensions={"trace": self._tracer(timings)}, **kwargs)
+            success = response.status_code not in self.FAILURE_STATUSES
+            outcome = response.status_code
+            server_timing = response.headers.get('Server-Timing')
+
+            logger.info(f"Response from {url}: {response.status_code}")
+
+            try:
+                json_response = response.json()
+            except ValueError:
+                json_response = {"message": response.text or "No response content"}
+
+            return json_response, response.status_code
+
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            outcome = type(e).__name__
+            logger.error(f"Connection error to {url}")
+            return {"status": "error", "message": "Service unavailable"}, 503
+        except httpx.TimeoutException as e:
+            outcome = type(e).__name__
+            logger.error(f"Timeout error to {url}")
+            return {"status": "error", "message": "Service timeout"}, 504
+        except asyncio.CancelledError:
+            # A losing hedge or a client that went away; says nothing about the upstream
+            cancelled = True
+            outcome = 'cancelled'
+            raise
+        except Exception as e:
+            outcome = type(e).__name__
+            logger.error(f"Unexpected error calling {url}: {str(e)}")
+            return {"status": "error", "message": "Internal gateway error"}, 500
+        finally:
+            duration = time.monotonic() - started
+            if breaker is not None:
+                if cancelled:
+                    breaker.release()
+                else:
+                    breaker.record(success, duration)
+                metrics.set_circuit_state(self.SERVICE_NAME, breaker.state)
+            if replica is not None:
+                balancer.release(replica, None if cancelled else success)
+            self._in_flight -= 1
+            metrics.UPSTREAM_IN_FLIGHT.labels(self.SERVICE_NAME).dec()
+            self._observe(method, outcome, duration, timings)
+            tracing.record_upstream(self.SERVICE_NAME, duration, server_timing)
+
+class AsyncUserManagementServiceClient(AsyncServiceClient, UserManagementServiceClient):
+    """Non-blocking client for User Management Service (Auth + Users)"""
+
+class AsyncExercisesServiceClient(AsyncServiceClient, ExercisesServiceClient):
+    """Non-blocking client for Exercises Management Service"""
+
+class AsyncScoresServiceClient(AsyncServiceClient, ScoresServiceClient):
+    """Non-blocking client for Scores Management Service"""
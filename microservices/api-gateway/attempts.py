@@ -0,0 +1,61 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# scores-service answers an update of a score that does not exist yet with 404; any other
+# failure (validation, database) must not turn into a second score row
+SCORE_NOT_FOUND = 404
+
+def score_payload(data, validation):
+    """Score body recorded for a validated answer"""
+    return {
+        "exercise_id": data.get("exercise_id"),
+        "answer": data.get("answer"),
+        "results": validation.get("results"),
+        "user_results": validation.get("user_results")
+    }
+
+def attempt_response(validation, score, score_status):
+    """Validation result plus the stored score"""
+    result = dict(validation)
+    result["score_saved"] = score_status in (200, 201)
+    result["score"] = (score or {}).get("data") if result["score_saved"] else None
+    if not result["score_saved"]:
+        logger.warning(f"Validated attempt but could not store score: {score_status}")
+    return result
+
+def _attempt_flow(exercises_client, scores_client, data, headers):
+    """Validate an answer and store the outcome as the caller's score for the exercise.
+
+    Yields each upstream call and is sent its (payload, status) result, so the
+    blocking and the async clients share this one flow.
+    """
+    validation, status_code = yield exercises_client.validate_code(data, headers)
+    if status_code != 200:
+        return validation, status_code
+    score_data = score_payload(data, validation)
+    score, score_status = yield scores_client.update_score(data.get("exercise_id"), score_data, headers)
+    if score_status == SCORE_NOT_FOUND:
+        # First attempt at this exercise: there is no score to update yet
+        score, score_status = yield scores_client.create_score(score_data, headers)
+    return attempt_response(validation, score, score_status), 200
+
+def record_attempt(exercises_client, scores_client, data, headers):
+    """_attempt_flow with the blocking service clients"""
+    flow = _attempt_flow(exercises_client, scores_client, data, headers)
+    try:
+        result = next(flow)
+        while True:
+            result = flow.send(result)
+    except StopIteration as done:
+        return done.value
+
+async def record_attempt_async(exercises_client, scores_client, data, headers):
+    """_attempt_flow with the async service clients"""
+    flow = _attempt_flow(exercises_client, scores_client, data, headers)
+    try:
+        call = next(flow)
+        while True:
+            call = flow.send(await call)
+    except StopIteration as done:
+        return done.value
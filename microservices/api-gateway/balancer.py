@@ -0,0 +1,172 @@
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+import metrics
+
+DNS_SCHEME_PREFIX = 'dns+'
+
+class NoEndpointsError(ConnectionError):
+    """Raised when an upstream has no known replicas (e.g. its name does not resolve yet)"""
+
+def _host(address: str) -> str:
+    return f"[{address}]" if ':' in address else address
+
+class Endpoint:
+    """One upstream replica and its passive health"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+class LoadBalancer:
+    """Client-side load balancing over the replicas of one upstream.
+
+    Replicas come from a comma-separated list of base URLs, or from a
+    `dns+http://name:port` URL whose name (e.g. a Kubernetes headless
+    Service) is re-resolved every `resolve_interval` seconds. Requests go
+    to the replica with the fewest outstanding requests, either among all
+    of them ('least_outstanding') or among two picked at random ('p2c').
+
+    A replica failing `ejection_failures` calls in a row is ejected for
+    `ejection_seconds`, longer each time it is ejected again, but never
+    more than `max_ejection_ratio` of the replicas at once.
+    """
+
+    STRATEGIES = ('p2c', 'least_outstanding')
+
+    def __init__(self, name: str, targets: str, strategy: str = 'p2c', resolve_interval: float = 30.0,
+                 ejection_failures: int = 5, ejection_seconds: float = 30.0, max_ejection_ratio: float = 0.5):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy {strategy!r}")
+        self.name = name
+        self.strategy = strategy
+        self.resolve_interval = resolve_interval
+        self.ejection_failures = ejection_failures
+        self.ejection_seconds = ejection_seconds
+        self.max_ejection_ratio = max_ejection_ratio
+        self._lock = threading.Lock()
+        self._resolving = False
+        self._resolved_at = 0.0
+        self._dns_url = None
+        self._endpoints: Dict[str, Endpoint] = {}
+        if targets.startswith(DNS_SCHEME_PREFIX):
+            self._dns_url = urlsplit(targets[len(DNS_SCHEME_PREFIX):])
+            self._resolve()
+        else:
+            self._set_urls([url.strip().rstrip('/') for url in targets.split(',') if url.strip()])
+
+    @classmethod
+    def from_config(cls, config, name: str, targets: str) -> Optional['LoadBalancer']:
+        """Balancer for a list or DNS name of replicas; None for a single URL, which needs none"""
+        if ',' not in targets and not targets.startswith(DNS_SCHEME_PREFIX):
+            return None
+        return cls(
+            name,
+            targets,
+            strategy=config.get('LB_STRATEGY', 'p2c'),
+            resolve_interval=config.get('LB_RESOLVE_INTERVAL', 30),
+            ejection_failures=config.get('LB_EJECTION_FAILURES', 5),
+            ejection_seconds=config.get('LB_EJECTION_SECONDS', 30),
+            max_ejection_ratio=config.get('LB_MAX_EJECTION_RATIO', 0.5)
+        )
+
+    def _set_urls(self, urls: List[str]):
+        """Replace the replica set, keeping the state of replicas that remain"""
+        with self._lock:
+            self._endpoints = {url: self._endpoints.get(url) or Endpoint(url) for url in urls}
+
+    def _resolve(self):
+        host, port = self._dns_url.hostname, self._dns_url.port
+        try:
+            addresses = sorted({info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)})
+        except OSError:
+            # Keep routing to the last known replicas until the name resolves again;
+            # with none known yet, try again on the next request
+            metrics.LB_RESOLVE_FAILURES.labels(self.name).inc()
+            if self._endpoints:
+                self._resolved_at = time.monotonic()
+            return
+        suffix = f":{port}" if port else ''
+        self._set_urls([f"{self._dns_url.scheme}://{_host(address)}{suffix}" for address in addresses])
+        self._resolved_at = time.monotonic()
+
+    @property
+    def resolve_due(self) -> bool:
+        return self._dns_url is not None and time.monotonic() - self._resolved_at >= self.resolve_interval
+
+    def refresh(self):
+        """Re-resolve the replicas when the last lookup is older than `resolve_interval`"""
+        if not self.resolve_due:
+            return
+        with self._lock:
+            if self._resolving:
+                return
+            self._resolving = True
+        try:
+            self._resolve()
+        finally:
+            self._resolving = False
+
+    def pick(self, refresh: bool = True) -> Endpoint:
+        """Choose the replica for the next request and count it as outstanding"""
+        if refresh:
+            self.refresh()
+        now = time.monotonic()
+        with self._lock:
+            endpoints = list(self._endpoints.values())
+            if not endpoints:
+                raise NoEndpointsError(f"No replicas known for {self.name}")
+            candidates = [e for e in endpoints if e.available(now)] or endpoints
+            if self.strategy == 'p2c' and len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+            fewest = min(e.outstanding for e in candidates)
+            chosen = random.choice([e for e in candidates if e.outstanding == fewest])
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, success: Optional[bool]):
+        """Record the outcome of a request sent to `endpoint`; None when it was abandoned without one"""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if success is None:
+                return
+            if success:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.ejection_failures:
+                self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint):
+        now = time.monotonic()
+        if not endpoint.available(now) or endpoint.url not in self._endpoints:
+            return
+        ejected = sum(1 for e in self._endpoints.values() if not e.available(now))
+        if ejected + 1 > len(self._endpoints) * self.max_ejection_ratio:
+            return
+        endpoint.ejections += 1
+        endpoint.consecutive_failures = 0
+        endpoint.ejected_until = now + self.ejection_seconds * min(endpoint.ejections, 10)
+        metrics.LB_EJECTIONS.labels(self.name).inc()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "url": e.url,
+                "outstanding": e.outstanding,
+                "requests": e.requests,
+                "ejected": not e.available(now),
+                "ejections": e.ejections
+            } for e in self._endpoints.values()]
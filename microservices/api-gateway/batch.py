@@ -0,0 +1,117 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.routing import Map, Rule
+
+logger = logging.getLogger(__name__)
+
+BODY_METHODS = ('POST', 'PUT')
+INVALID_PAYLOAD_MSG = "Invalid payload"
+
+class BatchDispatcher:
+    """Runs batched sub-requests in parallel against the upstream service clients.
+
+    Handlers are registered per gateway route and receive the forwarded
+    headers, the JSON body (for POST/PUT) and the URL arguments; they return
+    the (payload, status) pair of the service client call.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self._map = Map(strict_slashes=False)
+        self._handlers: Dict[str, Callable[..., Tuple[Any, int]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+
+    def add(self, method: str, rule: str, endpoint: str, handler: Callable[..., Tuple[Any, int]]):
+        self._map.add(Rule(rule, methods=[method], endpoint=f"{method} {endpoint}"))
+        self._handlers[f"{method} {endpoint}"] = handler
+
+    def match(self, method: str, path: str) -> Tuple[Optional[str], Dict[str, Any], int]:
+        """(endpoint, view args, 200) or (None, {}, 404/405) for an unknown route"""
+        adapter = self._map.bind('')
+        try:
+            endpoint, args = adapter.match(path.split('?', 1)[0], method=method)
+        except NotFound:
+            return None, {}, 404
+        except MethodNotAllowed:
+            return None, {}, 405
+        return endpoint.split(' ', 1)[1], args, 200
+
+    def prepare(self, items: List[Any], cost_of: Callable[[str], int]) -> Tuple[List[Optional[Tuple[Any, int]]], List[Tuple[int, Dict[str, Any]]], int]:
+        """Match `items` to routes.
+
+        Returns the results known up front (invalid items, unknown routes),
+        the runnable (index, item) pairs and their summed rate-limit cost.
+        """
+        results: List[Optional[Tuple[Any, int]]] = [None] * len(items)
+        runnable = []
+        cost = 0
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+                results[index] = ({"status": "fail", "message": "Invalid sub-request"}, 400)
+                continue
+            method = str(item.get('method', 'GET')).upper()
+            endpoint, args, status_code = self.match(method, item['path'])
+            if endpoint is None:
+                message = "Endpoint not found" if status_code == 404 else "Method not allowed"
+                results[index] = ({"status": "fail", "message": message}, status_code)
+                continue
+            if method in BODY_METHODS and not isinstance(item.get('body'), dict):
+                results[index] = ({"status": "fail", "message": INVALID_PAYLOAD_MSG}, 400)
+                continue
+            cost += cost_of(endpoint)
+            runnable.append((index, dict(item, method=method, endpoint=endpoint, args=args)))
+        return results, runnable, cost
+
+    def _run_one(self, item: Dict[str, Any], headers: Dict[str, str]) -> Tuple[Any, int]:
+        method = item['method']
+        handler = self._handlers[f"{method} {item['endpoint']}"]
+        try:
+            if method in BODY_METHODS:
+                return handler(headers, item.get('body'), **item['args'])
+            return handler(headers, **item['args'])
+        except Exception as e:
+            logger.error(f"Batch sub-request {method} {item['path']} failed: {str(e)}")
+            return {"status": "error", "message": "Internal gateway error"}, 500
+
+    def run(self, items: List[Dict[str, Any]], headers: Dict[str, str]) -> List[Tuple[Any, int]]:
+        """Run matched items concurrently; results keep the order of `items`"""
+        # Each item runs in a copy of the request's context to keep its request ID and timings
+        futures = [self._executor.submit(contextvars.copy_context().run, self._run_one, item, headers)
+                   for item in items]
+        return [future.result() for future in futures]
+
+
+class AsyncBatchDispatcher(BatchDispatcher):
+    """BatchDispatcher for the ASGI app: handlers return awaitables, gathered on the event loop"""
+
+    async def _run_one_async(self, item: Dict[str, Any], headers: Dict[str, str]) -> Tuple[Any, int]:
+        method = item['method']
+        handler = self._handlers[f"{method} {item['endpoint']}"]
+        try:
+            if method in BODY_METHODS:
+                return await handler(headers, item.get('body'), **item['args'])
+            return await handler(headers, **item['args'])
+        except Exception as e:
+            logger.error(f"Batch sub-request {method} {item['path']} failed: {str(e)}")
+            return {"status": "error", "message": "Internal gateway error"}, 500
+
+    async def run(self, items: List[Dict[str, Any]], headers: Dict[str, str]) -> List[Tuple[Any, int]]:
+        """Run matched items concurrently; results keep the order of `items`"""
+        # gather wraps each coroutine in a task with a copy of the request's context
+        return list(await asyncio.gather(*(self._run_one_async(item, headers) for item in items)))
+
+
+def batch_response(items: List[Any], results: List[Tuple[Any, int]]) -> Dict[str, Any]:
+    """Body of a /batch response: one {id, status, body} per item, in order"""
+    return {
+        "status": "success",
+        "data": {
+            "responses": [
+                {"id": item.get('id', index) if isinstance(item, dict) else index, "status": status_code, "body": payload}
+                for index, (item, (payload, status_code)) in enumerate(zip(items, results))
+            ]
+        }
+    }
@@ -0,0 +1,166 @@
+"""Benchmark the sync (Flask/gunicorn) and async (ASGI) gateway modes.
+
+Starts a fake upstream that answers every service endpoint after a fixed
+delay, boots the gateway in each mode with the same number of worker
+processes and drives both with the same number of concurrent clients.
+
+    python benchmarks/compare_serving_modes.py --concurrency 64 --requests 2000
+
+Requires gunicorn and uvicorn (see requirements.txt).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "sync": ["app:app"],
+    "async": ["-k", "uvicorn.workers.UvicornWorker", "asgi:app"],
+}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_fake_upstream(delay):
+    """Every service endpoint, including token verification, answers after `delay` seconds"""
+    body = json.dumps({"status": "success", "data": {"id": 1, "username": "bench", "admin": False}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _reply
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", _free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_gateway(mode, upstream_url, workers):
+    port = _free_port()
+    env = dict(os.environ,
+               USER_SERVICE_URL=upstream_url,
+               EXERCISES_SERVICE_URL=upstream_url,
+               SCORES_SERVICE_URL=upstream_url,
+               FLASK_ENV="production")
+    cmd = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+           "--workers", str(workers), "--log-level", "warning"] + MODES[mode]
+    proc = subprocess.Popen(cmd, cwd=GATEWAY_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{mode} gateway did not start")
+
+def run_load(port, path, concurrency, total):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        nonlocal errors
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path, headers={"Authorization": "Bearer bench"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+        conn.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "p50_ms": round(pct(0.50), 1),
+        "p95_ms": round(pct(0.95), 1),
+        "p99_ms": round(pct(0.99), 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--upstream-delay", type=float, default=0.1,
+                        help="seconds each upstream call takes")
+    parser.add_argument("--path", default="/exercises/")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    upstream = start_fake_upstream(args.upstream_delay)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+    print(f"upstream delay={args.upstream_delay}s concurrency={args.concurrency} "
+          f"requests={args.requests} workers={args.workers} path={args.path}")
+    try:
+        for mode in args.modes:
+            proc, port = start_gateway(mode, upstream_url, args.workers)
+            try:
+                run_load(port, args.path, args.concurrency, min(args.requests, args.concurrency * 2))
+                result = run_load(port, args.path, args.concurrency, args.requests)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+            print(f"{mode:>5}: " + "  ".join(f"{k}={v}" for k, v in result.items()))
+    finally:
+        upstream.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+import metrics
+
+class BulkheadFullError(Exception):
+    """Raised when a call is shed because its bulkhead and wait queue are full"""
+
+class Bulkhead:
+    """Concurrency limit with a short bounded wait queue.
+
+    Up to `max_concurrent` calls run at once; up to `max_queue` more wait at
+    most `queue_timeout` seconds for a slot and everything beyond that is
+    shed with BulkheadFullError, so one slow upstream or route cannot take
+    every worker thread.
+
+    In adaptive mode the limit follows latency: it grows by one per `limit`
+    fast calls and shrinks by 10% when the smoothed latency exceeds
+    `latency_tolerance` times the best latency seen, never going below
+    `min_concurrent`.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int = 10, queue_timeout: float = 0.1,
+                 adaptive: bool = False, min_concurrent: int = 1, latency_tolerance: float = 2.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.min_concurrent = min(min_concurrent, max_concurrent)
+        self.latency_tolerance = latency_tolerance
+        self._cond = threading.Condition()
+        self._limit = float(max_concurrent)
+        self._active = 0
+        self._waiting = 0
+        self._latency = None
+        self._baseline = None
+        self._since_decrease = 0
+        self.shed = 0
+        metrics.BULKHEAD_LIMIT.labels(name).set(max_concurrent)
+
+    @classmethod
+    def from_config(cls, config, name: str, max_concurrent: int) -> Optional['Bulkhead']:
+        """Build a bulkhead from BULKHEAD_* settings; None when bulkheads are disabled"""
+        if not config.get('BULKHEAD_ENABLED', True):
+            return None
+        return cls(
+            name,
+            max_concurrent,
+            max_queue=config['BULKHEAD_MAX_QUEUE'],
+            queue_timeout=config['BULKHEAD_QUEUE_TIMEOUT'],
+            adaptive=config['BULKHEAD_ADAPTIVE'],
+            min_concurrent=config['BULKHEAD_MIN_CONCURRENT'],
+            latency_tolerance=config['BULKHEAD_LATENCY_TOLERANCE']
+        )
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_concurrent, int(self._limit))
+
+    def _try_enter(self) -> bool:
+        if self._active < self.limit:
+            self._active += 1
+            return True
+        return False
+
+    def _reject(self, reason: str):
+        self.shed += 1
+        metrics.BULKHEAD_SHED.labels(self.name).inc()
+        raise BulkheadFullError(f"Bulkhead {self.name} {reason}")
+
+    def _queue(self, delta: int):
+        self._waiting += delta
+        metrics.BULKHEAD_QUEUE_DEPTH.labels(self.name).inc(delta)
+
+    def acquire(self):
+        """Take a slot, waiting briefly in the queue; raises BulkheadFullError when shed"""
+        with self._cond:
+            if self._try_enter():
+                return
+            if self._waiting >= self.max_queue:
+                self._reject("queue is full")
+            self._queue(1)
+            try:
+                expires = time.monotonic() + self.queue_timeout
+                while not self._try_enter():
+                    left = expires - time.monotonic()
+                    if left <= 0:
+                        self._reject("queue wait timed out")
+                    self._cond.wait(left)
+            finally:
+                self._queue(-1)
+
+    def release(self, duration: float):
+        """Free the slot of a call that took `duration` seconds"""
+        with self._cond:
+            self._active -= 1
+            self._adapt(duration)
+            self._cond.notify()
+
+    def _adapt(self, duration: float):
+        if not self.adaptive:
+            return
+        self._latency = duration if self._latency is None else 0.8 * self._latency + 0.2 * duration
+        if self._baseline is None or self._latency < self._baseline:
+            self._baseline = self._latency
+        else:
+            # Let the baseline follow lasting latency shifts slowly
+            self._baseline += (self._latency - self._baseline) * 0.001
+        self._since_decrease += 1
+        if self._latency > self._baseline * self.latency_tolerance:
+            # At most one cut per `limit` completions, so one slow burst does not collapse the limit
+            if self._since_decrease >= self.limit:
+                self._limit = max(float(self.min_concurrent), self._limit * 0.9)
+                self._since_decrease = 0
+        else:
+            self._limit = min(float(self.max_concurrent), self._limit + 1 / self._limit)
+        metrics.BULKHEAD_LIMIT.labels(self.name).set(self.limit)
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "max_concurrent": self.max_concurrent,
+                "active": self._active,
+                "queued": self._waiting,
+                "shed": self.shed
+            }
+
+class AsyncBulkhead(Bulkhead):
+    """Bulkhead for coroutines; waiting for a slot does not block the event loop"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waiters = []
+
+    async def acquire(self):
+        with self._cond:
+            if self._try_enter():
+                return
+            if self._waiting >= self.max_queue:
+                self._reject("queue is full")
+            self._queue(1)
+        try:
+            expires = time.monotonic() + self.queue_timeout
+            while True:
+                with self._cond:
+                    if self._try_enter():
+                        return
+                    left = expires - time.monotonic()
+                    if left <= 0:
+                        self._reject("queue wait timed out")
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter, left)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        finally:
+            with self._cond:
+                self._queue(-1)
+
+    def release(self, duration: float):
+        with self._cond:
+            self._active -= 1
+            self._adapt(duration)
+        while self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+def route_bulkheads(config, bulkhead_class=Bulkhead) -> Dict[str, Bulkhead]:
+    """One bulkhead per route class (BULKHEAD_CLASS_LIMITS), keyed by the endpoints in the class"""
+    if not config.get('BULKHEAD_ENABLED', True):
+        return {}
+    classes = {
+        name: bulkhead_class.from_config(config, f"route:{name}", limit)
+        for name, limit in config['BULKHEAD_CLASS_LIMITS'].items()
+    }
+    return {endpoint: classes[name] for endpoint, name in config['BULKHEAD_ROUTE_CLASSES'].items() if name in classes}
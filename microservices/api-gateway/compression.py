@@ -0,0 +1,173 @@
+"""Response compression negotiated on Accept-Encoding.
+
+Large JSON answers (every exercise with its test cases, every score with its
+answer) shrink several times with gzip, or brotli when the brotli package is
+installed. Bodies below COMPRESSION_MIN_SIZE are sent as they are. Streamed
+bodies (the passthrough proxy) are compressed chunk by chunk and flushed
+after each chunk, so the client does not wait for the whole body. Bodies an
+upstream already encoded are relayed untouched.
+
+A compressed representation gets a weak ETag, since it is not byte-identical
+to the uncompressed one; If-None-Match still matches it.
+"""
+import asyncio
+import zlib
+from typing import Iterable, Iterator, Optional
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Larger buffered bodies are compressed off the event loop in ASGI mode
+ASYNC_OFFLOAD_SIZE = 64 * 1024
+
+class _GzipStream:
+    def __init__(self, level: int):
+        # wbits=31: gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+class ResponseCompressor:
+    """Compresses responses with the best encoding the client accepts"""
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 mimetypes: Iterable[str] = ('application/json',), brotli_enabled: bool = True):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+        # In order of preference when the client accepts several equally
+        self.encodings = ('br', 'gzip') if brotli_enabled and brotli is not None else ('gzip',)
+
+    @classmethod
+    def from_config(cls, config) -> Optional['ResponseCompressor']:
+        """Build a compressor from COMPRESSION_* settings; None when compression is disabled"""
+        if not config.get('COMPRESSION_ENABLED', True):
+            return None
+        return cls(
+            min_size=config['COMPRESSION_MIN_SIZE'],
+            gzip_level=config['COMPRESSION_GZIP_LEVEL'],
+            brotli_quality=config['COMPRESSION_BROTLI_QUALITY'],
+            mimetypes=config['COMPRESSION_MIMETYPES'],
+            brotli_enabled=config['COMPRESSION_BROTLI_ENABLED']
+        )
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """Encoding to use for an Accept-Encoding value, None to send the body as it is"""
+        if not accept_encoding:
+            return None
+        weights = {}
+        for item in accept_encoding.split(','):
+            coding, _, params = item.strip().partition(';')
+            weight = 1.0
+            for param in params.split(';'):
+                name, _, value = param.strip().partition('=')
+                if name.lower() == 'q':
+                    try:
+                        weight = float(value)
+                    except ValueError:
+                        weight = 0.0
+            weights[coding.strip().lower()] = weight
+        best, best_weight = None, 0.0
+        for encoding in self.encodings:
+            weight = weights.get(encoding, weights.get('*', 0.0))
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    def _stream(self, encoding: str):
+        return _BrotliStream(self.brotli_quality) if encoding == 'br' else _GzipStream(self.gzip_level)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        compressed = self._stream(encoding).finish(data)
+        metrics.COMPRESSION_BYTES.labels(encoding, 'in').inc(len(data))
+        metrics.COMPRESSION_BYTES.labels(encoding, 'out').inc(len(compressed))
+        return compressed
+
+    def compress_stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        stream = self._stream(encoding)
+        try:
+            for data in chunks:
+                if isinstance(data, str):
+                    data = data.encode()
+                out = stream.chunk(data)
+                metrics.COMPRESSION_BYTES.labels(encoding, 'in').inc(len(data))
+                metrics.COMPRESSION_BYTES.labels(encoding, 'out').inc(len(out))
+                if out:
+                    yield out
+            out = stream.finish()
+            metrics.COMPRESSION_BYTES.labels(encoding, 'out').inc(len(out))
+            yield out
+        finally:
+            # Closing the wrapper must also close the upstream body
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _select(self, response, accept_encoding: Optional[str]) -> Optional[str]:
+        """Encoding for `response`, marking it as varying on Accept-Encoding when it could be compressed"""
+        if (response.status_code < 200 or response.status_code in (204, 206) or response.status_code >= 300
+                or 'Content-Encoding' in response.headers or response.mimetype not in self.mimetypes
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return None
+        response.vary.add('Accept-Encoding')
+        return self.negotiate(accept_encoding)
+
+    @staticmethod
+    def _mark(response, encoding: str):
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def compress_response(self, response, accept_encoding: Optional[str]):
+        """Compress a Flask response in place when the client accepts it"""
+        encoding = self._select(response, accept_encoding)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = self.compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress(data, encoding))
+        self._mark(response, encoding)
+        return response
+
+    async def compress_async_response(self, response, accept_encoding: Optional[str]):
+        """Compress a buffered Quart response in place when the client accepts it"""
+        from quart.wrappers.response import DataBody
+        if not isinstance(response.response, DataBody):
+            return response
+        encoding = self._select(response, accept_encoding)
+        if encoding is None:
+            return response
+        data = await response.get_data()
+        if len(data) < self.min_size:
+            return response
+        if len(data) >= ASYNC_OFFLOAD_SIZE:
+            compressed = await asyncio.get_running_loop().run_in_executor(None, self.compress, data, encoding)
+        else:
+            compressed = self.compress(data, encoding)
+        response.set_data(compressed)
+        self._mark(response, encoding)
+        return response
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class Config:
     # API Gateway Configuration
@@ -16,6 +17,129 @@ class Config:
     
     # Rate limiting (requests per minute)
     RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', '100'))
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    # 'sqlite' shares buckets between the gunicorn workers of one host; 'memory' limits per worker
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite')
+    RATE_LIMIT_STORAGE_PATH = os.environ.get('RATE_LIMIT_STORAGE_PATH', os.path.join(tempfile.gettempdir(), 'api-gateway-ratelimit.db'))
+    # Proxies in front of the gateway (e.g. the ingress load balancer) whose X-Forwarded-For entry is trusted;
+    # 0 uses the socket address, which behind a proxy puts every anonymous client in one rate-limit bucket
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+    # Tokens charged per request, by route (endpoint name:cost)
+    RATE_LIMIT_DEFAULT_COST = int(os.environ.get('RATE_LIMIT_DEFAULT_COST', '1'))
+    RATE_LIMIT_ROUTE_COSTS = {endpoint.strip(): int(cost) for endpoint, cost in (
+        item.split(':') for item in os.environ.get('RATE_LIMIT_ROUTE_COSTS', 'validate_code:10,attempt_exercise:10').split(',') if ':' in item)}
     
-    # Request timeout (seconds)
-    REQUEST_TIMEOUT = int(os.environ.get('REQUEST_TIMEOUT', '30'))
\ No newline at end of file
+    # Request timeout (seconds): the time budget of routes not listed in ROUTE_TIMEOUTS
+    REQUEST_TIMEOUT = int(os.environ.get('REQUEST_TIMEOUT', '30'))
+    # Time budget per route (endpoint name:seconds), shared by all upstream calls of the request
+    ROUTE_TIMEOUTS = {endpoint.strip(): float(seconds) for endpoint, seconds in (
+        item.split(':') for item in os.environ.get(
+            'ROUTE_TIMEOUTS',
+            'login:10,register:10,logout:5,get_user_status:5,get_all_exercises:10,get_single_exercise:5,'
+            'get_all_scores:10,get_scores_by_user:10,get_single_score_by_user:5,validate_code:20,'
+            'attempt_exercise:25,batch:20').split(',') if ':' in item)}
+    
+    # Service URLs may list several replicas ("http://a:8082,http://b:8082") or name a headless
+    # Service to re-resolve ("dns+http://exercises-service-headless:5002"); requests are then
+    # balanced by power-of-two-choices ('p2c') or 'least_outstanding', and replicas failing
+    # LB_EJECTION_FAILURES calls in a row are ejected for LB_EJECTION_SECONDS
+    LB_STRATEGY = os.environ.get('LB_STRATEGY', 'p2c')
+    LB_RESOLVE_INTERVAL = float(os.environ.get('LB_RESOLVE_INTERVAL', '30'))
+    LB_EJECTION_FAILURES = int(os.environ.get('LB_EJECTION_FAILURES', '5'))
+    LB_EJECTION_SECONDS = float(os.environ.get('LB_EJECTION_SECONDS', '30'))
+    LB_MAX_EJECTION_RATIO = float(os.environ.get('LB_MAX_EJECTION_RATIO', '0.5'))
+    
+    # Upstream connection pooling (per service client)
+    UPSTREAM_POOL_MAXSIZE = int(os.environ.get('UPSTREAM_POOL_MAXSIZE', '10'))
+    UPSTREAM_POOL_BLOCK = os.environ.get('UPSTREAM_POOL_BLOCK', 'false').lower() == 'true'
+    UPSTREAM_KEEP_ALIVE = os.environ.get('UPSTREAM_KEEP_ALIVE', 'true').lower() == 'true'
+    # Upstream gunicorn workers close idle keep-alive sockets after 2 seconds
+    UPSTREAM_POOL_IDLE_TIMEOUT = float(os.environ.get('UPSTREAM_POOL_IDLE_TIMEOUT', '2'))
+    # USER_SERVICE_MAX_CONNECTIONS is the legacy name and still honoured
+    USER_MANAGEMENT_SERVICE_MAX_CONNECTIONS = int(os.environ.get(
+        'USER_MANAGEMENT_SERVICE_MAX_CONNECTIONS',
+        os.environ.get('USER_SERVICE_MAX_CONNECTIONS', UPSTREAM_POOL_MAXSIZE)))
+    EXERCISES_SERVICE_MAX_CONNECTIONS = int(os.environ.get('EXERCISES_SERVICE_MAX_CONNECTIONS', UPSTREAM_POOL_MAXSIZE))
+    SCORES_SERVICE_MAX_CONNECTIONS = int(os.environ.get('SCORES_SERVICE_MAX_CONNECTIONS', UPSTREAM_POOL_MAXSIZE))
+    # Async (ASGI) mode multiplexes many requests per worker, so it needs a larger pool
+    ASYNC_UPSTREAM_POOL_MAXSIZE = int(os.environ.get('ASYNC_UPSTREAM_POOL_MAXSIZE', '200'))
+    
+    # Share one upstream call between identical concurrent GETs
+    SINGLE_FLIGHT_ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    
+    # Retries of idempotent upstream GETs with jittered exponential backoff. Retries and hedges
+    # per upstream are capped at RETRY_BUDGET_RATIO of the calls in the last 10 s (plus a floor)
+    RETRY_ENABLED = os.environ.get('RETRY_ENABLED', 'true').lower() == 'true'
+    RETRY_MAX_RETRIES = int(os.environ.get('RETRY_MAX_RETRIES', '2'))
+    RETRY_BACKOFF_BASE = float(os.environ.get('RETRY_BACKOFF_BASE', '0.05'))
+    RETRY_BACKOFF_MAX = float(os.environ.get('RETRY_BACKOFF_MAX', '1'))
+    RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', '0.1'))
+    RETRY_BUDGET_MIN_PER_SECOND = float(os.environ.get('RETRY_BUDGET_MIN_PER_SECOND', '1'))
+    # Hedged reads: a second attempt once the first is slower than the route's HEDGE_PERCENTILE latency
+    HEDGE_ROUTES = [r.strip() for r in os.environ.get('HEDGE_ROUTES', 'get_single_exercise,get_scores_by_user').split(',') if r.strip()]
+    HEDGE_PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE', '0.95'))
+    HEDGE_MIN_SAMPLES = int(os.environ.get('HEDGE_MIN_SAMPLES', '20'))
+    
+    # Bulkheads: concurrent calls per upstream (its pool size) and per route class, each with a
+    # short wait queue; calls beyond that are shed with 503. Limits apply per gunicorn worker.
+    BULKHEAD_ENABLED = os.environ.get('BULKHEAD_ENABLED', 'true').lower() == 'true'
+    BULKHEAD_MAX_QUEUE = int(os.environ.get('BULKHEAD_MAX_QUEUE', '10'))
+    BULKHEAD_QUEUE_TIMEOUT = float(os.environ.get('BULKHEAD_QUEUE_TIMEOUT', '0.1'))
+    BULKHEAD_ROUTE_CLASSES = {endpoint.strip(): name.strip() for endpoint, name in (
+        item.split(':') for item in os.environ.get(
+            'BULKHEAD_ROUTE_CLASSES', 'validate_code:sandbox,attempt_exercise:sandbox').split(',') if ':' in item)}
+    BULKHEAD_CLASS_LIMITS = {name.strip(): int(limit) for name, limit in (
+        item.split(':') for item in os.environ.get('BULKHEAD_CLASS_LIMITS', 'sandbox:4').split(',') if ':' in item)}
+    # Adaptive mode lowers the limits while upstream latency is well above its best
+    BULKHEAD_ADAPTIVE = os.environ.get('BULKHEAD_ADAPTIVE', 'false').lower() == 'true'
+    BULKHEAD_MIN_CONCURRENT = int(os.environ.get('BULKHEAD_MIN_CONCURRENT', '2'))
+    BULKHEAD_LATENCY_TOLERANCE = float(os.environ.get('BULKHEAD_LATENCY_TOLERANCE', '2'))
+    
+    # Token verification cache (seconds; 0 disables)
+    AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', '30'))
+    AUTH_CACHE_NEGATIVE_TTL = float(os.environ.get('AUTH_CACHE_NEGATIVE_TTL', '5'))
+    AUTH_CACHE_MAX_SIZE = int(os.environ.get('AUTH_CACHE_MAX_SIZE', '1024'))
+    
+    # Ed25519 private key for the signed identity header sent upstream (unset: services verify tokens themselves)
+    GATEWAY_IDENTITY_PRIVATE_KEY = os.environ.get('GATEWAY_IDENTITY_PRIVATE_KEY', '')
+    GATEWAY_IDENTITY_TTL = float(os.environ.get('GATEWAY_IDENTITY_TTL', '30'))
+    
+    # Gateway cache of exercise reads (seconds; 0 disables)
+    EXERCISE_CACHE_TTL = float(os.environ.get('EXERCISE_CACHE_TTL', '60'))
+    EXERCISE_CACHE_MAX_SIZE = int(os.environ.get('EXERCISE_CACHE_MAX_SIZE', '512'))
+    
+    # POST /batch: sub-requests per batch and threads running them
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '10'))
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '8'))
+    
+    # Upstream health checks: per-check deadline and background refresh interval (0 = check on every request)
+    HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', '2'))
+    HEALTH_PROBE_INTERVAL = float(os.environ.get('HEALTH_PROBE_INTERVAL', '10'))
+    
+    # Passthrough proxy: forward raw request bodies and stream upstream responses unparsed
+    PASSTHROUGH_PROXY = os.environ.get('PASSTHROUGH_PROXY', 'false').lower() == 'true'
+    PASSTHROUGH_REQUEST_HEADERS = [h.strip() for h in os.environ.get(
+        'PASSTHROUGH_REQUEST_HEADERS', 'Authorization,Content-Type,Accept,Accept-Encoding,Accept-Language,User-Agent').split(',')]
+    PASSTHROUGH_RESPONSE_HEADERS = [h.strip() for h in os.environ.get(
+        'PASSTHROUGH_RESPONSE_HEADERS', 'Content-Type,Content-Length,Content-Encoding,Cache-Control,ETag,Last-Modified,Vary').split(',')]
+    PASSTHROUGH_CHUNK_SIZE = int(os.environ.get('PASSTHROUGH_CHUNK_SIZE', '65536'))
+    
+    # Response compression negotiated on Accept-Encoding; brotli needs the brotli package.
+    # Higher levels shrink bodies further for more CPU (gzip 1-9, brotli 0-11)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_ENABLED = os.environ.get('COMPRESSION_BROTLI_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+    COMPRESSION_MIMETYPES = [m.strip() for m in os.environ.get(
+        'COMPRESSION_MIMETYPES', 'application/json,text/plain,text/html').split(',')]
+    
+    # Per-upstream circuit breaker
+    CIRCUIT_BREAKER_ENABLED = os.environ.get('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+    CIRCUIT_FAILURE_RATE_THRESHOLD = float(os.environ.get('CIRCUIT_FAILURE_RATE_THRESHOLD', '0.5'))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.environ.get('CIRCUIT_SLOW_CALL_SECONDS', '5'))
+    CIRCUIT_SLOW_CALL_RATE_THRESHOLD = float(os.environ.get('CIRCUIT_SLOW_CALL_RATE_THRESHOLD', '0.8'))
+    CIRCUIT_MINIMUM_CALLS = int(os.environ.get('CIRCUIT_MINIMUM_CALLS', '10'))
+    CIRCUIT_WINDOW_SIZE = int(os.environ.get('CIRCUIT_WINDOW_SIZE', '20'))
+    CIRCUIT_OPEN_SECONDS = float(os.environ.get('CIRCUIT_OPEN_SECONDS', '30'))
+    CIRCUIT_HALF_OPEN_CALLS = int(os.environ.get('CIRCUIT_HALF_OPEN_CALLS', '3'))
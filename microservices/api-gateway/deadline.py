@@ -0,0 +1,51 @@
+"""Per-request deadlines.
+
+Each request gets a time budget for its route (ROUTE_TIMEOUTS, falling back
+to REQUEST_TIMEOUT), shortened further when the client sends an earlier
+X-Request-Deadline. Upstream calls are given at most the time that is left
+and forward the deadline so the services can drop work nobody waits for.
+
+The header carries the deadline as Unix time in seconds; the gateway and the
+services share a host clock, so no skew allowance is made.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+DEADLINE_HEADER = 'X-Request-Deadline'
+
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised instead of calling upstream once the request's deadline has passed"""
+
+def start(budget: float, incoming: Optional[str] = None) -> float:
+    """Set the deadline of the current request; an earlier client deadline wins"""
+    expires = time.time() + budget
+    try:
+        expires = min(expires, float(incoming)) if incoming else expires
+    except ValueError:
+        pass
+    _deadline.set(expires)
+    return expires
+
+def end():
+    _deadline.set(None)
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current request, None outside a request"""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.time()
+
+def header_value() -> Optional[str]:
+    expires = _deadline.get()
+    return None if expires is None else f"{expires:.3f}"
+
+def call_timeout(timeout: float) -> float:
+    """`timeout` capped to the time left; raises DeadlineExceeded when none is"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded {-left:.3f}s ago")
+    return min(timeout, left)
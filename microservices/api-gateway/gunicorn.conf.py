@@ -0,0 +1,20 @@
+"""Gunicorn settings shared by the sync (app:app) and ASGI (asgi:app) serving modes"""
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+# Threads per sync worker; bulkheads keep slow routes from taking all of them
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be merged into /metrics
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+def _health_status(status_code: int) -> Dict[str, Any]:
+    return {
+        "status": "healthy" if status_code == 200 else "unhealthy",
+        "response_code": status_code
+    }
+
+def check_service_health(client, timeout: float) -> Dict[str, Any]:
+    """Run one upstream health check bounded by `timeout` seconds"""
+    try:
+        _, status_code = client.health_check(timeout=timeout)
+    except Exception:
+        status_code = 503
+    return _health_status(status_code)
+
+class HealthProber:
+    """Checks upstream health concurrently and keeps the latest results in memory.
+
+    With a positive interval a daemon thread refreshes the results in the
+    background and readers answer from memory; otherwise every snapshot
+    runs a fresh concurrent fan-out.
+    """
+
+    def __init__(self, clients: Dict[str, Any], interval: float = 10.0, timeout: float = 2.0):
+        self.clients = clients
+        self.interval = interval
+        self.timeout = timeout
+        self._results = {}
+        self._lock = threading.Lock()
+        # Threads start on first submit, so building the pool here is fork-safe
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(clients) * 2),
+                                            thread_name_prefix='health-check')
+        self._worker = None
+
+    def _record(self, results: Dict[str, Dict[str, Any]]):
+        checked_at = time.time()
+        with self._lock:
+            for name, result in results.items():
+                self._results[name] = dict(result, checked_at=checked_at)
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Check all upstreams in parallel; unfinished checks count as timeouts"""
+        futures = {
+            name: self._executor.submit(check_service_health, client, self.timeout)
+            for name, client in self.clients.items()
+        }
+        wait(futures.values(), timeout=self.timeout)
+        results = {
+            name: future.result() if future.done() else _health_status(504)
+            for name, future in futures.items()
+        }
+        self._record(results)
+        return results
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background health probe failed: {str(e)}")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._worker is not None:
+                return
+            # Started lazily so each gunicorn worker runs its own prober after fork
+            self._worker = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._worker.start()
+
+    def _is_stale(self) -> bool:
+        with self._lock:
+            if len(self._results) < len(self.clients):
+                return True
+            oldest = min(r["checked_at"] for r in self._results.values())
+        return time.time() - oldest > self.interval * 3 + self.timeout
+
+    def _results_with_age(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    "status": result["status"],
+                    "response_code": result["response_code"],
+                    "age_seconds": round(max(0.0, now - result["checked_at"]), 3)
+                }
+                for name, result in self._results.items()
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Latest result per upstream with the age of each result"""
+        if self.interval <= 0:
+            self.refresh()
+        else:
+            self._ensure_started()
+            if self._is_stale():
+                self.refresh()
+        return self._results_with_age()
+
+class AsyncHealthProber(HealthProber):
+    """HealthProber for the asyncio gateway; the background loop is an asyncio task"""
+
+    async def _check(self, client) -> Dict[str, Any]:
+        try:
+            _, status_code = await asyncio.wait_for(client.health_check(timeout=self.timeout), self.timeout)
+        except asyncio.TimeoutError:
+            status_code = 504
+        except Exception:
+            status_code = 503
+        return _health_status(status_code)
+
+    async def refresh(self) -> Dict[str, Dict[str, Any]]:
+        names = list(self.clients)
+        statuses = await asyncio.gather(*(self._check(self.clients[name]) for name in names))
+        results = dict(zip(names, statuses))
+        self._record(results)
+        return results
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Background health probe failed: {str(e)}")
+
+    def _ensure_started(self):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        if self.interval <= 0:
+            await self.refresh()
+        else:
+            self._ensure_started()
+            if self._is_stale():
+                await self.refresh()
+        return self._results_with_age()
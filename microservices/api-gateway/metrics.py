@@ -0,0 +1,93 @@
+"""Prometheus metrics of the API Gateway.
+
+Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(see gunicorn.conf.py) and /metrics merges them, so counters and histograms
+cover all workers whichever one answers the scrape. Without that variable
+metrics are kept in process memory.
+"""
+import os
+from typing import Optional, Tuple
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               REGISTRY, generate_latest, multiprocess)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS = Counter(
+    'gateway_requests_total', 'Requests served by the gateway',
+    ['route', 'method', 'status'])
+REQUEST_LATENCY = Histogram(
+    'gateway_request_duration_seconds', 'Gateway request latency',
+    ['route', 'method', 'status'], buckets=LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge(
+    'gateway_requests_in_flight', 'Requests being served by the gateway',
+    multiprocess_mode='livesum')
+
+UPSTREAM_REQUESTS = Counter(
+    'gateway_upstream_requests_total', 'Calls made to upstream services',
+    ['upstream', 'method', 'status'])
+UPSTREAM_LATENCY = Histogram(
+    'gateway_upstream_request_duration_seconds',
+    'Upstream call latency by phase: connect (new connections only), wait (until response headers), '
+    'transfer (response body) and total',
+    ['upstream', 'phase'], buckets=LATENCY_BUCKETS)
+UPSTREAM_IN_FLIGHT = Gauge(
+    'gateway_upstream_requests_in_flight', 'Calls in progress to upstream services',
+    ['upstream'], multiprocess_mode='livesum')
+UPSTREAM_RETRIES = Counter(
+    'gateway_upstream_retries_total', 'Extra upstream attempts: retry, hedge, or denied by the retry budget',
+    ['upstream', 'kind'])
+
+BULKHEAD_QUEUE_DEPTH = Gauge(
+    'gateway_bulkhead_queue_depth', 'Calls waiting for a bulkhead slot',
+    ['bulkhead'], multiprocess_mode='livesum')
+BULKHEAD_SHED = Counter(
+    'gateway_bulkhead_shed_total', 'Calls shed because the bulkhead and its queue were full',
+    ['bulkhead'])
+BULKHEAD_LIMIT = Gauge(
+    'gateway_bulkhead_limit', 'Current bulkhead concurrency limit (lowered by adaptive mode), lowest worker',
+    ['bulkhead'], multiprocess_mode='livemin')
+
+LB_EJECTIONS = Counter(
+    'gateway_upstream_endpoint_ejections_total', 'Upstream replicas ejected after consecutive failures',
+    ['upstream'])
+LB_RESOLVE_FAILURES = Counter(
+    'gateway_upstream_resolve_failures_total', 'Failed DNS lookups of upstream replicas',
+    ['upstream'])
+
+COMPRESSION_BYTES = Counter(
+    'gateway_compression_bytes_total', 'Response body bytes before (in) and after (out) compression',
+    ['encoding', 'stage'])
+
+CIRCUIT_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+CIRCUIT_STATE = Gauge(
+    'gateway_circuit_state', 'Upstream circuit breaker state (0 closed, 1 half-open, 2 open), worst worker',
+    ['upstream'], multiprocess_mode='livemax')
+
+def route_label(url_rule) -> str:
+    """Route template (e.g. /exercises/<int:exercise_id>) so ids do not explode label cardinality"""
+    return url_rule.rule if url_rule is not None else 'unmatched'
+
+def observe_request(route: str, method: str, status: int, duration: float):
+    REQUESTS.labels(route, method, status).inc()
+    REQUEST_LATENCY.labels(route, method, status).observe(duration)
+
+def observe_upstream(upstream: str, method: str, status, total: float, connect: Optional[float] = None,
+                     wait: Optional[float] = None, transfer: Optional[float] = None):
+    """Record one upstream call; status is the HTTP status or an error name"""
+    UPSTREAM_REQUESTS.labels(upstream, method, status).inc()
+    UPSTREAM_LATENCY.labels(upstream, 'total').observe(total)
+    for phase, value in (('connect', connect), ('wait', wait), ('transfer', transfer)):
+        if value is not None:
+            UPSTREAM_LATENCY.labels(upstream, phase).observe(max(0.0, value))
+
+def set_circuit_state(upstream: str, state: str):
+    CIRCUIT_STATE.labels(upstream).set(CIRCUIT_STATES.get(state, 0))
+
+def render() -> Tuple[bytes, str]:
+    """Exposition body and content type for the /metrics endpoint"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,7 +1,13 @@
+import hashlib
 import logging
 from functools import wraps
+from typing import Optional
 from flask import request, jsonify, g
+from cache import TTLCache
 from services import UserManagementServiceClient
+import tracing
+import identity
+from identity import IdentitySigner
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +18,21 @@ ADMIN_REQUIRED_MSG = "Admin privileges required"
 class AuthMiddleware:
     """Authentication middleware"""
     
-    def __init__(self, user_management_client: UserManagementServiceClient):
+    # Upstream answers that mean the token itself is bad, not that verification failed
+    REJECTED_TOKEN_STATUSES = (401, 403, 404)
+    
+    def __init__(self, user_management_client: UserManagementServiceClient,
+                 cache_ttl: float = 30.0, negative_cache_ttl: float = 5.0, cache_max_size: int = 1024,
+                 identity_signer: Optional[IdentitySigner] = None):
         self.user_management_client = user_management_client
+        self.identity_signer = identity_signer
+        self.token_cache = TTLCache(max_size=cache_max_size, ttl=cache_ttl)
+        self.rejected_token_cache = TTLCache(max_size=cache_max_size, ttl=negative_cache_ttl)
+    
+    @staticmethod
+    def _token_key(token: str) -> str:
+        """Cache key for a token; raw tokens are never kept in memory"""
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
     
     def extract_token_from_header(self) -> str:
         """Extract token from Authorization header"""
@@ -25,20 +44,62 @@ class AuthMiddleware:
         except IndexError:
             return ""
     
+    def _cached_verification(self, key: str) -> Optional[dict]:
+        """Cached user payload, {} for a cached rejection, None when unknown"""
+        user_data = self.token_cache.get(key)
+        if user_data is not None:
+            return dict(user_data)
+        if self.rejected_token_cache.get(key):
+            return {}
+        return None
+    
+    def _remember_verification(self, key: str, response: dict, status_code: int) -> dict:
+        """Cache an upstream verification answer and return the user payload"""
+        if status_code == 200 and response.get('status') == 'success':
+            user_data = response.get('data')
+            if user_data:
+                self.token_cache.set(key, dict(user_data))
+            return user_data
+        if status_code in self.REJECTED_TOKEN_STATUSES:
+            self.rejected_token_cache.set(key, True)
+        return {}
+    
     def verify_token(self, token: str) -> dict:
         """Verify token with user management service"""
+        key = self._token_key(token)
+        user_data = self._cached_verification(key)
+        if user_data is not None:
+            return user_data
         response, status_code = self.user_management_client.verify_token(token)
-        if status_code == 200 and response.get('status') == 'success':
-            return response.get('data')
-        return {}
+        return self._remember_verification(key, response, status_code)
+    
+    def invalidate_token(self, token: str):
+        """Forget any cached verification result for a token"""
+        key = self._token_key(token)
+        self.token_cache.delete(key)
+        self.rejected_token_cache.delete(key)
+    
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the verification caches"""
+        return {
+            "verified": self.token_cache.stats(),
+            "rejected": self.rejected_token_cache.stats()
+        }
+
+    def _forward_identity(self, user_data: dict, token: str):
+        """Let upstream calls of this request carry the verified user, signed"""
+        if self.identity_signer is not None:
+            identity.start(self.identity_signer.sign(user_data, token))
 
     def _get_user_data(self):
         token = self.extract_token_from_header()
         if not token:
             return None, jsonify({"status": "fail", "message": AUTH_TOKEN_REQUIRED_MSG}), 401
-        user_data = self.verify_token(token)
+        with tracing.timed('auth'):
+            user_data = self.verify_token(token)
         if not user_data:
             return None, jsonify({"status": "fail", "message": INVALID_TOKEN_MSG}), 401
+        self._forward_identity(user_data, token)
         return user_data, None, None
 
 def require_auth(auth_middleware: AuthMiddleware):
@@ -77,7 +138,8 @@ class RequestLoggingMiddleware:
     def log_request():
         """Log incoming request"""
         logger.info(f"{request.method} {request.path} - {request.remote_addr}")
-        if request.method in ['POST', 'PUT'] and request.is_json:
+        # Parsing the body only for a debug line is wasted work at INFO level
+        if request.method in ['POST', 'PUT'] and request.is_json and logger.isEnabledFor(logging.DEBUG):
             data = request.get_json() or {}
             safe_data = {k: "***" if k.lower() in ['password', 'token'] else v 
                         for k, v in data.items()}
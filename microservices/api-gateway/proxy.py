@@ -0,0 +1,58 @@
+import logging
+from functools import wraps
+from typing import Dict, Iterable
+from flask import request, current_app, jsonify, Response
+from services import ServiceClient
+
+logger = logging.getLogger(__name__)
+
+INVALID_PAYLOAD_MSG = "Invalid payload"
+
+def _allowed_headers(headers, allowlist: Iterable[str]) -> Dict[str, str]:
+    """Copy only allowlisted headers (case-insensitive)"""
+    allowed = {name.lower() for name in allowlist}
+    return {name: value for name, value in headers.items() if name.lower() in allowed}
+
+def forward_raw(client: ServiceClient, endpoint: str) -> Response:
+    """Forward the current request body unparsed and stream the upstream answer back unchanged"""
+    config = current_app.config
+    if request.query_string:
+        endpoint = f"{endpoint}?{request.query_string.decode('latin-1')}"
+    headers = _allowed_headers(request.headers, config['PASSTHROUGH_REQUEST_HEADERS'])
+    body = request.get_data() if request.method in ('POST', 'PUT', 'PATCH') else None
+
+    upstream, error_payload, status_code = client.stream_request(request.method, endpoint, data=body, headers=headers)
+    if upstream is None:
+        return jsonify(error_payload), status_code
+
+    chunk_size = config['PASSTHROUGH_CHUNK_SIZE']
+
+    def generate():
+        try:
+            # decode_content=False keeps upstream bytes (and Content-Encoding) intact
+            yield from upstream.raw.stream(chunk_size, decode_content=False)
+        finally:
+            upstream.close()
+
+    return Response(
+        generate(),
+        status=upstream.status_code,
+        headers=_allowed_headers(upstream.headers, config['PASSTHROUGH_RESPONSE_HEADERS'])
+    )
+
+def passthrough(client: ServiceClient, endpoint: str):
+    """Decorator: with PASSTHROUGH_PROXY enabled, skip the view and forward the raw request.
+
+    `endpoint` is the upstream path, formatted with the view arguments
+    (e.g. '/api/exercises/{exercise_id}'). Place it below the auth decorators.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_app.config.get('PASSTHROUGH_PROXY'):
+                return f(*args, **kwargs)
+            if request.method in ('POST', 'PUT') and not request.is_json:
+                return jsonify({"status": "fail", "message": INVALID_PAYLOAD_MSG}), 400
+            return forward_raw(client, endpoint.format(**kwargs))
+        return decorated_function
+    return decorator
@@ -0,0 +1,173 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional, Tuple
+from flask import request, current_app, jsonify, g
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED_MSG = "Too many requests"
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+class MemoryBackend:
+    """Token buckets in process memory; each worker process limits on its own"""
+
+    # consume() only takes an in-process lock
+    BLOCKING = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float]:
+        """Take `cost` tokens from a bucket; returns (allowed, tokens left)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, capacity, rate)
+            return allowed, tokens
+
+    def _prune(self, now: float, capacity: float, rate: float):
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = capacity / rate
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+
+class SQLiteBackend:
+    """Token buckets in a SQLite file shared by every gunicorn worker on the host.
+
+    Each consume is one short IMMEDIATE transaction, so concurrent workers
+    serialize on the database lock instead of overrunning the limit.
+    """
+
+    PRUNE_EVERY = 1000
+    # consume() may wait up to the busy timeout on other workers' transactions
+    BLOCKING = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and opened lazily, i.e. after gunicorn forks
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float]:
+        """Take `cost` tokens from a bucket; returns (allowed, tokens left)"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else _refill(row[0], row[1], now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)', (key, tokens, now))
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - capacity / rate,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, tokens
+
+class RateLimiter:
+    """Token-bucket limiter: `per_minute` tokens per client, refilled continuously.
+
+    Routes cost `default_cost` tokens unless listed in `route_costs`
+    (keyed by Flask endpoint name).
+    """
+
+    def __init__(self, backend, per_minute: int, route_costs: Optional[Dict[str, int]] = None, default_cost: int = 1):
+        self.backend = backend
+        self.per_minute = per_minute
+        self.route_costs = route_costs or {}
+        self.default_cost = default_cost
+
+    @classmethod
+    def from_config(cls, config) -> 'RateLimiter':
+        if config.get('RATE_LIMIT_BACKEND', 'sqlite') == 'sqlite':
+            backend = SQLiteBackend(config['RATE_LIMIT_STORAGE_PATH'])
+        else:
+            backend = MemoryBackend()
+        return cls(
+            backend,
+            per_minute=config['RATE_LIMIT_PER_MINUTE'],
+            route_costs=config.get('RATE_LIMIT_ROUTE_COSTS'),
+            default_cost=config.get('RATE_LIMIT_DEFAULT_COST', 1)
+        )
+
+    @property
+    def blocking(self) -> bool:
+        """Whether check() can block, and so must stay off an event loop"""
+        return self.backend.BLOCKING
+
+    def cost_of(self, endpoint: Optional[str]) -> int:
+        return self.route_costs.get(endpoint, self.default_cost)
+
+    def check(self, key: str, cost: int) -> Tuple[bool, int]:
+        """Consume tokens for a call; returns (allowed, Retry-After seconds)"""
+        capacity = float(self.per_minute)
+        rate = capacity / 60.0
+        cost = min(cost, self.per_minute)
+        try:
+            allowed, tokens = self.backend.consume(key, cost, capacity, rate)
+        except Exception as e:
+            # A broken limiter store must not take the gateway down with it
+            logger.warning(f"Rate limiter backend error, allowing request: {str(e)}")
+            return True, 0
+        if allowed:
+            return True, 0
+        return False, max(1, math.ceil((cost - tokens) / rate))
+
+def client_key(user: Optional[dict], remote_addr: Optional[str]) -> str:
+    """Authenticated user id when the auth decorators ran, otherwise the client IP"""
+    if user and user.get('id') is not None:
+        return f"user:{user['id']}"
+    return f"ip:{remote_addr}"
+
+def enforce_rate_limit(cost: Optional[int] = None):
+    """Charge the current client; returns a 429 response when over the limit, else None"""
+    if not current_app.config.get('RATE_LIMIT_ENABLED'):
+        return None
+    limiter = current_app.extensions['rate_limiter']
+    if cost is None:
+        cost = limiter.cost_of(request.endpoint)
+    allowed, retry_after = limiter.check(client_key(g.get('current_user'), request.remote_addr), cost)
+    if allowed:
+        return None
+    response = jsonify({"status": "fail", "message": RATE_LIMITED_MSG})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def rate_limit(f):
+    """Decorator: enforce the app's RateLimiter. Place it below the auth decorators."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        limited = enforce_rate_limit()
+        if limited:
+            return limited
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,253 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    """Per-upstream circuit breaker.
+
+    Closed: calls flow and outcomes are recorded in a sliding window of the
+    last `window_size` calls. Once `minimum_calls` are recorded, the circuit
+    opens when the failure rate or the slow-call rate reaches its threshold.
+    Open: calls are rejected for `open_seconds`. Half-open: up to
+    `half_open_calls` trial calls are let through; all of them succeeding
+    closes the circuit, any failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5, slow_call_seconds: float = 5.0,
+                 slow_call_rate_threshold: float = 0.8, minimum_calls: int = 10, window_size: int = 20,
+                 open_seconds: float = 30.0, half_open_calls: int = 3):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._window = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @classmethod
+    def from_config(cls, config, name: str) -> Optional['CircuitBreaker']:
+        """Build a breaker from CIRCUIT_* settings; None when breakers are disabled"""
+        if not config.get('CIRCUIT_BREAKER_ENABLED', True):
+            return None
+        return cls(
+            name,
+            failure_rate_threshold=config['CIRCUIT_FAILURE_RATE_THRESHOLD'],
+            slow_call_seconds=config['CIRCUIT_SLOW_CALL_SECONDS'],
+            slow_call_rate_threshold=config['CIRCUIT_SLOW_CALL_RATE_THRESHOLD'],
+            minimum_calls=config['CIRCUIT_MINIMUM_CALLS'],
+            window_size=config['CIRCUIT_WINDOW_SIZE'],
+            open_seconds=config['CIRCUIT_OPEN_SECONDS'],
+            half_open_calls=config['CIRCUIT_HALF_OPEN_CALLS']
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trial_calls = 0
+            self._trial_successes = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.times_opened += 1
+
+    def allow_request(self) -> bool:
+        """Reserve a call slot; False means fail fast"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_calls:
+                self._trial_calls += 1
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def release(self):
+        """Give back a slot from allow_request whose call was abandoned without an outcome"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._trial_calls > self._trial_successes:
+                self._trial_calls -= 1
+
+    def record(self, success: bool, duration: float):
+        """Record the outcome of a call admitted by allow_request"""
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if not success or slow:
+                    self._open()
+                    return
+                self._trial_successes += 1
+                if self._trial_successes >= self.half_open_calls:
+                    self._state = self.CLOSED
+                    self._window.clear()
+                return
+            if self._state != self.CLOSED:
+                return
+            self._window.append((not success, slow))
+            if len(self._window) < self.minimum_calls:
+                return
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _rates(self):
+        calls = len(self._window)
+        if not calls:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failures / calls, slow / calls
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            failure_rate, slow_rate = self._rates()
+            return {
+                "state": self._state,
+                "failure_rate": round(failure_rate, 4),
+                "slow_call_rate": round(slow_rate, 4),
+                "calls_in_window": len(self._window),
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls
+            }
+
+
+class RetryBudget:
+    """Caps retries at a share of recent traffic so they cannot amplify an outage.
+
+    Over a sliding window of `window_seconds`, retries (and hedged requests)
+    are allowed while they stay below `ratio` of the calls made, plus
+    `min_per_second` so that quiet upstreams can still be retried.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, window_seconds: int = 10):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window_seconds = window_seconds
+        self._buckets = deque()  # [second, calls, retries]
+        self._lock = threading.Lock()
+        self.denied = 0
+
+    def _bucket(self):
+        now = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self.window_seconds:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+
+    def record_call(self):
+        with self._lock:
+            self._bucket()[1] += 1
+
+    def try_withdraw(self) -> bool:
+        """Reserve one retry; False when the budget is spent"""
+        with self._lock:
+            bucket = self._bucket()
+            calls = sum(b[1] for b in self._buckets)
+            retries = sum(b[2] for b in self._buckets)
+            if retries + 1 > calls * self.ratio + self.min_per_second * self.window_seconds:
+                self.denied += 1
+                return False
+            bucket[2] += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._bucket()
+            return {
+                "calls_in_window": sum(b[1] for b in self._buckets),
+                "retries_in_window": sum(b[2] for b in self._buckets),
+                "denied": self.denied
+            }
+
+class RetryPolicy:
+    """Retry and hedging rules for idempotent upstream GETs of one upstream.
+
+    Failed attempts (connection errors, timeouts, 502-504) are retried up to
+    `max_retries` times with full-jitter exponential backoff, within the
+    retry budget. For `hedge_routes`, a second attempt is sent when the first
+    has not answered by the route's `hedge_percentile` latency, measured over
+    its last `latency_samples` calls.
+    """
+
+    RETRYABLE_STATUSES = (502, 503, 504)
+
+    def __init__(self, max_retries: int = 2, backoff_base: float = 0.05, backoff_max: float = 1.0,
+                 budget: Optional[RetryBudget] = None, hedge_routes: Iterable[str] = (),
+                 hedge_percentile: float = 0.95, hedge_min_samples: int = 20, latency_samples: int = 200):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget or RetryBudget()
+        self.hedge_routes = set(hedge_routes)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_samples = latency_samples
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> Optional['RetryPolicy']:
+        """Build a policy from RETRY_* and HEDGE_* settings; None when retries are disabled"""
+        if not config.get('RETRY_ENABLED', True):
+            return None
+        return cls(
+            max_retries=config['RETRY_MAX_RETRIES'],
+            backoff_base=config['RETRY_BACKOFF_BASE'],
+            backoff_max=config['RETRY_BACKOFF_MAX'],
+            budget=RetryBudget(config['RETRY_BUDGET_RATIO'], config['RETRY_BUDGET_MIN_PER_SECOND']),
+            hedge_routes=config['HEDGE_ROUTES'],
+            hedge_percentile=config['HEDGE_PERCENTILE'],
+            hedge_min_samples=config['HEDGE_MIN_SAMPLES']
+        )
+
+    def backoff(self, retries: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** retries))
+
+    def observe(self, route: Optional[str], duration: float, status_code: int):
+        """Record the latency of a successful attempt for the route's hedge delay"""
+        if route not in self.hedge_routes or status_code >= 500:
+            return
+        with self._lock:
+            samples = self._latencies.setdefault(route, deque(maxlen=self.latency_samples))
+            samples.append(duration)
+
+    def hedge_delay(self, route: Optional[str]) -> Optional[float]:
+        """Seconds to wait before hedging a call of `route`; None when it is not hedged"""
+        if route not in self.hedge_routes:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(route, ()))
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(self.hedge_percentile * len(samples)) - 1)]
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.budget.stats(), hedge_delays={route: self.hedge_delay(route) for route in sorted(self.hedge_routes)})
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from functools import wraps
+from typing import Any, Dict, Optional, Tuple
+from flask import request, make_response, Response
+from cache import TTLCache
+
+class ResponseCache:
+    """Bounded TTL cache of upstream JSON bodies, each with a strong ETag.
+
+    Entries are per worker process, so a write proxied by another worker is
+    only seen here once the TTL expires; writes through this worker
+    invalidate immediately.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 60.0):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a fetch that raced a write is not stored
+        self._generation = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag_for(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.ttl > 0 and self._cache.max_size > 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) of a live entry"""
+        return self._cache.get(key)
+
+    def put(self, key: str, body: bytes, generation: int) -> Tuple[bytes, str]:
+        """Store a body fetched while `generation` was current; returns (body, etag)"""
+        entry = (body, self.etag_for(body))
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, entry)
+        return entry
+
+    def invalidate(self, *keys: str):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._cache.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["not_modified"] = self.not_modified
+        return stats
+
+def _conditional_response(cache: ResponseCache, body: bytes, etag: str) -> Response:
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the body but must revalidate, since exercises can change at any time
+    response.headers['Cache-Control'] = 'no-cache'
+    response.make_conditional(request)
+    if response.status_code == 304:
+        cache.not_modified += 1
+    return response
+
+def cached_response(cache: ResponseCache, key: str):
+    """Decorator: serve 200 JSON answers of a GET view from `cache`, honouring If-None-Match.
+
+    `key` is formatted with the view arguments (e.g. 'exercise:{exercise_id}').
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # The query string is forwarded upstream but is not part of the key, and writes
+            # only invalidate the plain keys, so such reads always go upstream
+            if not cache.enabled or request.query_string:
+                return f(*args, **kwargs)
+            cache_key = key.format(**kwargs)
+            entry = cache.get(cache_key)
+            if entry is None:
+                generation = cache.generation
+                response = make_response(f(*args, **kwargs))
+                # Only plain JSON bodies are cached; encoded passthrough bodies are relayed as-is
+                if (response.status_code != 200 or response.mimetype != 'application/json'
+                        or 'Content-Encoding' in response.headers):
+                    return response
+                entry = cache.put(cache_key, response.get_data(), generation)
+            return _conditional_response(cache, *entry)
+        return decorated_function
+    return decorator
+
+def invalidates(cache: ResponseCache, *keys: str):
+    """Decorator: drop cache entries after the wrapped write view succeeds"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            if response.status_code < 400:
+                cache.invalidate(*(key.format(**kwargs) for key in keys))
+            return response
+        return decorated_function
+    return decorator
+
+async def _async_conditional_response(cache: ResponseCache, body: bytes, etag: str):
+    from quart import request as quart_request, Response as QuartResponse
+    response = QuartResponse(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    await response.make_conditional(quart_request)
+    if response.status_code == 304:
+        cache.not_modified += 1
+    return response
+
+def async_cached_response(cache: ResponseCache, key: str):
+    """cached_response for the async views of the ASGI app"""
+    from quart import request as quart_request, make_response as quart_make_response
+
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            if not cache.enabled or quart_request.query_string:
+                return await f(*args, **kwargs)
+            cache_key = key.format(**kwargs)
+            entry = cache.get(cache_key)
+            if entry is None:
+                generation = cache.generation
+                response = await quart_make_response(await f(*args, **kwargs))
+                if (response.status_code != 200 or response.mimetype != 'application/json'
+                        or 'Content-Encoding' in response.headers):
+                    return response
+                entry = cache.put(cache_key, await response.get_data(), generation)
+            return await _async_conditional_response(cache, *entry)
+        return decorated_function
+    return decorator
+
+def async_invalidates(cache: ResponseCache, *keys: str):
+    """invalidates for the async views of the ASGI app"""
+    from quart import make_response as quart_make_response
+
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            response = await quart_make_response(await f(*args, **kwargs))
+            if response.status_code < 400:
+                cache.invalidate(*(key.format(**kwargs) for key in keys))
+            return response
+        return decorated_function
+    return decorator
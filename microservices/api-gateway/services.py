@@ -1,31 +1,391 @@
 import requests
+import contextvars
 import logging
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from flask import current_app
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from coalesce import SingleFlight
+from bulkhead import Bulkhead, BulkheadFullError
+from balancer import LoadBalancer, NoEndpointsError
+import metrics
+import tracing
+import deadline
+import identity
 from typing import Dict, Any, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Seconds spent opening connections during the current thread's upstream call
+_connect_timing = threading.local()
+
+class _ConnectTimer:
+    def connect(self):
+        started = time.monotonic()
+        try:
+            super().connect()
+        finally:
+            _connect_timing.seconds = getattr(_connect_timing, 'seconds', 0.0) + time.monotonic() - started
+
+class _TimedHTTPConnection(_ConnectTimer, HTTPConnection):
+    pass
+
+class _TimedHTTPSConnection(_ConnectTimer, HTTPSConnection):
+    pass
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
 class ServiceClient:
     """Base class for service clients"""
     
-    def __init__(self, base_url: str, timeout: int = 30):
+    # Upstream statuses that count as failures for the circuit breaker
+    FAILURE_STATUSES = (500, 502, 503, 504)
+    # Upstream label in metrics
+    SERVICE_NAME = 'upstream'
+    # True when GET answers do not depend on the caller, so all callers may share one
+    PUBLIC_READS = False
+    # Replicas kept with open connection pools when load balancing
+    MAX_REPLICA_POOLS = 32
+    
+    def __init__(self, base_url: str, timeout: int = 30, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True, idle_timeout: float = 2.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None, single_flight: Optional[SingleFlight] = None,
+                 retry_policy: Optional[RetryPolicy] = None, bulkhead: Optional[Bulkhead] = None,
+                 balancer: Optional[LoadBalancer] = None):
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
+        self.circuit_breaker = circuit_breaker
+        self.single_flight = single_flight
+        self.retry_policy = retry_policy
+        self.bulkhead = bulkhead
+        self.balancer = balancer
+        # Created up front: gunicorn threads would race to create it lazily
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix='hedge')
+        if circuit_breaker is not None:
+            metrics.set_circuit_state(self.SERVICE_NAME, circuit_breaker.state)
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_used = time.monotonic()
+        self._idle_evictions = 0
+        self.session = self._create_session(pool_maxsize, pool_block, keep_alive)
+    
+    def _create_session(self, pool_maxsize: int, pool_block: bool, keep_alive: bool) -> requests.Session:
+        """Create a pooled session bound to this client's upstream"""
+        session = requests.Session()
+        # Never carry upstream cookies from one end user over to another
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # pool_block caps open connections to each replica at pool_maxsize; one pool per replica
+        pools = 1 if self.balancer is None else self.MAX_REPLICA_POOLS
+        self._adapter = HTTPAdapter(pool_connections=pools, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        # Time connection setup separately for the upstream latency metrics
+        self._adapter.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+    
+    def _evict_idle_connections(self):
+        """Drop pooled sockets the upstream has most likely closed already"""
+        with self._lock:
+            idle_for = time.monotonic() - self._last_used
+            if self._in_flight or self.idle_timeout <= 0 or idle_for < self.idle_timeout:
+                return
+            self._adapter.poolmanager.clear()
+            self._idle_evictions += 1
+        logger.debug(f"Evicted idle connections to {self.base_url} after {idle_for:.1f}s")
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for sizing the pool"""
+        opened = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+        with self._lock:
+            in_flight = self._in_flight
+            evictions = self._idle_evictions
+        return {
+            "max_connections": self.pool_maxsize,
+            "connections_in_use": in_flight,
+            "connections_opened": opened,
+            "requests": served,
+            "reuse_ratio": round(1 - opened / served, 4) if served else 0.0,
+            "idle_evictions": evictions,
+            "single_flight": self.single_flight.stats() if self.single_flight is not None else None,
+            "replicas": self.balancer.stats() if self.balancer is not None else None
+        }
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+        self._hedge_executor.shutdown(wait=False)
+    
+    def _send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session to `endpoint` of a replica; transport errors propagate"""
+        self._evict_idle_connections()
+        
+        # Default timeout, cut down to what is left of the request's deadline
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        kwargs['timeout'] = deadline.call_timeout(kwargs['timeout'])
+        
+        propagated = {tracing.REQUEST_ID_HEADER: tracing.current_request_id(),
+                      deadline.DEADLINE_HEADER: deadline.header_value(),
+                      identity.IDENTITY_HEADER: identity.header_value()}
+        if any(propagated.values()) or isinstance(kwargs.get('headers'), dict):
+            headers = CaseInsensitiveDict(kwargs.get('headers') or {})
+            # Only the gateway asserts identities; never relay one a client sent
+            headers.pop(identity.IDENTITY_HEADER, None)
+            headers.update({name: value for name, value in propagated.items() if value})
+            kwargs['headers'] = headers
+        
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            metrics.UPSTREAM_REQUESTS.labels(self.SERVICE_NAME, method, 'circuit_open').inc()
+            metrics.set_circuit_state(self.SERVICE_NAME, breaker.state)
+            raise CircuitOpenError(f"Circuit for {self.base_url} is open")
+        
+        replica = None
+        if self.balancer is not None:
+            try:
+                replica = self.balancer.pick()
+            except NoEndpointsError:
+                if breaker is not None:
+                    breaker.record(False, 0.0)
+                raise
+        url = f"{replica.url if replica is not None else self.base_url}{endpoint}"
+        with self._lock:
+            self._in_flight += 1
+        metrics.UPSTREAM_IN_FLIGHT.labels(self.SERVICE_NAME).inc()
+        _connect_timing.seconds = 0.0
+        started = time.monotonic()
+        success = False
+        response = None
+        outcome = 'error'
+        try:
+            response = self.session.request(method, url, **kwargs)
+            success = response.status_code not in self.FAILURE_STATUSES
+            outcome = response.status_code
+            return response
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            duration = time.monotonic() - started
+            if breaker is not None:
+                breaker.record(success, duration)
+                metrics.set_circuit_state(self.SERVICE_NAME, breaker.state)
+            if replica is not None:
+                self.balancer.release(replica, success)
+            with self._lock:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+            metrics.UPSTREAM_IN_FLIGHT.labels(self.SERVICE_NAME).dec()
+            self._observe(method, outcome, duration, response, streamed=kwargs.get('stream', False))
+            tracing.record_upstream(self.SERVICE_NAME, duration,
+                                    response.headers.get('Server-Timing') if response is not None else None)
+    
+    def _observe(self, method: str, outcome, duration: float, response: Optional[requests.Response], streamed: bool):
+        """Record latency split into connect, wait (until headers) and transfer (body read)"""
+        connect = _connect_timing.seconds or None
+        wait = transfer = None
+        elapsed = getattr(response, 'elapsed', None)
+        if isinstance(elapsed, timedelta):
+            # requests' elapsed runs from sending until the headers are parsed
+            wait = elapsed.total_seconds() - (connect or 0.0)
+            if not streamed:
+                transfer = duration - elapsed.total_seconds()
+        metrics.observe_upstream(self.SERVICE_NAME, method, outcome, duration, connect, wait, transfer)
+    
+    def circuit_stats(self) -> Optional[Dict[str, Any]]:
+        """Circuit breaker state, or None when the client has no breaker"""
+        return self.circuit_breaker.stats() if self.circuit_breaker is not None else None
+    
+    def retry_stats(self) -> Optional[Dict[str, Any]]:
+        """Retry budget use and hedge delays, or None when retries are disabled"""
+        return self.retry_policy.stats() if self.retry_policy is not None else None
+    
+    def bulkhead_stats(self) -> Optional[Dict[str, Any]]:
+        """Concurrency limit use and shed calls, or None without a bulkhead"""
+        return self.bulkhead.stats() if self.bulkhead is not None else None
+    
+    def _slot(self):
+        """Bulkhead slot for one upstream call"""
+        return self.bulkhead.slot() if self.bulkhead is not None else nullcontext()
+    
+    def _error_response(self, url: str, error: Exception) -> Tuple[Dict[str, str], int]:
+        """Map a transport error to the gateway's error payload and status"""
+        if isinstance(error, deadline.DeadlineExceeded):
+            logger.warning(f"Deadline exceeded before calling {url}")
+            return {"status": "error", "message": "Service timeout"}, 504
+        if isinstance(error, BulkheadFullError):
+            logger.warning(f"Shedding call to {url}: {str(error)}")
+            return {"status": "error", "message": "Service overloaded"}, 503
+        if isinstance(error, NoEndpointsError):
+            logger.error(f"No replicas to call {url}")
+            return {"status": "error", "message": "Service unavailable"}, 503
+        if isinstance(error, CircuitOpenError):
+            logger.warning(f"Circuit open, failing fast for {url}")
+            return {"status": "error", "message": "Service temporarily unavailable"}, 503
+        if isinstance(error, requests.exceptions.ConnectionError):
+            logger.error(f"Connection error to {url}")
+            return {"status": "error", "message": "Service unavailable"}, 503
+        if isinstance(error, requests.exceptions.Timeout):
+            logger.error(f"Timeout error to {url}")
+            return {"status": "error", "message": "Service timeout"}, 504
+        logger.error(f"Unexpected error calling {url}: {str(error)}")
+        return {"status": "error", "message": "Internal gateway error"}, 500
+    
+    def _coalesce_key(self, method: str, endpoint: str, kwargs: Dict[str, Any]) -> Optional[Tuple]:
+        """Single-flight key of an idempotent GET, None when the call must run on its own"""
+        if method != 'GET' or self.single_flight is None:
+            return None
+        scope = None
+        if not self.PUBLIC_READS:
+            headers = kwargs.get('headers') or {}
+            scope = headers.get('Authorization') or headers.get('authorization')
+        return endpoint, repr(sorted((kwargs.get('params') or {}).items())), scope
+    
+    def _make_request(self, method: str, endpoint: str, route: Optional[str] = None,
+                      **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make HTTP request to service, sharing identical concurrent GETs.
+        
+        GETs naming their `route` are idempotent reads and may be retried or hedged.
+        """
+        key = self._coalesce_key(method, endpoint, kwargs)
+        if key is None:
+            return self._isolated_request(method, endpoint, route, **kwargs)
+        return self.single_flight.do(key, lambda: self._isolated_request(method, endpoint, route, **kwargs))
+    
+    def _isolated_request(self, method: str, endpoint: str, route: Optional[str],
+                          **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make HTTP request to service within its bulkhead, shedding it when the bulkhead is full"""
+        try:
+            with self._slot():
+                return self._retrying_request(method, endpoint, route, **kwargs)
+        except BulkheadFullError as e:
+            return self._error_response(f"{self.base_url}{endpoint}", e)
+    
+    def _can_retry(self, method: str, route: Optional[str]) -> bool:
+        return self.retry_policy is not None and method == 'GET' and route is not None
     
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
-        """Make HTTP request to service"""
+    def _retry_delay(self, status_code: int, retries: int) -> Optional[float]:
+        """Backoff before the next attempt, None when the call must not be retried"""
+        policy = self.retry_policy
+        if self.circuit_breaker is not None and self.circuit_breaker.state == CircuitBreaker.OPEN:
+            return None
+        if status_code not in policy.RETRYABLE_STATUSES or retries >= policy.max_retries:
+            return None
+        delay = policy.backoff(retries)
+        left = deadline.remaining()
+        if left is not None and left <= delay:
+            return None
+        if not policy.budget.try_withdraw():
+            metrics.UPSTREAM_RETRIES.labels(self.SERVICE_NAME, 'denied').inc()
+            return None
+        metrics.UPSTREAM_RETRIES.labels(self.SERVICE_NAME, 'retry').inc()
+        return delay
+    
+    def _retrying_request(self, method: str, endpoint: str, route: Optional[str],
+                          **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make HTTP request to service, retrying failed reads with jittered backoff"""
+        if not self._can_retry(method, route):
+            return self._request_json(method, endpoint, **kwargs)
+        self.retry_policy.budget.record_call()
+        retries = 0
+        while True:
+            result = self._hedged_request(method, endpoint, route, **kwargs)
+            delay = self._retry_delay(result[1], retries)
+            if delay is None:
+                return result
+            logger.info(f"Retrying {method} {self.base_url}{endpoint} after {result[1]} in {delay:.3f}s")
+            time.sleep(delay)
+            retries += 1
+    
+    def _observed_request(self, method: str, endpoint: str, route: Optional[str],
+                          abandoned: Optional[threading.Event] = None, **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        started = time.monotonic()
+        result = self._request_json(method, endpoint, abandoned=abandoned, **kwargs)
+        self.retry_policy.observe(route, time.monotonic() - started, result[1])
+        return result
+    
+    def _hedged_request(self, method: str, endpoint: str, route: Optional[str],
+                        **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """One attempt; a second is sent when the first is slower than the route's hedge delay"""
+        hedge_delay = self.retry_policy.hedge_delay(route)
+        if hedge_delay is None:
+            return self._observed_request(method, endpoint, route, **kwargs)
+        abandoned = {}
+        
+        def attempt():
+            # Attempts run in a copy of the caller's context to keep its request ID and deadline
+            flag = threading.Event()
+            future = self._hedge_executor.submit(contextvars.copy_context().run, self._observed_request,
+                                                 method, endpoint, route, abandoned=flag, **kwargs)
+            abandoned[future] = flag
+            return future
+        
+        first = attempt()
+        done, _ = wait([first], timeout=hedge_delay)
+        if done or not self.retry_policy.budget.try_withdraw():
+            return first.result()
+        metrics.UPSTREAM_RETRIES.labels(self.SERVICE_NAME, 'hedge').inc()
+        # First good answer wins
+        pending = {first, attempt()}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            result = next(iter(done)).result()
+            if result[1] not in self.retry_policy.RETRYABLE_STATUSES:
+                break
+        # A loser that has not started never will; one in flight drops its connection once the headers arrive
+        for loser in pending:
+            loser.cancel()
+            abandoned[loser].set()
+        return result
+    
+    def _request_json(self, method: str, endpoint: str, abandoned: Optional[threading.Event] = None,
+                      **kwargs) -> Tuple[Optional[Dict[Any, Any]], int]:
+        """Make HTTP request to service.
+        
+        A hedged attempt passes `abandoned`: its body is only read if the
+        other attempt has not won by the time the headers arrive.
+        """
         url = f"{self.base_url}{endpoint}"
         
         try:
             logger.info(f"Making {method} request to {url}")
             
-            # Set default timeout
-            if 'timeout' not in kwargs:
-                kwargs['timeout'] = self.timeout
-            
-            response = requests.request(method, url, **kwargs)
+            if abandoned is not None:
+                kwargs['stream'] = True
+            response = self._send(method, endpoint, **kwargs)
             
             logger.info(f"Response from {url}: {response.status_code}")
+            if abandoned is not None and abandoned.is_set():
+                # Closing an unread response frees its connection instead of draining the body
+                response.close()
+                return None, response.status_code
             
             # Try to parse JSON response
             try:
@@ -35,19 +395,32 @@ class ServiceClient:
             
             return json_response, response.status_code
             
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Connection error to {url}")
-            return {"status": "error", "message": "Service unavailable"}, 503
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout error to {url}")
-            return {"status": "error", "message": "Service timeout"}, 504
         except Exception as e:
-            logger.error(f"Unexpected error calling {url}: {str(e)}")
-            return {"status": "error", "message": "Internal gateway error"}, 500
+            return self._error_response(url, e)
+    
+    def stream_request(self, method: str, endpoint: str, **kwargs) -> Tuple[Optional[requests.Response], Optional[Dict[str, str]], int]:
+        """Make HTTP request to service leaving the response body unread.
+        
+        Returns (response, None, status) on success or (None, error_payload, status)
+        when the upstream could not be reached. The caller must close the response.
+        """
+        url = f"{self.base_url}{endpoint}"
+        
+        try:
+            logger.info(f"Streaming {method} request to {url}")
+            with self._slot():
+                response = self._send(method, endpoint, stream=True, **kwargs)
+            logger.info(f"Response from {url}: {response.status_code}")
+            return response, None, response.status_code
+        except Exception as e:
+            error_payload, status_code = self._error_response(url, e)
+            return None, error_payload, status_code
 
 class UserManagementServiceClient(ServiceClient):
     """Client for User Management Service (Auth + Users)"""
     
+    SERVICE_NAME = 'user_management_service'
+    
     def register(self, data: Dict[str, Any]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Register a new user"""
         return self._make_request('POST', '/api/auth/register', json=data)
@@ -62,7 +435,7 @@ class UserManagementServiceClient(ServiceClient):
     
     def get_user_status(self, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get user status"""
-        return self._make_request('GET', '/api/auth/status', headers=headers)
+        return self._make_request('GET', '/api/auth/status', headers=headers, route='get_user_status')
     
     def verify_token(self, token: str) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Verify token by checking user status"""
@@ -72,11 +445,11 @@ class UserManagementServiceClient(ServiceClient):
     # Users API methods
     def get_all_users(self, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get all users (admin only)"""
-        return self._make_request('GET', '/api/users/', headers=headers)
+        return self._make_request('GET', '/api/users/', headers=headers, route='get_all_users')
     
     def get_single_user(self, user_id: int, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get single user details"""
-        return self._make_request('GET', f'/api/users/{user_id}', headers=headers)
+        return self._make_request('GET', f'/api/users/{user_id}', headers=headers, route='get_single_user')
     
     def add_user(self, data: Dict[str, Any], headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Add new user (admin only)"""
@@ -86,21 +459,25 @@ class UserManagementServiceClient(ServiceClient):
         """Admin create user with custom flags"""
         return self._make_request('POST', '/api/users/admin_create', json=data, headers=headers)
     
-    def health_check(self) -> Tuple[Optional[Dict[Any, Any]], int]:
+    def health_check(self, timeout: Optional[float] = None) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Check user management service health"""
-        return self._make_request('GET', '/api/auth/health')
+        return self._make_request('GET', '/api/auth/health', timeout=timeout)
 
 
 class ExercisesServiceClient(ServiceClient):
     """Client for Exercises Management Service"""
     
+    SERVICE_NAME = 'exercises_service'
+    # Exercise reads are not authenticated upstream
+    PUBLIC_READS = True
+    
     def get_all_exercises(self, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get all exercises"""
-        return self._make_request('GET', '/api/exercises/', headers=headers)
+        return self._make_request('GET', '/api/exercises/', headers=headers, route='get_all_exercises')
     
     def get_single_exercise(self, exercise_id: int, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get single exercise details"""
-        return self._make_request('GET', f'/api/exercises/{exercise_id}', headers=headers)
+        return self._make_request('GET', f'/api/exercises/{exercise_id}', headers=headers, route='get_single_exercise')
     
     def create_exercise(self, data: Dict[str, Any], headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Create new exercise (admin only)"""
@@ -118,28 +495,30 @@ class ExercisesServiceClient(ServiceClient):
         """Validate user's code submission"""
         return self._make_request('POST', '/api/exercises/validate_code', json=data, headers=headers)
     
-    def health_check(self) -> Tuple[Optional[Dict[Any, Any]], int]:
+    def health_check(self, timeout: Optional[float] = None) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Check exercises service health"""
         try:
-            return UserManagementServiceClient.health_check(self)
+            return UserManagementServiceClient.health_check(self, timeout=timeout)
         except Exception:
-            return self._make_request('GET', '/health')
+            return self._make_request('GET', '/health', timeout=timeout)
 
 
 class ScoresServiceClient(ServiceClient):
     """Client for Scores Management Service"""
     
+    SERVICE_NAME = 'scores_service'
+    
     def get_all_scores(self, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get all scores"""
-        return self._make_request('GET', '/api/scores/', headers=headers)
+        return self._make_request('GET', '/api/scores/', headers=headers, route='get_all_scores')
     
     def get_scores_by_user(self, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get scores by current user"""
-        return self._make_request('GET', '/api/scores/user', headers=headers)
+        return self._make_request('GET', '/api/scores/user', headers=headers, route='get_scores_by_user')
     
     def get_single_score_by_user(self, score_id: int, headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Get single score by user"""
-        return self._make_request('GET', f'/api/scores/user/{score_id}', headers=headers)
+        return self._make_request('GET', f'/api/scores/user/{score_id}', headers=headers, route='get_single_score_by_user')
     
     def create_score(self, data: Dict[str, Any], headers: Dict[str, str]) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Create new score"""
@@ -149,9 +528,9 @@ class ScoresServiceClient(ServiceClient):
         """Update score"""
         return self._make_request('PUT', f'/api/scores/{exercise_id}', json=data, headers=headers)
     
-    def health_check(self) -> Tuple[Optional[Dict[Any, Any]], int]:
+    def health_check(self, timeout: Optional[float] = None) -> Tuple[Optional[Dict[Any, Any]], int]:
         """Check scores service health"""
         try:
-            return UserManagementServiceClient.health_check(self)
+            return UserManagementServiceClient.health_check(self, timeout=timeout)
         except Exception:
-            return self._make_request('GET', '/health')
\ No newline at end of file
+            return self._make_request('GET', '/health', timeout=timeout)
\ No newline at end of file
@@ -5,6 +5,11 @@ import importlib.util
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 
+# The suite fires far more requests from one client than the production limit allows
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+# Tests mock upstream answers per test, so responses must not be cached between them
+os.environ.setdefault('EXERCISE_CACHE_TTL', '0')
+
 # Define constant to avoid duplicated literal 'app.services'
 APP_SERVICES = 'app.services'
 
@@ -76,9 +81,15 @@ except Exception:
 try:
     import requests as _real_requests
 
+    class _BlockedSession(_real_requests.Session):
+        def request(self, method, url, **kwargs):
+            # pooled client sessions are blocked the same way as module-level calls
+            raise _real_requests.ConnectionError("Blocked real HTTP call during tests")
+
     class _DummyRequests:
         # expose exceptions namespace as in real requests
         exceptions = _real_requests.exceptions
+        Session = _BlockedSession
 
         def request(self, method, url, **kwargs):
             # always raise ConnectionError so tests relying on mocks don't hit network
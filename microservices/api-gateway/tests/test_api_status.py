@@ -187,4 +187,18 @@ def test_delete_exercise_admin(mock_delete, mock_verify_token, client):
     mock_delete.return_value = ({"message": "deleted"}, 200)
     resp = client.delete("/exercises/2", headers={"Authorization": "Bearer token"})
     assert resp.status_code == 200
-    assert resp.get_json()["message"] == "deleted"
\ No newline at end of file
+    assert resp.get_json()["message"] == "deleted"
+
+
+@patch('app.services.ScoresServiceClient.health_check', return_value=(None, 200))
+@patch('app.services.ExercisesServiceClient.health_check', return_value=(None, 200))
+@patch('app.services.UserManagementServiceClient.health_check', return_value=(None, 200))
+def test_detailed_health_check_reports_age(*_):
+    from app import create_app
+    with patch('app.app.Config.HEALTH_PROBE_INTERVAL', 0):
+        detailed_client = create_app().test_client()
+    response = detailed_client.get("/health/detailed")
+    assert response.status_code == 200
+    services = response.get_json()["services"]
+    assert set(services) == {"user_management_service", "exercises_service", "scores_service"}
+    assert all("age_seconds" in s for s in services.values())
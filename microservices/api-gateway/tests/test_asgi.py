@@ -0,0 +1,215 @@
+"""
+Test the asyncio (ASGI) serving mode of the gateway
+"""
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+import httpx
+from async_services import AsyncServiceClient, AsyncExercisesServiceClient
+from asgi import create_async_app
+from ratelimit import RateLimiter, MemoryBackend, SQLiteBackend
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _call(method, path, **kwargs):
+    app = create_async_app()
+    client = app.test_client()
+    response = await getattr(client, method)(path, **kwargs)
+    return response.status_code, await response.get_json()
+
+
+def test_health_check():
+    status, data = _run(_call('get', '/health'))
+    assert status == 200
+    assert data["status"] == "healthy"
+
+
+def test_requires_token():
+    status, data = _run(_call('get', '/exercises/'))
+    assert status == 401
+
+
+@patch('async_services.AsyncExercisesServiceClient.get_all_exercises', new_callable=AsyncMock)
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_get_all_exercises(mock_verify, mock_get_all):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    mock_get_all.return_value = ({"status": "success", "data": {"exercises": []}}, 200)
+    status, data = _run(_call('get', '/exercises/', headers={"Authorization": "Bearer token"}))
+    assert status == 200
+    assert data["data"]["exercises"] == []
+
+
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_delete_exercise_requires_admin(mock_verify):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    status, _ = _run(_call('delete', '/exercises/1', headers={"Authorization": "Bearer token"}))
+    assert status == 403
+
+
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_validate_code_invalid_payload(mock_verify):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    status, data = _run(_call('post', '/exercises/validate_code', data="notjson",
+                              headers={"Authorization": "Bearer token"}))
+    assert status == 400
+    assert data["message"] == "Invalid payload"
+
+
+@patch('async_services.AsyncExercisesServiceClient.get_all_exercises', new_callable=AsyncMock)
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_sqlite_rate_limit_runs_off_the_event_loop(mock_verify, mock_get_all, tmp_path):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    mock_get_all.return_value = ({"status": "success", "data": {"exercises": []}}, 200)
+    check_threads = []
+
+    async def call():
+        app = create_async_app()
+        app.config['RATE_LIMIT_ENABLED'] = True
+        app.extensions['rate_limiter'] = RateLimiter(SQLiteBackend(str(tmp_path / "rl.db")), per_minute=1)
+        check = app.extensions['rate_limiter'].check
+
+        def recording_check(*args):
+            check_threads.append(threading.get_ident())
+            return check(*args)
+
+        app.extensions['rate_limiter'].check = recording_check
+        client = app.test_client()
+        statuses = [(await client.get('/exercises/', headers={"Authorization": "Bearer token"})).status_code
+                    for _ in range(2)]
+        return statuses, threading.get_ident()
+
+    statuses, loop_thread = _run(call())
+    assert statuses == [200, 429]
+    assert check_threads and loop_thread not in check_threads
+
+
+@patch('async_services.AsyncScoresServiceClient.get_scores_by_user', new_callable=AsyncMock)
+@patch('async_services.AsyncExercisesServiceClient.get_single_exercise', new_callable=AsyncMock)
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_batch_runs_sub_requests_concurrently(mock_verify, mock_get_exercise, mock_get_scores):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    started = []
+
+    async def slow(value):
+        started.append(value)
+        await asyncio.sleep(0.05)
+        # Both sub-requests are in flight before either finishes
+        assert len(started) == 2
+        return {"status": "success", "data": value}, 200
+
+    async def get_exercise(exercise_id, headers):
+        return await slow({"id": exercise_id})
+
+    async def get_scores(headers):
+        return await slow([])
+
+    mock_get_exercise.side_effect = get_exercise
+    mock_get_scores.side_effect = get_scores
+    status, data = _run(_call('post', '/batch', headers={"Authorization": "Bearer token"}, json={"requests": [
+        {"id": "exercise", "method": "GET", "path": "/exercises/7"},
+        {"id": "scores", "path": "/scores/user"},
+        {"id": "bad", "path": "/nope"}
+    ]}))
+    assert status == 200
+    responses = data["data"]["responses"]
+    assert [r["id"] for r in responses] == ["exercise", "scores", "bad"]
+    assert [r["status"] for r in responses] == [200, 200, 404]
+    assert responses[0]["body"]["data"] == {"id": 7}
+    mock_get_exercise.assert_called_once_with(7, {"Authorization": "Bearer token"})
+
+
+def test_anonymous_clients_behind_trusted_proxy_get_own_buckets():
+    async def scenario():
+        with patch('asgi.Config.TRUSTED_PROXY_HOPS', 1), patch('asgi.Config.RATE_LIMIT_ENABLED', True):
+            app = create_async_app()
+        app.extensions['rate_limiter'] = RateLimiter(MemoryBackend(), per_minute=2)
+        client = app.test_client()
+
+        async def login(forwarded_for):
+            response = await client.post('/auth/login', data="notjson", headers={"X-Forwarded-For": forwarded_for})
+            return response.status_code
+
+        return [await login("10.0.0.1") for _ in range(3)] + [await login("10.0.0.2"),
+                                                              await login("10.0.0.9, 10.0.0.1")]
+
+    assert _run(scenario()) == [400, 400, 429, 400, 429]
+
+
+@patch('async_services.AsyncExercisesServiceClient.update_exercise', new_callable=AsyncMock)
+@patch('async_services.AsyncExercisesServiceClient.get_single_exercise', new_callable=AsyncMock)
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_exercise_reads_are_cached_with_etags(mock_verify, mock_get_exercise, mock_update):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    mock_get_exercise.return_value = ({"status": "success", "data": {"id": 1, "title": "first"}}, 200)
+    mock_update.return_value = ({"status": "success"}, 200)
+    headers = {"Authorization": "Bearer token"}
+
+    async def scenario():
+        # The suite runs with the cache off (see conftest); this test is about the cache
+        with patch('asgi.Config.EXERCISE_CACHE_TTL', 60):
+            client = create_async_app().test_client()
+        first = await client.get('/exercises/1', headers=headers)
+        etag = first.headers["ETag"]
+        not_modified = await client.get('/exercises/1', headers=dict(headers, **{"If-None-Match": etag}))
+        await client.get('/exercises/1?fields=title', headers=headers)
+        calls_before_update = mock_get_exercise.await_count
+        await client.put('/exercises/1', headers=headers, json={"title": "second"})
+        await client.get('/exercises/1', headers=headers)
+        caches = await (await client.get('/health/caches')).get_json()
+        return not_modified.status_code, calls_before_update, caches["exercise_responses"]
+
+    status, calls_before_update, stats = _run(scenario())
+    assert status == 304
+    # The query-string read bypasses the cache; the read after the update is fetched again
+    assert calls_before_update == 2
+    assert mock_get_exercise.await_count == 3
+    assert stats["not_modified"] == 1
+
+
+class TestAsyncServiceClient:
+    """Test non-blocking upstream client"""
+
+    def _client(self, handler):
+        client = AsyncExercisesServiceClient("http://exercises")
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+
+    def test_inherits_endpoint_methods(self):
+        def handler(request):
+            assert request.url.path == '/api/exercises/3'
+            assert request.headers['host'] == 'exercises'
+            return httpx.Response(200, json={"id": 3})
+
+        client = self._client(handler)
+        result, status = _run(client.get_single_exercise(3, {"Host": "gateway", "Authorization": "Bearer t"}))
+        assert status == 200
+        assert result == {"id": 3}
+        assert client.pool_stats()["requests"] == 1
+        assert client.pool_stats()["connections_in_use"] == 0
+
+    def test_non_json_response(self):
+        client = self._client(lambda request: httpx.Response(200, text="plain"))
+        result, status = _run(client._make_request('GET', '/x'))
+        assert result == {"message": "plain"}
+
+    def test_connection_error(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        result, status = _run(self._client(handler)._make_request('GET', '/x'))
+        assert status == 503
+
+    def test_timeout(self):
+        def handler(request):
+            raise httpx.ReadTimeout("slow")
+
+        result, status = _run(self._client(handler)._make_request('GET', '/x'))
+        assert status == 504
+
+    def test_is_service_client(self):
+        assert issubclass(AsyncExercisesServiceClient, AsyncServiceClient)
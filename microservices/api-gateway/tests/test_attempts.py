@@ -0,0 +1,98 @@
+"""
+Test the combined validate-and-score attempt endpoint
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from app import app
+from attempts import record_attempt_async
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+AUTH = {"Authorization": "Bearer token"}
+ATTEMPT = {"exercise_id": 3, "answer": "def f(): return 1"}
+VALIDATION = {"status": "success", "results": [True, False], "user_results": ["1", "2"], "all_correct": False}
+SCORE = {"id": 9, "exercise_id": 3, "results": [True, False]}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.create_score')
+@patch('services.ScoresServiceClient.update_score', return_value=({"status": "success", "data": SCORE}, 200))
+@patch('services.ExercisesServiceClient.validate_code', return_value=(VALIDATION, 200))
+def test_attempt_updates_existing_score(mock_validate, mock_update, mock_create, _, client):
+    response = client.post("/exercises/attempt", json=ATTEMPT, headers=AUTH)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["results"] == [True, False]
+    assert data["score_saved"] is True
+    assert data["score"] == SCORE
+    exercise_id, score_data = mock_update.call_args[0][:2]
+    assert exercise_id == 3
+    assert score_data == {"exercise_id": 3, "answer": ATTEMPT["answer"],
+                          "results": [True, False], "user_results": ["1", "2"]}
+    mock_create.assert_not_called()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.create_score', return_value=({"status": "success", "data": SCORE}, 201))
+@patch('services.ScoresServiceClient.update_score', return_value=({"status": "fail"}, 404))
+@patch('services.ExercisesServiceClient.validate_code', return_value=(VALIDATION, 200))
+def test_first_attempt_creates_score(mock_validate, mock_update, mock_create, _, client):
+    response = client.post("/exercises/attempt", json=ATTEMPT, headers=AUTH)
+    assert response.get_json()["score_saved"] is True
+    assert mock_create.call_args[0][0]["results"] == [True, False]
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.create_score')
+@patch('services.ScoresServiceClient.update_score', return_value=({"status": "fail", "message": "Error!"}, 400))
+@patch('services.ExercisesServiceClient.validate_code', return_value=(VALIDATION, 200))
+def test_rejected_update_does_not_create_duplicate(mock_validate, mock_update, mock_create, _, client):
+    response = client.post("/exercises/attempt", json=ATTEMPT, headers=AUTH)
+    assert response.get_json()["score_saved"] is False
+    mock_create.assert_not_called()
+
+
+def test_async_clients_share_the_flow():
+    exercises, scores = AsyncMock(), AsyncMock()
+    exercises.validate_code.return_value = (VALIDATION, 200)
+    scores.update_score.return_value = ({"status": "fail"}, 404)
+    scores.create_score.return_value = ({"status": "success", "data": SCORE}, 201)
+    response, status = asyncio.run(record_attempt_async(exercises, scores, ATTEMPT, AUTH))
+    assert status == 200
+    assert response["score"] == SCORE
+    scores.update_score.assert_awaited_once()
+    scores.create_score.assert_awaited_once()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.update_score')
+@patch('services.ExercisesServiceClient.validate_code',
+       return_value=({"status": "fail", "message": "Code compilation failed: bad!"}, 400))
+def test_failed_validation_records_nothing(mock_validate, mock_update, _, client):
+    response = client.post("/exercises/attempt", json=ATTEMPT, headers=AUTH)
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Code compilation failed: bad!"
+    mock_update.assert_not_called()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.update_score', return_value=({"status": "error"}, 503))
+@patch('services.ExercisesServiceClient.validate_code', return_value=(VALIDATION, 200))
+def test_score_outage_still_returns_results(mock_validate, mock_update, _, client):
+    response = client.post("/exercises/attempt", json=ATTEMPT, headers=AUTH)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["all_correct"] is False
+    assert data["score_saved"] is False
+    assert data["score"] is None
+
+
+def test_attempt_requires_auth(client):
+    assert client.post("/exercises/attempt", json=ATTEMPT).status_code == 401
@@ -0,0 +1,89 @@
+"""
+Test client-side load balancing across upstream replicas
+"""
+import socket
+import pytest
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY
+from balancer import LoadBalancer, NoEndpointsError
+from services import ScoresServiceClient
+
+
+def _addrinfo(*addresses):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 5003)) for address in addresses]
+
+
+class TestLoadBalancer:
+    def test_single_url_needs_no_balancer(self):
+        assert LoadBalancer.from_config({}, "test_single", "http://scores:5003") is None
+        assert LoadBalancer.from_config({}, "test_list", "http://a:5003,http://b:5003") is not None
+
+    def test_least_outstanding_prefers_idle_replica(self):
+        balancer = LoadBalancer("test_least", "http://a, http://b/", strategy="least_outstanding")
+        first = balancer.pick()
+        second = balancer.pick()
+        assert {first.url, second.url} == {"http://a", "http://b"}
+        balancer.release(first, True)
+        assert balancer.pick().url == first.url
+
+    def test_p2c_takes_less_loaded_of_two(self):
+        balancer = LoadBalancer("test_p2c", ",".join(f"http://r{i}" for i in range(4)))
+        endpoints = {e.url: e for e in balancer._endpoints.values()}
+        endpoints["http://r1"].outstanding = 3
+        endpoints["http://r2"].outstanding = 1
+        with patch('balancer.random.sample', return_value=[endpoints["http://r1"], endpoints["http://r2"]]):
+            assert balancer.pick().url == "http://r2"
+
+    def test_failing_replica_is_ejected(self):
+        balancer = LoadBalancer("test_eject", "http://a,http://b", strategy="least_outstanding",
+                                ejection_failures=2)
+        bad = next(e for e in balancer._endpoints.values() if e.url == "http://a")
+        for _ in range(2):
+            bad.outstanding += 1
+            balancer.release(bad, False)
+        assert all(balancer.pick().url == "http://b" for _ in range(5))
+        assert REGISTRY.get_sample_value('gateway_upstream_endpoint_ejections_total',
+                                         {"upstream": "test_eject"}) == 1
+
+    def test_ejection_is_capped(self):
+        balancer = LoadBalancer("test_cap", "http://a,http://b", ejection_failures=1, max_ejection_ratio=0.5)
+        for endpoint in list(balancer._endpoints.values()):
+            endpoint.outstanding += 1
+            balancer.release(endpoint, False)
+        assert [e["ejected"] for e in balancer.stats()].count(True) == 1
+
+    @patch('balancer.socket.getaddrinfo')
+    def test_dns_name_is_re_resolved(self, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = _addrinfo("10.0.0.1")
+        balancer = LoadBalancer("test_dns", "dns+http://scores-headless:5003", resolve_interval=0)
+        assert balancer.pick().url == "http://10.0.0.1:5003"
+
+        mock_getaddrinfo.return_value = _addrinfo("10.0.0.1", "10.0.0.2")
+        balancer.refresh()
+        stats = {e["url"]: e for e in balancer.stats()}
+        assert set(stats) == {"http://10.0.0.1:5003", "http://10.0.0.2:5003"}
+        # Replicas that remain keep their state
+        assert stats["http://10.0.0.1:5003"]["outstanding"] == 1
+
+        mock_getaddrinfo.side_effect = socket.gaierror("lookup failed")
+        balancer.refresh()
+        assert len(balancer.stats()) == 2
+
+    @patch('balancer.socket.getaddrinfo', side_effect=socket.gaierror("lookup failed"))
+    def test_unresolved_name_has_no_endpoints(self, mock_getaddrinfo):
+        balancer = LoadBalancer("test_unresolved", "dns+http://missing:5003")
+        with pytest.raises(NoEndpointsError):
+            balancer.pick()
+
+
+@patch('services.requests.Session.request')
+def test_client_spreads_calls_across_replicas(mock_request):
+    mock_request.return_value = MagicMock(status_code=200, json=lambda: {"status": "success"})
+    balancer = LoadBalancer("test_client", "http://scores-0:5003,http://scores-1:5003",
+                            strategy="least_outstanding")
+    client = ScoresServiceClient("http://scores-0:5003", balancer=balancer)
+    for _ in range(20):
+        assert client.get_all_scores({})[1] == 200
+    assert sum(e["requests"] for e in client.pool_stats()["replicas"]) == 20
+    urls = {call.args[1] for call in mock_request.call_args_list}
+    assert urls == {"http://scores-0:5003/api/scores/", "http://scores-1:5003/api/scores/"}
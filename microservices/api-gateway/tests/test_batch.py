@@ -0,0 +1,85 @@
+"""
+Test the POST /batch endpoint
+"""
+import time
+import pytest
+from unittest.mock import patch
+from app import app
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.get_scores_by_user', return_value=({"status": "success", "data": []}, 200))
+@patch('services.ExercisesServiceClient.get_single_exercise', return_value=({"message": "Exercise not found"}, 404))
+@patch('services.UserManagementServiceClient.get_user_status', return_value=({"status": "success", "data": USER}, 200))
+def test_batch_returns_status_per_item(mock_status, mock_exercise, mock_scores, mock_verify, client):
+    response = client.post("/batch", headers=AUTH, json={"requests": [
+        {"id": "me", "method": "GET", "path": "/auth/status"},
+        {"id": "exercise", "method": "GET", "path": "/exercises/7"},
+        {"id": "scores", "path": "/scores/user"}
+    ]})
+
+    assert response.status_code == 200
+    responses = response.get_json()["data"]["responses"]
+    assert [(r["id"], r["status"]) for r in responses] == [("me", 200), ("exercise", 404), ("scores", 200)]
+    assert responses[0]["body"]["data"]["username"] == "test_user"
+    assert mock_verify.call_count == 1
+    mock_exercise.assert_called_once_with(7, {"Authorization": "Bearer token"})
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ScoresServiceClient.update_score', return_value=({"status": "success"}, 200))
+def test_batch_forwards_bodies(mock_update, _, client):
+    response = client.post("/batch", headers=AUTH, json={"requests": [
+        {"method": "PUT", "path": "/scores/3", "body": {"correct": True}}
+    ]})
+    assert response.get_json()["data"]["responses"][0] == {"id": 0, "status": 200, "body": {"status": "success"}}
+    mock_update.assert_called_once_with(3, {"correct": True}, {"Authorization": "Bearer token"})
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ExercisesServiceClient.get_all_exercises')
+@patch('services.ScoresServiceClient.get_all_scores')
+def test_batch_runs_in_parallel(mock_scores, mock_exercises, _, client):
+    def slow(headers):
+        time.sleep(0.3)
+        return {"status": "success"}, 200
+
+    mock_scores.side_effect = slow
+    mock_exercises.side_effect = slow
+    started = time.monotonic()
+    client.post("/batch", headers=AUTH, json={"requests": [
+        {"path": "/scores/"}, {"path": "/exercises/"}
+    ]})
+    assert time.monotonic() - started < 0.55
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+def test_invalid_items_fail_individually(_, client):
+    response = client.post("/batch", headers=AUTH, json={"requests": [
+        {"path": "/nope"},
+        {"method": "DELETE", "path": "/scores/"},
+        {"method": "POST", "path": "/scores/", "body": "x"},
+        "not-an-object"
+    ]})
+    statuses = [r["status"] for r in response.get_json()["data"]["responses"]]
+    assert statuses == [404, 405, 400, 400]
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+def test_batch_size_is_bounded(_, client):
+    too_many = [{"path": "/scores/"}] * (app.config['BATCH_MAX_REQUESTS'] + 1)
+    assert client.post("/batch", headers=AUTH, json={"requests": too_many}).status_code == 400
+    assert client.post("/batch", headers=AUTH, json={"requests": []}).status_code == 400
+
+
+def test_batch_requires_auth(client):
+    assert client.post("/batch", json={"requests": [{"path": "/scores/"}]}).status_code == 401
@@ -0,0 +1,91 @@
+"""
+Test bulkhead concurrency limits and load shedding
+"""
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+from app import app
+from bulkhead import AsyncBulkhead, Bulkhead, BulkheadFullError
+from services import ScoresServiceClient
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+class TestBulkhead:
+    def test_waiter_gets_freed_slot(self):
+        bulkhead = Bulkhead("test_wait", 1, max_queue=1, queue_timeout=1)
+        bulkhead.acquire()
+        threading.Timer(0.05, bulkhead.release, args=(0.05,)).start()
+        bulkhead.acquire()
+        assert bulkhead.stats()["active"] == 1
+
+    def test_full_queue_is_shed_immediately(self):
+        bulkhead = Bulkhead("test_shed", 1, max_queue=0)
+        bulkhead.acquire()
+        started = time.monotonic()
+        with pytest.raises(BulkheadFullError):
+            bulkhead.acquire()
+        assert time.monotonic() - started < 0.05
+        assert REGISTRY.get_sample_value('gateway_bulkhead_shed_total', {"bulkhead": "test_shed"}) == 1
+
+    def test_queue_wait_is_bounded(self):
+        bulkhead = Bulkhead("test_timeout", 1, max_queue=5, queue_timeout=0.05)
+        bulkhead.acquire()
+        with pytest.raises(BulkheadFullError):
+            bulkhead.acquire()
+        assert bulkhead.stats() == {"limit": 1, "max_concurrent": 1, "active": 1, "queued": 0, "shed": 1}
+
+    def test_adaptive_limit_drops_when_latency_rises(self):
+        bulkhead = Bulkhead("test_adaptive", 10, adaptive=True, min_concurrent=2)
+        for _ in range(20):
+            with bulkhead.slot():
+                pass
+        for _ in range(100):
+            bulkhead.acquire()
+            bulkhead.release(1.0)
+        assert 2 <= bulkhead.limit < 10
+
+    def test_async_waiter_gets_freed_slot(self):
+        async def scenario():
+            bulkhead = AsyncBulkhead("test_async", 1, max_queue=1, queue_timeout=0.2)
+            await bulkhead.acquire()
+            asyncio.get_running_loop().call_later(0.05, bulkhead.release, 0.05)
+            await bulkhead.acquire()
+            with pytest.raises(BulkheadFullError):
+                await bulkhead.acquire()
+            return bulkhead.stats()
+
+        assert asyncio.run(scenario())["shed"] == 1
+
+
+@patch('services.requests.Session.request')
+def test_full_upstream_bulkhead_fails_fast(mock_request):
+    bulkhead = Bulkhead("test_upstream", 1, max_queue=0)
+    bulkhead.acquire()
+    response, status = ScoresServiceClient("http://scores", bulkhead=bulkhead).get_all_scores({})
+    assert status == 503
+    assert response["message"] == "Service overloaded"
+    mock_request.assert_not_called()
+
+
+@patch('services.ExercisesServiceClient.validate_code', return_value=({"status": "success"}, 200))
+def test_route_class_is_shed_before_other_routes(mock_validate, client):
+    sandbox = Bulkhead("route:test", 1, max_queue=0)
+    sandbox.acquire()
+    bulkheads = app.extensions['route_bulkheads']
+    app.extensions['route_bulkheads'] = {"validate_code": sandbox}
+    try:
+        response = client.post("/exercises/validate_code", json={"exercise_id": 1, "answer": "x"})
+        assert response.status_code == 503
+        assert client.get("/health").status_code == 200
+    finally:
+        app.extensions['route_bulkheads'] = bulkheads
+    mock_validate.assert_not_called()
+    assert sandbox.stats()["active"] == 1
@@ -0,0 +1,115 @@
+"""
+Test TTL caches and token verification caching
+"""
+from unittest.mock import MagicMock, patch
+from cache import TTLCache
+from middleware import AuthMiddleware
+
+
+class TestTTLCache:
+    """Test bounded LRU + TTL cache"""
+
+    def test_get_set(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expired_entries_are_misses(self):
+        cache = TTLCache(ttl=10)
+        with patch('cache.time.monotonic', return_value=100.0):
+            cache.set("a", 1)
+        with patch('cache.time.monotonic', return_value=111.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_zero_ttl_disables_cache(self):
+        cache = TTLCache(ttl=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_delete_and_clear(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestAuthMiddlewareTokenCache:
+    """Test token verification caching in AuthMiddleware"""
+
+    def _middleware(self, *responses, **kwargs):
+        client = MagicMock()
+        client.verify_token.side_effect = list(responses)
+        return AuthMiddleware(client, **kwargs), client
+
+    def test_verified_token_is_cached(self):
+        user = {"id": 1, "username": "test", "admin": False}
+        middleware, client = self._middleware(({"status": "success", "data": user}, 200))
+
+        assert middleware.verify_token("token") == user
+        assert middleware.verify_token("token") == user
+        assert client.verify_token.call_count == 1
+        assert middleware.cache_stats()["verified"]["hits"] == 1
+
+    def test_cache_key_is_a_hash(self):
+        user = {"id": 1}
+        middleware, _ = self._middleware(({"status": "success", "data": user}, 200))
+        middleware.verify_token("secret-token")
+        assert "secret-token" not in middleware.token_cache._data
+
+    def test_rejected_token_is_negatively_cached(self):
+        middleware, client = self._middleware(({"status": "fail"}, 401))
+
+        assert middleware.verify_token("bad") == {}
+        assert middleware.verify_token("bad") == {}
+        assert client.verify_token.call_count == 1
+        assert middleware.cache_stats()["rejected"]["hits"] == 1
+
+    def test_upstream_errors_are_not_cached(self):
+        user = {"id": 1}
+        middleware, client = self._middleware(
+            ({"status": "error"}, 503),
+            ({"status": "success", "data": user}, 200)
+        )
+
+        assert middleware.verify_token("token") == {}
+        assert middleware.verify_token("token") == user
+        assert client.verify_token.call_count == 2
+
+    def test_invalidate_token(self):
+        user = {"id": 1}
+        middleware, client = self._middleware(
+            ({"status": "success", "data": user}, 200),
+            ({"status": "success", "data": user}, 200)
+        )
+        middleware.verify_token("token")
+        middleware.invalidate_token("token")
+        middleware.verify_token("token")
+        assert client.verify_token.call_count == 2
+
+    def test_cache_disabled_with_zero_ttl(self):
+        user = {"id": 1}
+        middleware, client = self._middleware(
+            ({"status": "success", "data": user}, 200),
+            ({"status": "success", "data": user}, 200),
+            cache_ttl=0
+        )
+        middleware.verify_token("token")
+        middleware.verify_token("token")
+        assert client.verify_token.call_count == 2
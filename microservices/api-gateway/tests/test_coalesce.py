@@ -0,0 +1,132 @@
+"""
+Test single-flight coalescing of identical concurrent upstream GETs
+"""
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from coalesce import SingleFlight, AsyncSingleFlight
+from services import ServiceClient, ExercisesServiceClient
+
+
+def _run_concurrently(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class TestSingleFlight:
+    """Test the thread-based single-flight group"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+
+        results = _run_concurrently(5, lambda: flight.do("key", slow))
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.stats()["coalesced"] == 4
+
+    def test_sequential_calls_run_again(self):
+        flight = SingleFlight()
+        fn = MagicMock(return_value=1)
+        flight.do("key", fn)
+        flight.do("key", fn)
+        assert fn.call_count == 2
+        assert flight.stats()["in_flight"] == 0
+
+    def test_error_reaches_all_waiters(self):
+        flight = SingleFlight()
+        errors = []
+
+        def failing():
+            time.sleep(0.2)
+            raise RuntimeError("boom")
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as e:
+                errors.append(e)
+
+        _run_concurrently(3, call)
+        assert len(errors) == 3
+
+
+class TestAsyncSingleFlight:
+    """Test the asyncio single-flight group"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(*(flight.do("key", slow) for _ in range(10)))
+
+        assert asyncio.run(main()) == ["result"] * 10
+        assert len(calls) == 1
+        assert flight.stats()["coalesced"] == 9
+
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        flight = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def main():
+            first = asyncio.ensure_future(flight.do("key", slow))
+            second = asyncio.ensure_future(flight.do("key", slow))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == "result"
+
+
+class TestServiceClientCoalescing:
+    """Test which upstream calls are coalesced"""
+
+    def _slow_response(self, *args, **kwargs):
+        time.sleep(0.2)
+        return MagicMock(status_code=200, json=lambda: {"status": "success"})
+
+    @patch('services.requests.Session.request')
+    def test_public_reads_shared_across_callers(self, mock_request):
+        mock_request.side_effect = self._slow_response
+        client = ExercisesServiceClient("http://localhost:5000", single_flight=SingleFlight())
+        tokens = iter(range(4))
+        results = _run_concurrently(
+            4, lambda: client.get_single_exercise(1, {"Authorization": f"Bearer {next(tokens)}"}))
+        assert all(status == 200 for _, status in results)
+        assert mock_request.call_count == 1
+        assert client.pool_stats()["single_flight"]["coalesced"] == 3
+
+    @patch('services.requests.Session.request')
+    def test_private_reads_scoped_by_authorization(self, mock_request):
+        mock_request.side_effect = self._slow_response
+        client = ServiceClient("http://localhost:5000", single_flight=SingleFlight())
+        tokens = iter(["a", "a", "b"])
+        _run_concurrently(3, lambda: client._make_request('GET', '/api/scores/user',
+                                                          headers={"Authorization": f"Bearer {next(tokens)}"}))
+        assert mock_request.call_count == 2
+
+    @pytest.mark.parametrize("method", ['POST', 'PUT', 'DELETE'])
+    def test_writes_are_never_coalesced(self, method):
+        client = ServiceClient("http://localhost:5000", single_flight=SingleFlight())
+        assert client._coalesce_key(method, '/api/x', {}) is None
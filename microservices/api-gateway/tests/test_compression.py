@@ -0,0 +1,148 @@
+"""
+Test Accept-Encoding negotiated response compression
+"""
+import asyncio
+import gzip
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from flask import Flask, jsonify
+from app import app
+from asgi import create_async_app
+from compression import ResponseCompressor
+from response_cache import ResponseCache, cached_response
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+EXERCISES = {"status": "success", "data": {"exercises": [
+    {"id": i, "title": f"Exercise {i}", "body": "Write a function that adds two numbers. " * 10}
+    for i in range(20)
+]}}
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+class TestNegotiation:
+    def setup_method(self):
+        self.compressor = ResponseCompressor()
+        # Negotiation does not need the brotli package itself
+        self.compressor.encodings = ('br', 'gzip')
+
+    def test_prefers_brotli_when_equally_accepted(self):
+        assert self.compressor.negotiate("gzip, deflate, br") == "br"
+
+    def test_honours_quality_values(self):
+        assert self.compressor.negotiate("br;q=0.5, gzip") == "gzip"
+        assert self.compressor.negotiate("gzip;q=0, br;q=0") is None
+        assert self.compressor.negotiate("*;q=0.1") == "br"
+
+    def test_identity_only(self):
+        assert self.compressor.negotiate("identity") is None
+        assert self.compressor.negotiate(None) is None
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ExercisesServiceClient.get_all_exercises', return_value=(EXERCISES, 200))
+def test_large_list_is_gzipped(_, __, client):
+    response = client.get('/exercises/', headers=dict(AUTH, **{"Accept-Encoding": "gzip"}))
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert json.loads(gzip.decompress(response.data)) == EXERCISES
+    assert "compress;dur=" in response.headers["Server-Timing"]
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ExercisesServiceClient.get_all_exercises', return_value=(EXERCISES, 200))
+def test_not_compressed_without_accept_encoding(_, __, client):
+    response = client.get('/exercises/', headers=AUTH)
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == EXERCISES
+
+
+def test_small_body_is_sent_as_is(client):
+    response = client.get('/health', headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["status"] == "healthy"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_passthrough_stream_is_compressed_in_chunks(mock_stream, _, client):
+    body = json.dumps(EXERCISES).encode()
+    upstream = MagicMock(status_code=200, headers={"Content-Type": "application/json",
+                                                   "Content-Length": str(len(body))})
+    upstream.raw.stream.return_value = iter([body[:500], body[500:]])
+    mock_stream.return_value = (upstream, None, 200)
+    app.config['PASSTHROUGH_PROXY'] = True
+    try:
+        response = client.get('/exercises/', headers=dict(AUTH, **{"Accept-Encoding": "gzip"}))
+        data = response.data
+    finally:
+        app.config['PASSTHROUGH_PROXY'] = False
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(data) == body
+    upstream.close.assert_called_once()
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_upstream_encoded_body_is_relayed(mock_stream, _, client):
+    body = gzip.compress(json.dumps(EXERCISES).encode())
+    upstream = MagicMock(status_code=200, headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    upstream.raw.stream.return_value = iter([body])
+    mock_stream.return_value = (upstream, None, 200)
+    app.config['PASSTHROUGH_PROXY'] = True
+    try:
+        response = client.get('/exercises/', headers=dict(AUTH, **{"Accept-Encoding": "gzip"}))
+        assert response.data == body
+    finally:
+        app.config['PASSTHROUGH_PROXY'] = False
+
+
+def test_compressed_etag_is_weak_and_still_revalidates():
+    compressor = ResponseCompressor(min_size=10)
+    cache = ResponseCache(max_size=8, ttl=60)
+    cache_app = Flask(__name__)
+    cache_app.after_request(lambda response: compressor.compress_response(response, "gzip"))
+
+    @cache_app.route('/exercises/1')
+    @cached_response(cache, 'exercise:1')
+    def get_exercise():
+        return jsonify(EXERCISES)
+
+    client = cache_app.test_client()
+    first = client.get('/exercises/1')
+    assert first.headers["ETag"].startswith('W/')
+    second = client.get('/exercises/1', headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+
+
+@patch('async_services.AsyncExercisesServiceClient.get_all_exercises', new_callable=AsyncMock)
+@patch('async_services.AsyncUserManagementServiceClient.verify_token', new_callable=AsyncMock)
+def test_async_app_compresses(mock_verify, mock_get_all):
+    mock_verify.return_value = ({"status": "success", "data": USER}, 200)
+    mock_get_all.return_value = (EXERCISES, 200)
+
+    async def scenario():
+        client = create_async_app().test_client()
+        response = await client.get('/exercises/', headers=dict(AUTH, **{"Accept-Encoding": "gzip"}))
+        return response.headers, await response.get_data()
+
+    headers, data = asyncio.run(scenario())
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(data)) == EXERCISES
+
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    compressor = ResponseCompressor()
+    body = json.dumps(EXERCISES).encode()
+    assert brotli.decompress(compressor.compress(body, "br")) == body
+    assert brotli.decompress(b"".join(compressor.compress_stream(iter([body[:100], body[100:]]), "br"))) == body
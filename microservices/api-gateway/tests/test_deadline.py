@@ -0,0 +1,63 @@
+"""
+Test per-route time budgets and deadline propagation
+"""
+import time
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+import deadline
+from app import app
+from services import ScoresServiceClient
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def _upstream():
+    return MagicMock(status_code=200, elapsed=timedelta(milliseconds=5), headers={},
+                     json=lambda: {"status": "success", "data": []})
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('requests.Session.request')
+def test_route_budget_caps_upstream_timeout(mock_request, _, client):
+    mock_request.return_value = _upstream()
+    started = time.time()
+    client.get("/scores/user", headers=AUTH)
+
+    budget = app.config['ROUTE_TIMEOUTS']['get_scores_by_user']
+    assert mock_request.call_args[1]["timeout"] <= budget
+    sent = float(mock_request.call_args[1]["headers"]["X-Request-Deadline"])
+    assert started + budget - 1 < sent <= time.time() + budget
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('requests.Session.request')
+def test_earlier_client_deadline_wins(mock_request, _, client):
+    mock_request.return_value = _upstream()
+    client_deadline = time.time() + 0.5
+    client.get("/scores/", headers=dict(AUTH, **{"X-Request-Deadline": str(client_deadline)}))
+    assert mock_request.call_args[1]["timeout"] <= 0.5
+    assert mock_request.call_args[1]["headers"]["X-Request-Deadline"] == f"{client_deadline:.3f}"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('requests.Session.request')
+def test_expired_deadline_skips_upstream(mock_request, _, client):
+    response = client.get("/scores/", headers=dict(AUTH, **{"X-Request-Deadline": str(time.time() - 1)}))
+    assert response.status_code == 504
+    mock_request.assert_not_called()
+
+
+@patch('services.requests.Session.request')
+def test_no_deadline_outside_requests(mock_request):
+    mock_request.return_value = _upstream()
+    ScoresServiceClient("http://localhost:5000", timeout=7).get_all_scores({})
+    assert mock_request.call_args[1]["timeout"] == 7
+    assert deadline.remaining() is None
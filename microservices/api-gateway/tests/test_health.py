@@ -0,0 +1,124 @@
+"""
+Test concurrent upstream health checks and the background prober
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from health import HealthProber, AsyncHealthProber
+
+
+def _client(status_code=200, delay=0.0):
+    client = MagicMock()
+
+    def health_check(timeout=None):
+        time.sleep(delay)
+        return None, status_code
+
+    client.health_check.side_effect = health_check
+    return client
+
+
+def _clients(**kwargs):
+    return {name: _client(**kwargs) for name in ("user", "exercises", "scores")}
+
+
+class TestHealthProber:
+    """Test the thread-based prober used by the sync gateway"""
+
+    def test_checks_run_in_parallel(self):
+        prober = HealthProber(_clients(delay=0.3), interval=0, timeout=2)
+        started = time.monotonic()
+        results = prober.refresh()
+        assert time.monotonic() - started < 0.8
+        assert all(r["status"] == "healthy" for r in results.values())
+
+    def test_per_check_timeout_is_forwarded(self):
+        clients = _clients()
+        HealthProber(clients, interval=0, timeout=1.5).refresh()
+        clients["user"].health_check.assert_called_once_with(timeout=1.5)
+
+    def test_hung_check_reports_timeout(self):
+        release = threading.Event()
+        clients = _clients()
+        clients["scores"].health_check.side_effect = lambda timeout=None: (release.wait(), (None, 200))[1]
+        prober = HealthProber(clients, interval=0, timeout=0.2)
+
+        started = time.monotonic()
+        results = prober.refresh()
+        release.set()
+
+        assert time.monotonic() - started < 1
+        assert results["scores"] == {"status": "unhealthy", "response_code": 504}
+        assert results["user"]["response_code"] == 200
+
+    def test_check_exception_is_unhealthy(self):
+        clients = _clients()
+        clients["user"].health_check.side_effect = RuntimeError("boom")
+        results = HealthProber(clients, interval=0).refresh()
+        assert results["user"] == {"status": "unhealthy", "response_code": 503}
+
+    def test_snapshot_answers_from_memory(self):
+        clients = _clients()
+        prober = HealthProber(clients, interval=60, timeout=1)
+        first = prober.snapshot()
+        second = prober.snapshot()
+
+        assert clients["user"].health_check.call_count == 1
+        assert set(first) == {"user", "exercises", "scores"}
+        assert second["user"]["age_seconds"] >= 0
+
+    def test_stale_results_are_refreshed(self):
+        clients = _clients()
+        prober = HealthProber(clients, interval=60, timeout=1)
+        prober.snapshot()
+        with patch('health.time.time', return_value=time.time() + 1000):
+            prober.snapshot()
+        assert clients["user"].health_check.call_count == 2
+
+    def test_zero_interval_checks_every_time(self):
+        clients = _clients()
+        prober = HealthProber(clients, interval=0)
+        prober.snapshot()
+        prober.snapshot()
+        assert clients["user"].health_check.call_count == 2
+        assert prober._worker is None
+
+    def test_concurrent_refreshes_share_one_pool(self):
+        prober = HealthProber(_clients(delay=0.05), interval=0, timeout=1)
+        executor = prober._executor
+        threads = [threading.Thread(target=prober.refresh) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert prober._executor is executor
+
+
+class TestAsyncHealthProber:
+    """Test the asyncio prober used by the ASGI gateway"""
+
+    def _async_client(self, status_code=200, delay=0.0):
+        client = MagicMock()
+
+        async def health_check(timeout=None):
+            await asyncio.sleep(delay)
+            return None, status_code
+
+        client.health_check.side_effect = health_check
+        return client
+
+    def test_deadline_and_parallelism(self):
+        clients = {
+            "user": self._async_client(delay=0.2),
+            "exercises": self._async_client(delay=0.2),
+            "scores": self._async_client(delay=5)
+        }
+        prober = AsyncHealthProber(clients, interval=0, timeout=0.5)
+
+        started = time.monotonic()
+        results = asyncio.run(prober.snapshot())
+
+        assert time.monotonic() - started < 1.5
+        assert results["user"]["response_code"] == 200
+        assert results["scores"]["response_code"] == 504
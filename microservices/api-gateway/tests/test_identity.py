@@ -0,0 +1,79 @@
+"""
+Test the signed identity header sent to the services
+"""
+import base64
+import json
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+import identity
+from app import app
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from identity import IDENTITY_HEADER, IdentitySigner, generate_keys, token_digest
+from middleware import AuthMiddleware
+from services import ScoresServiceClient
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+PRIVATE_KEY, PUBLIC_KEY = generate_keys()
+
+
+def _decode(part):
+    return base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+
+
+@pytest.fixture(autouse=True)
+def clear_identity():
+    yield
+    identity.end()
+
+
+def test_signature_and_claims():
+    value = IdentitySigner(PRIVATE_KEY, ttl=30).sign(USER, "token")
+    payload, signature = value.split(".")
+    # Raises InvalidSignature on mismatch; the public key is all a service needs
+    Ed25519PublicKey.from_public_bytes(_decode(PUBLIC_KEY)).verify(_decode(signature), _decode(payload))
+    claims = json.loads(_decode(payload))
+    assert claims["user"] == USER
+    assert claims["tok"] == token_digest("token")
+    assert time.time() < claims["exp"] <= time.time() + 30.01
+
+
+def test_disabled_without_key():
+    assert IdentitySigner.from_config({"GATEWAY_IDENTITY_PRIVATE_KEY": ""}) is None
+
+
+def test_disabled_without_cryptography():
+    with patch('identity.Ed25519PrivateKey', None):
+        assert IdentitySigner.from_config({"GATEWAY_IDENTITY_PRIVATE_KEY": PRIVATE_KEY}) is None
+
+
+@patch('middleware.AuthMiddleware.verify_token', return_value=USER)
+def test_verified_user_is_forwarded(_):
+    middleware = AuthMiddleware(MagicMock(), identity_signer=IdentitySigner(PRIVATE_KEY))
+    with app.test_request_context(headers={"Authorization": "Bearer token"}):
+        user_data, error, _ = middleware._get_user_data()
+        forwarded = identity.header_value()
+    assert user_data == USER and error is None
+    claims = json.loads(_decode(forwarded.split(".")[0]))
+    assert claims["user"] == USER
+
+
+@patch('middleware.AuthMiddleware.verify_token', return_value={})
+def test_rejected_token_forwards_nothing(_):
+    middleware = AuthMiddleware(MagicMock(), identity_signer=IdentitySigner(PRIVATE_KEY))
+    with app.test_request_context(headers={"Authorization": "Bearer bad"}):
+        middleware._get_user_data()
+    assert identity.header_value() is None
+
+
+@patch('services.requests.Session.request')
+def test_client_sends_gateway_identity_only(mock_request):
+    mock_request.return_value = MagicMock(status_code=200, json=lambda: {"status": "success"})
+    client = ScoresServiceClient("http://scores")
+
+    client.get_all_scores({"Authorization": "Bearer token", IDENTITY_HEADER: "forged"})
+    assert IDENTITY_HEADER not in mock_request.call_args[1]["headers"]
+
+    identity.start("signed")
+    client.get_all_scores({"Authorization": "Bearer token", IDENTITY_HEADER.lower(): "forged"})
+    assert mock_request.call_args[1]["headers"][IDENTITY_HEADER] == "signed"
@@ -0,0 +1,33 @@
+"""
+Test the orjson-backed JSON providers of both serving modes
+"""
+import asyncio
+from datetime import date
+from unittest.mock import patch
+import json_provider
+from app import app
+from asgi import create_async_app
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value={"id": 1, "username": "test_user", "admin": False})
+@patch('services.ExercisesServiceClient.get_all_exercises',
+       return_value=({"status": "success", "data": {"exercises": [{"title": "Ünïcode"}]}}, 200))
+def test_sync_app_relays_upstream_json(mock_exercises, mock_verify):
+    assert isinstance(app.json, json_provider.FastJSONProvider)
+    response = app.test_client().get('/exercises/', headers={"Authorization": "Bearer token"})
+    assert response.status_code == 200
+    assert "Ünïcode".encode() in response.data
+
+
+def test_stdlib_fallback_writes_iso_dates():
+    with patch.object(json_provider, 'orjson', None):
+        assert app.json.dumps({"day": date(2026, 1, 11)}) == '{"day": "2026-01-11"}'
+
+
+def test_async_app_uses_fast_provider():
+    async def scenario():
+        quart_app = create_async_app()
+        async with quart_app.app_context():
+            return quart_app.json.dumps({"b": date(2026, 1, 11), "a": 1}, separators=(",", ":"))
+
+    assert asyncio.run(scenario()) == '{"a":1,"b":"2026-01-11"}'
@@ -0,0 +1,103 @@
+"""
+Test the Prometheus metrics surface
+"""
+import asyncio
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY
+from app import app
+from async_services import AsyncScoresServiceClient
+from resilience import CircuitBreaker
+from services import ExercisesServiceClient
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def test_requests_are_counted_by_route_template(client):
+    labels = {"route": "/exercises/<int:exercise_id>", "method": "GET", "status": "401"}
+    before = _sample('gateway_requests_total', **labels)
+    client.get("/exercises/1")
+    client.get("/exercises/2")
+    assert _sample('gateway_requests_total', **labels) == before + 2
+    assert _sample('gateway_request_duration_seconds_count', **labels) >= 2
+
+
+def test_metrics_endpoint_exposition(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert 'gateway_requests_total{method="GET",route="/health",status="200"}' in body
+    assert "gateway_requests_in_flight" in body
+
+
+@patch('services.requests.Session.request')
+def test_upstream_call_phases(mock_request):
+    response = MagicMock(status_code=200, elapsed=timedelta(milliseconds=20), json=lambda: {})
+    mock_request.return_value = response
+    labels = {"upstream": "exercises_service"}
+    waits = _sample('gateway_upstream_request_duration_seconds_count', phase='wait', **labels)
+    ok = _sample('gateway_upstream_requests_total', method='GET', status='200', **labels)
+
+    ExercisesServiceClient("http://localhost:5000").get_all_exercises({})
+
+    assert _sample('gateway_upstream_request_duration_seconds_count', phase='wait', **labels) == waits + 1
+    assert _sample('gateway_upstream_requests_total', method='GET', status='200', **labels) == ok + 1
+
+
+def test_open_circuit_is_exported():
+    breaker = CircuitBreaker("scores_service", minimum_calls=1, window_size=1)
+    client = AsyncScoresServiceClient("http://127.0.0.1:9", circuit_breaker=breaker)
+    asyncio.run(client.get_all_scores({}))
+    assert _sample('gateway_circuit_state', upstream='scores_service') == 2
+    asyncio.run(client.get_all_scores({}))
+    assert _sample('gateway_upstream_requests_total', upstream='scores_service', method='GET',
+                   status='circuit_open') >= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"status": "success"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_async_client_times_connect_wait_and_transfer():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    phases = ('connect', 'wait', 'transfer', 'total')
+    before = {p: _sample('gateway_upstream_request_duration_seconds_count', upstream='scores_service', phase=p)
+              for p in phases}
+
+    async def call():
+        client = AsyncScoresServiceClient(f"http://127.0.0.1:{server.server_port}")
+        try:
+            return await client.get_all_scores({})
+        finally:
+            await client.close()
+
+    try:
+        assert asyncio.run(call())[1] == 200
+    finally:
+        server.shutdown()
+    for phase in phases:
+        assert _sample('gateway_upstream_request_duration_seconds_count',
+                       upstream='scores_service', phase=phase) == before[phase] + 1
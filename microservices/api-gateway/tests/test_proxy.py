@@ -0,0 +1,118 @@
+"""
+Test the zero-reparse passthrough proxy mode
+"""
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+from app import app
+from services import ServiceClient
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    app.config['PASSTHROUGH_PROXY'] = True
+    yield app.test_client()
+    app.config['PASSTHROUGH_PROXY'] = False
+
+
+def _upstream(body=b'{"status": "success"}', status=200, headers=None):
+    upstream = MagicMock()
+    upstream.status_code = status
+    upstream.headers = headers or {"Content-Type": "application/json", "Content-Length": str(len(body))}
+    upstream.raw.stream.return_value = iter([body[:5], body[5:]])
+    return upstream
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_get_streams_upstream_body_unchanged(mock_stream, _, client):
+    body = b'{"status":"success","data":{"exercises":[]}}'
+    upstream = _upstream(body, headers={
+        "Content-Type": "application/json",
+        "Content-Length": str(len(body)),
+        "ETag": '"abc"',
+        "X-Internal": "secret"
+    })
+    mock_stream.return_value = (upstream, None, 200)
+
+    response = client.get("/exercises/?page=2", headers={"Authorization": "Bearer token", "Cookie": "a=b"})
+
+    assert response.status_code == 200
+    assert response.data == body
+    assert response.headers["ETag"] == '"abc"'
+    assert "X-Internal" not in response.headers
+    upstream.raw.stream.assert_called_once_with(app.config['PASSTHROUGH_CHUNK_SIZE'], decode_content=False)
+    upstream.close.assert_called_once()
+
+    method, endpoint = mock_stream.call_args[0]
+    forwarded = mock_stream.call_args[1]["headers"]
+    assert (method, endpoint) == ("GET", "/api/exercises/?page=2")
+    assert forwarded["Authorization"] == "Bearer token"
+    assert "Cookie" not in forwarded
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_post_forwards_raw_body_without_parsing(mock_stream, _, client):
+    mock_stream.return_value = (_upstream(b'{"status": "fail"}', status=400), None, 400)
+    raw = b'{"answer": "print(1)",   "exercise_id": 3}'
+
+    with patch('flask.Request.get_json', side_effect=AssertionError("body was parsed")):
+        response = client.post("/exercises/validate_code", data=raw,
+                               headers={"Authorization": "Bearer token", "Content-Type": "application/json"})
+
+    assert response.status_code == 400
+    assert mock_stream.call_args[1]["data"] == raw
+    assert mock_stream.call_args[0][1] == "/api/exercises/validate_code"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_view_arguments_fill_endpoint(mock_stream, _, client):
+    mock_stream.return_value = (_upstream(), None, 200)
+    client.get("/scores/user/7", headers={"Authorization": "Bearer token"})
+    assert mock_stream.call_args[0][1] == "/api/scores/user/7"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+def test_non_json_body_rejected(_, client):
+    response = client.post("/scores/", data="notjson", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid payload"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ServiceClient.stream_request')
+def test_upstream_unreachable(mock_stream, _, client):
+    mock_stream.return_value = (None, {"status": "error", "message": "Service unavailable"}, 503)
+    response = client.get("/scores/", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 503
+    assert response.get_json()["message"] == "Service unavailable"
+
+
+def test_auth_still_required(client):
+    response = client.get("/exercises/")
+    assert response.status_code == 401
+
+
+class TestStreamRequest:
+    """Test ServiceClient.stream_request"""
+
+    @patch('services.requests.Session.request')
+    def test_stream_flag(self, mock_request):
+        mock_request.return_value = MagicMock(status_code=200)
+        upstream, error, status = ServiceClient("http://localhost:5000").stream_request('GET', '/api/x')
+        assert status == 200
+        assert error is None
+        assert mock_request.call_args[1]["stream"] is True
+
+    @patch('services.requests.Session.request')
+    def test_timeout(self, mock_request):
+        mock_request.side_effect = requests.exceptions.Timeout()
+        upstream, error, status = ServiceClient("http://localhost:5000").stream_request('GET', '/api/x')
+        assert upstream is None
+        assert status == 504
+        assert error["message"] == "Service timeout"
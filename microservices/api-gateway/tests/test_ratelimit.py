@@ -0,0 +1,117 @@
+"""
+Test the token-bucket rate limiter
+"""
+import multiprocessing
+import pytest
+from unittest.mock import patch
+from app import app
+from ratelimit import RateLimiter, MemoryBackend, SQLiteBackend
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+
+
+def _consume_many(path, count, results):
+    limiter = RateLimiter(SQLiteBackend(path), per_minute=30)
+    results.put(sum(1 for _ in range(count) if limiter.check("user:1", 1)[0]))
+
+
+class TestRateLimiter:
+    """Test bucket arithmetic and backends"""
+
+    def test_burst_then_reject(self):
+        limiter = RateLimiter(MemoryBackend(), per_minute=3)
+        assert [limiter.check("ip:1", 1)[0] for _ in range(4)] == [True, True, True, False]
+
+    def test_retry_after_reflects_cost(self):
+        limiter = RateLimiter(MemoryBackend(), per_minute=60)
+        for _ in range(60):
+            limiter.check("ip:1", 1)
+        allowed, retry_after = limiter.check("ip:1", 5)
+        assert allowed is False
+        assert 4 <= retry_after <= 5
+
+    def test_route_costs(self):
+        limiter = RateLimiter(MemoryBackend(), per_minute=10, route_costs={"validate_code": 4})
+        assert limiter.cost_of("validate_code") == 4
+        assert limiter.cost_of("get_all_exercises") == 1
+        assert [limiter.check("ip:1", 4)[0] for _ in range(3)] == [True, True, False]
+
+    def test_keys_are_independent(self):
+        limiter = RateLimiter(MemoryBackend(), per_minute=1)
+        assert limiter.check("user:1", 1)[0]
+        assert limiter.check("user:2", 1)[0]
+        assert not limiter.check("user:1", 1)[0]
+
+    def test_backend_error_fails_open(self):
+        limiter = RateLimiter(MemoryBackend(), per_minute=1)
+        with patch.object(MemoryBackend, 'consume', side_effect=RuntimeError("down")):
+            assert limiter.check("ip:1", 1) == (True, 0)
+
+    def test_sqlite_backend_shared_across_processes(self, tmp_path):
+        path = str(tmp_path / "ratelimit.db")
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_consume_many, args=(path, 20, results)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+        assert sum(results.get(timeout=5) for _ in workers) == 30
+
+
+@pytest.fixture
+def limited_client():
+    app.config['TESTING'] = True
+    app.config['RATE_LIMIT_ENABLED'] = True
+    original = app.extensions['rate_limiter']
+    app.extensions['rate_limiter'] = RateLimiter(MemoryBackend(), per_minute=2, route_costs={"validate_code": 2})
+    yield app.test_client()
+    app.extensions['rate_limiter'] = original
+    app.config['RATE_LIMIT_ENABLED'] = False
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ExercisesServiceClient.get_all_exercises', return_value=({"status": "success"}, 200))
+def test_429_with_retry_after(_, __, limited_client):
+    headers = {"Authorization": "Bearer token"}
+    assert limited_client.get("/exercises/", headers=headers).status_code == 200
+    assert limited_client.get("/exercises/", headers=headers).status_code == 200
+    response = limited_client.get("/exercises/", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["message"] == "Too many requests"
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('services.ExercisesServiceClient.validate_code', return_value=({"status": "success"}, 200))
+def test_expensive_route_drains_bucket(_, __, limited_client):
+    headers = {"Authorization": "Bearer token"}
+    assert limited_client.post("/exercises/validate_code", json={"answer": "x"}, headers=headers).status_code == 200
+    assert limited_client.post("/exercises/validate_code", json={"answer": "x"}, headers=headers).status_code == 429
+
+
+def test_anonymous_routes_limited_by_ip(limited_client):
+    for _ in range(2):
+        limited_client.post("/auth/login", data="notjson")
+    assert limited_client.post("/auth/login", data="notjson").status_code == 429
+
+
+def test_health_is_not_limited(limited_client):
+    for _ in range(5):
+        assert limited_client.get("/health").status_code == 200
+
+
+def test_anonymous_clients_behind_trusted_proxy_get_own_buckets():
+    from app import create_app
+    with patch('app.app.Config.TRUSTED_PROXY_HOPS', 1):
+        proxied_app = create_app()
+    proxied_app.config['RATE_LIMIT_ENABLED'] = True
+    proxied_app.extensions['rate_limiter'] = RateLimiter(MemoryBackend(), per_minute=2)
+    client = proxied_app.test_client()
+
+    def login(forwarded_for):
+        return client.post("/auth/login", data="notjson", headers={"X-Forwarded-For": forwarded_for}).status_code
+
+    assert [login("10.0.0.1") for _ in range(3)] == [400, 400, 429]
+    assert login("10.0.0.2") == 400
+    # Entries left of the one the proxy appended are the client's word, not the proxy's
+    assert login("10.0.0.9, 10.0.0.1") == 429
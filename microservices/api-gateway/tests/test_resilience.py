@@ -0,0 +1,94 @@
+"""
+Test the per-upstream circuit breaker
+"""
+import time
+import requests
+from unittest.mock import MagicMock, patch
+from resilience import CircuitBreaker
+from services import ServiceClient
+
+
+def _breaker(**kwargs):
+    options = dict(minimum_calls=4, window_size=4, open_seconds=60, half_open_calls=2)
+    options.update(kwargs)
+    return CircuitBreaker("upstream", **options)
+
+
+class TestCircuitBreaker:
+    """Test the breaker state machine"""
+
+    def test_stays_closed_below_minimum_calls(self):
+        breaker = _breaker()
+        for _ in range(3):
+            breaker.record(False, 0.01)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_opens_on_failure_rate(self):
+        breaker = _breaker(failure_rate_threshold=0.5)
+        for success in (True, True, False, False):
+            breaker.record(success, 0.01)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request() is False
+        assert breaker.stats()["rejected_calls"] == 1
+        assert breaker.stats()["times_opened"] == 1
+
+    def test_opens_on_slow_call_rate(self):
+        breaker = _breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+        for duration in (2.0, 2.0, 2.0, 0.1):
+            breaker.record(True, duration)
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_successes_close(self):
+        breaker = _breaker(open_seconds=0)
+        for _ in range(4):
+            breaker.record(False, 0.01)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+
+        assert breaker.allow_request() and breaker.allow_request()
+        assert breaker.allow_request() is False
+        breaker.record(True, 0.01)
+        breaker.record(True, 0.01)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_failure_reopens(self):
+        breaker = _breaker(open_seconds=0.05)
+        for _ in range(4):
+            breaker.record(False, 0.01)
+        time.sleep(0.06)
+        assert breaker.allow_request()
+        breaker.record(False, 0.01)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.stats()["times_opened"] == 2
+
+    def test_from_config_disabled(self):
+        assert CircuitBreaker.from_config({"CIRCUIT_BREAKER_ENABLED": False}, "x") is None
+
+
+class TestServiceClientCircuit:
+    """Test ServiceClient with a breaker attached"""
+
+    @patch('services.requests.Session.request')
+    def test_open_circuit_fails_fast(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        client = ServiceClient("http://localhost:5000", circuit_breaker=_breaker())
+
+        for _ in range(4):
+            assert client._make_request('GET', '/api/x')[1] == 503
+        assert mock_request.call_count == 4
+
+        response, status = client._make_request('GET', '/api/x')
+        assert status == 503
+        assert response["message"] == "Service temporarily unavailable"
+        assert mock_request.call_count == 4
+        assert client.circuit_stats()["state"] == CircuitBreaker.OPEN
+
+    @patch('services.requests.Session.request')
+    def test_client_errors_do_not_trip(self, mock_request):
+        mock_request.return_value = MagicMock(status_code=404, json=lambda: {"status": "fail"})
+        client = ServiceClient("http://localhost:5000", circuit_breaker=_breaker())
+        for _ in range(6):
+            client._make_request('GET', '/api/x')
+        assert client.circuit_stats()["state"] == CircuitBreaker.CLOSED
+
+    def test_without_breaker(self):
+        assert ServiceClient("http://localhost:5000").circuit_stats() is None
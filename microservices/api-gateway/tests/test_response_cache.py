@@ -0,0 +1,102 @@
+"""
+Test the ETag-aware exercise response cache
+"""
+import pytest
+from flask import Flask, jsonify
+from response_cache import ResponseCache, cached_response, invalidates
+
+
+@pytest.fixture
+def setup():
+    cache = ResponseCache(max_size=8, ttl=60)
+    upstream = {"calls": 0, "status": 200, "title": "first"}
+    app = Flask(__name__)
+
+    @app.route('/exercises/<int:exercise_id>', methods=['GET'])
+    @cached_response(cache, 'exercise:{exercise_id}')
+    def get_exercise(exercise_id):
+        upstream["calls"] += 1
+        return jsonify({"status": "success", "data": {"id": exercise_id, "title": upstream["title"]}}), upstream["status"]
+
+    @app.route('/exercises/<int:exercise_id>', methods=['PUT'])
+    @invalidates(cache, 'exercises', 'exercise:{exercise_id}')
+    def update_exercise(exercise_id):
+        return jsonify({"status": "success"}), upstream["status"]
+
+    return app.test_client(), cache, upstream
+
+
+def test_second_read_is_served_from_cache(setup):
+    client, cache, upstream = setup
+    first = client.get('/exercises/1')
+    second = client.get('/exercises/1')
+    assert upstream["calls"] == 1
+    assert first.data == second.data
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_if_none_match_returns_304(setup):
+    client, cache, upstream = setup
+    etag = client.get('/exercises/1').headers["ETag"]
+    response = client.get('/exercises/1', headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_stale_etag_gets_full_body(setup):
+    client, _, _ = setup
+    response = client.get('/exercises/1', headers={"If-None-Match": '"outdated"'})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["id"] == 1
+
+
+def test_update_invalidates(setup):
+    client, _, upstream = setup
+    old_etag = client.get('/exercises/1').headers["ETag"]
+    upstream["title"] = "second"
+    client.put('/exercises/1', json={})
+
+    response = client.get('/exercises/1', headers={"If-None-Match": old_etag})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["title"] == "second"
+    assert upstream["calls"] == 2
+
+
+def test_failed_write_keeps_entry(setup):
+    client, _, upstream = setup
+    client.get('/exercises/1')
+    upstream["status"] = 400
+    client.put('/exercises/1', json={})
+    upstream["status"] = 200
+    client.get('/exercises/1')
+    assert upstream["calls"] == 1
+
+
+def test_errors_are_not_cached(setup):
+    client, _, upstream = setup
+    upstream["status"] = 404
+    client.get('/exercises/1')
+    client.get('/exercises/1')
+    assert upstream["calls"] == 2
+
+
+def test_reads_with_query_string_are_not_cached(setup):
+    client, cache, upstream = setup
+    client.get('/exercises/1')
+    upstream["title"] = "filtered"
+    response = client.get('/exercises/1?fields=title')
+    assert response.get_json()["data"]["title"] == "filtered"
+    client.get('/exercises/1?fields=title')
+    assert upstream["calls"] == 3
+    # The plain read is still served from its own entry
+    assert client.get('/exercises/1').get_json()["data"]["title"] == "first"
+
+
+def test_fetch_racing_a_write_is_not_stored():
+    cache = ResponseCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate('exercise:1')
+    cache.put('exercise:1', b'{"stale": true}', generation)
+    assert cache.get('exercise:1') is None
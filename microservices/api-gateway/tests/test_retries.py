@@ -0,0 +1,183 @@
+"""
+Test retry budgets and hedged reads
+"""
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+import httpx
+import requests
+from async_services import AsyncExercisesServiceClient
+from balancer import LoadBalancer
+from resilience import CircuitBreaker, RetryBudget, RetryPolicy
+from services import ExercisesServiceClient, ScoresServiceClient
+
+
+def _ok(body=None):
+    return MagicMock(status_code=200, elapsed=timedelta(milliseconds=1), headers={},
+                     json=lambda: body or {"status": "success"})
+
+
+def _policy(**kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    return RetryPolicy(**kwargs)
+
+
+class TestRetryBudget:
+    def test_retries_are_a_share_of_calls(self):
+        budget = RetryBudget(ratio=0.1, min_per_second=0)
+        for _ in range(20):
+            budget.record_call()
+        assert [budget.try_withdraw() for _ in range(3)] == [True, True, False]
+        assert budget.stats()["denied"] == 1
+
+    def test_floor_allows_retries_at_low_traffic(self):
+        budget = RetryBudget(ratio=0.1, min_per_second=0.2, window_seconds=10)
+        budget.record_call()
+        assert budget.try_withdraw() is True
+
+
+class TestRetries:
+    @patch('services.requests.Session.request')
+    def test_transient_error_is_retried(self, mock_request):
+        mock_request.side_effect = [requests.exceptions.ConnectionError(), _ok()]
+        client = ScoresServiceClient("http://scores", retry_policy=_policy())
+        assert client.get_scores_by_user({})[1] == 200
+        assert mock_request.call_count == 2
+
+    @patch('services.requests.Session.request')
+    def test_writes_and_unnamed_reads_are_not_retried(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        client = ScoresServiceClient("http://scores", retry_policy=_policy())
+        assert client.create_score({}, {})[1] == 503
+        assert client.health_check(timeout=1)[1] == 503
+        assert mock_request.call_count == 2
+
+    @patch('services.requests.Session.request')
+    def test_spent_budget_stops_retries(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        client = ScoresServiceClient("http://scores",
+                                     retry_policy=_policy(budget=RetryBudget(ratio=0, min_per_second=0)))
+        assert client.get_all_scores({})[1] == 503
+        assert mock_request.call_count == 1
+
+    @patch('services.requests.Session.request')
+    def test_attempts_are_bounded(self, mock_request):
+        mock_request.side_effect = requests.exceptions.Timeout()
+        client = ScoresServiceClient("http://scores", retry_policy=_policy(max_retries=2))
+        assert client.get_all_scores({})[1] == 504
+        assert mock_request.call_count == 3
+
+
+class TestHedging:
+    def test_hedge_delay_is_route_percentile(self):
+        policy = _policy(hedge_routes=['get_single_exercise'], hedge_min_samples=10)
+        for ms in range(1, 21):
+            policy.observe('get_single_exercise', ms / 1000, 200)
+            policy.observe('get_all_exercises', ms / 1000, 200)
+        assert policy.hedge_delay('get_single_exercise') == 0.019
+        assert policy.hedge_delay('get_all_exercises') is None
+
+    @patch('services.requests.Session.request')
+    def test_slow_read_is_hedged(self, mock_request):
+        calls = []
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def respond(method, url, **kwargs):
+            with lock:
+                calls.append(url)
+                first = len(calls) == 1
+            if first:
+                release.wait(1)
+                return _ok({"attempt": 1})
+            return _ok({"attempt": 2})
+
+        mock_request.side_effect = respond
+        policy = _policy(hedge_routes=['get_single_exercise'], hedge_min_samples=1)
+        policy.observe('get_single_exercise', 0.02, 200)
+        client = ExercisesServiceClient("http://exercises", retry_policy=policy)
+
+        started = time.monotonic()
+        result, status = client.get_single_exercise(1, {})
+        assert time.monotonic() - started < 0.3
+        assert result == {"attempt": 2}
+        assert len(calls) == 2
+        release.set()
+        client._hedge_executor.shutdown(wait=True)
+
+    @patch('services.requests.Session.request')
+    def test_losing_hedge_drops_its_response(self, mock_request):
+        release = threading.Event()
+        slow = _ok({"attempt": 1})
+        slow.json = MagicMock(return_value={"attempt": 1})
+        calls = []
+
+        def respond(method, url, **kwargs):
+            calls.append(kwargs.get('stream'))
+            if len(calls) == 1:
+                release.wait(1)
+                return slow
+            return _ok({"attempt": 2})
+
+        mock_request.side_effect = respond
+        policy = _policy(hedge_routes=['get_single_exercise'], hedge_min_samples=1)
+        policy.observe('get_single_exercise', 0.02, 200)
+        client = ExercisesServiceClient("http://exercises", retry_policy=policy)
+        executor = client._hedge_executor
+
+        assert client.get_single_exercise(1, {}) == ({"attempt": 2}, 200)
+        release.set()
+        executor.shutdown(wait=True)
+        # One executor per client, made before any call; the loser never read its body
+        assert client._hedge_executor is executor
+        assert calls == [True, True]
+        slow.close.assert_called_once()
+        slow.json.assert_not_called()
+
+    def test_async_hedge_cancels_slower_attempt(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.path)
+            if len(calls) == 1:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={"attempt": len(calls)})
+
+        policy = _policy(hedge_routes=['get_single_exercise'], hedge_min_samples=1)
+        policy.observe('get_single_exercise', 0.02, 200)
+        client = AsyncExercisesServiceClient("http://exercises", retry_policy=policy)
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        started = time.monotonic()
+        result, status = asyncio.run(client.get_single_exercise(1, {}))
+        assert time.monotonic() - started < 0.5
+        assert result == {"attempt": 2}
+
+    def test_async_losing_hedge_is_not_a_failure(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request.url.host)
+            if len(calls) % 2 == 1:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={"attempt": len(calls)})
+
+        policy = _policy(hedge_routes=['get_single_exercise'], hedge_min_samples=1,
+                         budget=RetryBudget(ratio=1.0, min_per_second=100))
+        policy.observe('get_single_exercise', 0.02, 200)
+        breaker = CircuitBreaker('exercises', minimum_calls=1, half_open_calls=1)
+        balancer = LoadBalancer('exercises', 'http://a,http://b', ejection_failures=1)
+        client = AsyncExercisesServiceClient("http://a,http://b", retry_policy=policy,
+                                             circuit_breaker=breaker, balancer=balancer)
+        client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def hedge_three_times():
+            return [await client.get_single_exercise(1, {}) for _ in range(3)]
+
+        assert [status for _, status in asyncio.run(hedge_three_times())] == [200, 200, 200]
+        assert len(calls) == 6
+        assert breaker.stats()["state"] == CircuitBreaker.CLOSED
+        assert breaker.stats()["failure_rate"] == 0
+        assert all(e["outstanding"] == 0 and e["ejections"] == 0 for e in balancer.stats())
@@ -26,7 +26,7 @@ class TestServiceClient:
         client = ServiceClient("http://localhost:5000/")
         assert client.base_url == "http://localhost:5000"
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_success(self, mock_request):
         """Test successful request"""
         mock_response = MagicMock()
@@ -40,7 +40,7 @@ class TestServiceClient:
         assert status == 200
         assert result == {"message": "success"}
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_json_error(self, mock_request):
         """Test request with non-JSON response"""
         mock_response = MagicMock()
@@ -55,7 +55,7 @@ class TestServiceClient:
         assert status == 200
         assert result == {"message": "Plain text response"}
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_empty_response(self, mock_request):
         """Test request with empty response"""
         mock_response = MagicMock()
@@ -70,7 +70,7 @@ class TestServiceClient:
         assert status == 200
         assert result == {"message": "No response content"}
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_connection_error(self, mock_request):
         """Test request with connection error"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
@@ -82,7 +82,7 @@ class TestServiceClient:
         assert result["status"] == "error"
         assert "unavailable" in result["message"].lower()
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_timeout(self, mock_request):
         """Test request with timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -94,7 +94,7 @@ class TestServiceClient:
         assert result["status"] == "error"
         assert "timeout" in result["message"].lower()
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_make_request_generic_error(self, mock_request):
         """Test request with generic error"""
         mock_request.side_effect = Exception("Unknown error")
@@ -107,10 +107,85 @@ class TestServiceClient:
         assert "gateway error" in result["message"].lower()
 
 
+class TestServiceClientPooling:
+    """Test pooled keep-alive sessions of ServiceClient"""
+
+    def test_session_pool_configuration(self):
+        """Test that each client mounts a bounded pool for its upstream"""
+        client = ServiceClient("http://localhost:5000", pool_maxsize=4, pool_block=True)
+        adapter = client.session.get_adapter("http://localhost:5000/api")
+        assert adapter is client._adapter
+        assert adapter._pool_maxsize == 4
+        assert adapter._pool_block is True
+
+    def test_sessions_are_per_client(self):
+        """Test that clients do not share pools"""
+        first = ServiceClient("http://localhost:5000")
+        second = ServiceClient("http://localhost:5001")
+        assert first.session is not second.session
+
+    def test_keep_alive_disabled_sends_connection_close(self):
+        """Test disabling keep-alive"""
+        client = ServiceClient("http://localhost:5000", keep_alive=False)
+        assert client.session.headers["Connection"] == "close"
+
+    def test_upstream_cookies_are_not_persisted(self):
+        """Test that Set-Cookie from one upstream response is never replayed"""
+        client = ServiceClient("http://localhost:5000")
+        assert client.session.cookies.get_policy().allowed_domains() == ()
+
+    @patch('services.requests.Session.request')
+    def test_in_flight_counter_is_released(self, mock_request):
+        """Test connections in use returns to zero after success and error"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {}
+        mock_request.side_effect = [mock_response, requests.exceptions.Timeout()]
+
+        client = ServiceClient("http://localhost:5000")
+        client._make_request('GET', '/api/test')
+        client._make_request('GET', '/api/test')
+
+        assert client.pool_stats()["connections_in_use"] == 0
+
+    @patch('services.requests.Session.request')
+    def test_idle_connections_are_evicted(self, mock_request):
+        """Test pooled sockets are dropped after the idle timeout"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {}
+        mock_request.return_value = mock_response
+
+        client = ServiceClient("http://localhost:5000", idle_timeout=5)
+        with patch.object(client._adapter.poolmanager, 'clear') as mock_clear:
+            client._make_request('GET', '/api/test')
+            mock_clear.assert_not_called()
+
+            client._last_used -= 10
+            client._make_request('GET', '/api/test')
+            mock_clear.assert_called_once()
+
+        assert client.pool_stats()["idle_evictions"] == 1
+
+    def test_pool_stats_reuse_ratio(self):
+        """Test reuse ratio is derived from the urllib3 pool counters"""
+        client = ServiceClient("http://localhost:5000")
+        pool = client._adapter.poolmanager.connection_from_url("http://localhost:5000")
+        pool.num_connections = 2
+        pool.num_requests = 10
+
+        stats = client.pool_stats()
+
+        assert stats["connections_opened"] == 2
+        assert stats["requests"] == 10
+        assert stats["reuse_ratio"] == 0.8
+        assert stats["max_connections"] == 10
+
+
 class TestUserManagementServiceClient:
     """Test UserManagementServiceClient methods"""
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_register_success(self, mock_request):
         """Test successful user registration"""
         mock_response = MagicMock()
@@ -124,7 +199,7 @@ class TestUserManagementServiceClient:
         assert status == 201
         assert result["id"] == 1
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_register_timeout(self, mock_request):
         """Test register with timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -135,7 +210,7 @@ class TestUserManagementServiceClient:
         assert status == 504
         assert "timeout" in result["message"].lower()
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_register_connection_error(self, mock_request):
         """Test register with connection error"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
@@ -146,7 +221,7 @@ class TestUserManagementServiceClient:
         assert status == 503
         assert "unavailable" in result["message"].lower()
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_register_generic_error(self, mock_request):
         """Test register with generic error"""
         mock_request.side_effect = Exception("Unknown error")
@@ -156,7 +231,7 @@ class TestUserManagementServiceClient:
 
         assert status == 500
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_login_success(self, mock_request):
         """Test successful login"""
         mock_response = MagicMock()
@@ -170,7 +245,7 @@ class TestUserManagementServiceClient:
         assert status == 200
         assert "token" in result
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_login_timeout(self, mock_request):
         """Test login timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -180,7 +255,7 @@ class TestUserManagementServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_logout_success(self, mock_request):
         """Test successful logout"""
         mock_response = MagicMock()
@@ -193,7 +268,7 @@ class TestUserManagementServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_logout_timeout(self, mock_request):
         """Test logout timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -203,7 +278,7 @@ class TestUserManagementServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_user_status_success(self, mock_request):
         """Test get user status success"""
         mock_response = MagicMock()
@@ -216,7 +291,7 @@ class TestUserManagementServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_verify_token_success(self, mock_request):
         """Test verify token success"""
         mock_response = MagicMock()
@@ -229,7 +304,7 @@ class TestUserManagementServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_users_success(self, mock_request):
         """Test get all users success"""
         mock_response = MagicMock()
@@ -243,7 +318,7 @@ class TestUserManagementServiceClient:
         assert status == 200
         assert "users" in result
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_single_user_success(self, mock_request):
         """Test get single user success"""
         mock_response = MagicMock()
@@ -257,7 +332,7 @@ class TestUserManagementServiceClient:
         assert status == 200
         assert result["id"] == 1
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_add_user_success(self, mock_request):
         """Test add user success"""
         mock_response = MagicMock()
@@ -272,7 +347,7 @@ class TestUserManagementServiceClient:
 
         assert status == 201
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_admin_create_user_success(self, mock_request):
         """Test admin create user success"""
         mock_response = MagicMock()
@@ -287,7 +362,7 @@ class TestUserManagementServiceClient:
 
         assert status == 201
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_success(self, mock_request):
         """Test health check success"""
         mock_response = MagicMock()
@@ -300,7 +375,7 @@ class TestUserManagementServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_failure(self, mock_request):
         """Test health check failure"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
@@ -314,7 +389,7 @@ class TestUserManagementServiceClient:
 class TestExercisesServiceClient:
     """Test ExercisesServiceClient methods"""
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_exercises_success(self, mock_request):
         """Test get all exercises"""
         mock_response = MagicMock()
@@ -328,7 +403,7 @@ class TestExercisesServiceClient:
         assert status == 200
         assert "exercises" in result
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_exercises_timeout(self, mock_request):
         """Test timeout when getting exercises"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -338,7 +413,7 @@ class TestExercisesServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_exercises_connection_error(self, mock_request):
         """Test connection error"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
@@ -348,7 +423,7 @@ class TestExercisesServiceClient:
 
         assert status == 503
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_single_exercise_success(self, mock_request):
         """Test get single exercise"""
         mock_response = MagicMock()
@@ -362,7 +437,7 @@ class TestExercisesServiceClient:
         assert status == 200
         assert result["id"] == 1
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_single_exercise_timeout(self, mock_request):
         """Test get single exercise timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -372,7 +447,7 @@ class TestExercisesServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_create_exercise_success(self, mock_request):
         """Test create exercise"""
         mock_response = MagicMock()
@@ -387,7 +462,7 @@ class TestExercisesServiceClient:
 
         assert status == 201
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_create_exercise_timeout(self, mock_request):
         """Test create exercise timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -397,7 +472,7 @@ class TestExercisesServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_update_exercise_success(self, mock_request):
         """Test update exercise"""
         mock_response = MagicMock()
@@ -412,7 +487,7 @@ class TestExercisesServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_update_exercise_timeout(self, mock_request):
         """Test update exercise timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -422,7 +497,7 @@ class TestExercisesServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_delete_exercise_success(self, mock_request):
         """Test delete exercise"""
         mock_response = MagicMock()
@@ -435,7 +510,7 @@ class TestExercisesServiceClient:
 
         assert status == 204
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_delete_exercise_timeout(self, mock_request):
         """Test delete exercise timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -445,7 +520,7 @@ class TestExercisesServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_validate_code_success(self, mock_request):
         """Test validate code success"""
         mock_response = MagicMock()
@@ -460,7 +535,7 @@ class TestExercisesServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_success(self, mock_request):
         """Test health check success"""
         mock_response = MagicMock()
@@ -473,7 +548,7 @@ class TestExercisesServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_fallback(self, mock_request):
         """Test health check fallback to /health endpoint"""
         mock_response = MagicMock()
@@ -490,7 +565,7 @@ class TestExercisesServiceClient:
 class TestScoresServiceClient:
     """Test ScoresServiceClient methods"""
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_scores_success(self, mock_request):
         """Test get all scores"""
         mock_response = MagicMock()
@@ -503,7 +578,7 @@ class TestScoresServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_all_scores_timeout(self, mock_request):
         """Test get all scores timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -513,7 +588,7 @@ class TestScoresServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_scores_by_user_success(self, mock_request):
         """Test get scores by user"""
         mock_response = MagicMock()
@@ -526,7 +601,7 @@ class TestScoresServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_scores_by_user_timeout(self, mock_request):
         """Test get scores by user timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -536,7 +611,7 @@ class TestScoresServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_get_single_score_by_user_success(self, mock_request):
         """Test get single score by user"""
         mock_response = MagicMock()
@@ -549,7 +624,7 @@ class TestScoresServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_create_score_success(self, mock_request):
         """Test create score"""
         mock_response = MagicMock()
@@ -564,7 +639,7 @@ class TestScoresServiceClient:
 
         assert status == 201
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_create_score_timeout(self, mock_request):
         """Test create score timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -574,7 +649,7 @@ class TestScoresServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_create_score_connection_error(self, mock_request):
         """Test create score connection error"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
@@ -584,7 +659,7 @@ class TestScoresServiceClient:
 
         assert status == 503
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_update_score_success(self, mock_request):
         """Test update score"""
         mock_response = MagicMock()
@@ -599,7 +674,7 @@ class TestScoresServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_update_score_timeout(self, mock_request):
         """Test update score timeout"""
         mock_request.side_effect = requests.exceptions.Timeout()
@@ -609,7 +684,7 @@ class TestScoresServiceClient:
 
         assert status == 504
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_success(self, mock_request):
         """Test health check success"""
         mock_response = MagicMock()
@@ -622,7 +697,7 @@ class TestScoresServiceClient:
 
         assert status == 200
 
-    @patch('services.requests.request')
+    @patch('services.requests.Session.request')
     def test_health_check_error(self, mock_request):
         """Test health check error"""
         mock_request.side_effect = requests.exceptions.ConnectionError()
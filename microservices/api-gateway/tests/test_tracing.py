@@ -0,0 +1,71 @@
+"""
+Test request ID propagation and Server-Timing merging
+"""
+import logging
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+import tracing
+from app import app
+
+USER = {"id": 1, "username": "test_user", "admin": False}
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def _upstream(server_timing=None):
+    headers = {"Server-Timing": server_timing} if server_timing else {}
+    return MagicMock(status_code=200, elapsed=timedelta(milliseconds=5), headers=headers,
+                     json=lambda: {"status": "success", "data": []})
+
+
+def test_parse_server_timing():
+    assert tracing.parse_server_timing('db;dur=12.5, serialize;desc="json";dur=1, miss') == [
+        ("db", 0.0125), ("serialize", 0.001)]
+    assert tracing.parse_server_timing(None) == []
+
+
+def test_request_id_is_echoed_or_generated(client):
+    assert client.get("/health", headers={"X-Request-ID": "req-42"}).headers["X-Request-ID"] == "req-42"
+    generated = client.get("/health", headers={"X-Request-ID": "no spaces please"}).headers["X-Request-ID"]
+    assert len(generated) == 32
+    assert "total;dur=" in client.get("/health").headers["Server-Timing"]
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('requests.Session.request')
+def test_request_id_forwarded_and_upstream_timing_merged(mock_request, _, client):
+    mock_request.return_value = _upstream("db;dur=3.0, serialize;dur=0.5")
+    response = client.get("/scores/", headers=dict(AUTH, **{"X-Request-ID": "req-7"}))
+
+    assert mock_request.call_args[1]["headers"]["X-Request-ID"] == "req-7"
+    assert mock_request.call_args[1]["headers"]["Authorization"] == "Bearer token"
+    entries = response.headers["Server-Timing"].split(", ")
+    names = [entry.split(";")[0] for entry in entries]
+    assert names[-1] == "total"
+    assert {"auth", "scores_service", "scores_service.db", "scores_service.serialize"} <= set(names)
+    assert "scores_service.db;dur=3.0" in entries
+
+
+@patch('app.middleware.AuthMiddleware.verify_token', return_value=USER)
+@patch('requests.Session.request')
+def test_batch_threads_keep_request_id(mock_request, _, client):
+    mock_request.return_value = _upstream("db;dur=1.0")
+    response = client.post("/batch", headers=dict(AUTH, **{"X-Request-ID": "batch-1"}), json={"requests": [
+        {"path": "/scores/"}, {"path": "/users/"}
+    ]})
+    assert {call[1]["headers"]["X-Request-ID"] for call in mock_request.call_args_list} == {"batch-1"}
+    assert "user_management_service.db" in response.headers["Server-Timing"]
+
+
+def test_log_records_carry_request_id(client, caplog):
+    caplog.handler.addFilter(tracing.RequestIdFilter())
+    with caplog.at_level(logging.INFO):
+        client.get("/health", headers={"X-Request-ID": "log-1"})
+    assert "log-1" in {getattr(record, "request_id", None) for record in caplog.records}
+    assert tracing.current_request_id() is None
@@ -0,0 +1,95 @@
+"""Request IDs and Server-Timing.
+
+Every request gets an X-Request-ID (the client's, when it sent a sane one)
+that is forwarded to the services and added to log records. Upstream calls
+report their own Server-Timing, which is merged into the gateway's response
+under the service's name, e.g. `exercises_service.db;dur=3.1`.
+
+The ID and the timings live in context variables so the Flask app, the
+Quart app and batch worker threads (which run in a copy of the request's
+context) all see those of the request being served.
+"""
+import logging
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+_SERVER_TIMING_ENTRY = re.compile(r'^\s*([^;,\s]+)\s*(?:;.*?\bdur=([0-9.]+))?', re.IGNORECASE)
+
+_request_id: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('server_timing', default=None)
+# Batch sub-requests add to the same timings from several threads
+_timings_lock = threading.Lock()
+
+def start_request(incoming: Optional[str]) -> str:
+    """Adopt the incoming request ID or make one, and start collecting timings"""
+    request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+    _request_id.set(request_id)
+    _timings.set({})
+    return request_id
+
+def end_request():
+    """Forget the request so logging between requests does not reuse its ID"""
+    _request_id.set(None)
+    _timings.set(None)
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+def add_timing(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is None:
+        return
+    with _timings_lock:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+@contextmanager
+def timed(name: str):
+    """Add the duration of the block to the request's Server-Timing entry `name`"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        add_timing(name, time.monotonic() - started)
+
+def parse_server_timing(value: Optional[str]) -> List[Tuple[str, float]]:
+    """(name, seconds) pairs of a Server-Timing header; entries without dur are skipped"""
+    if not isinstance(value, str):
+        return []
+    entries = []
+    for part in value.split(','):
+        match = _SERVER_TIMING_ENTRY.match(part)
+        if match and match.group(2):
+            try:
+                entries.append((match.group(1), float(match.group(2)) / 1000))
+            except ValueError:
+                continue
+    return entries
+
+def record_upstream(service: str, seconds: float, server_timing: Optional[str]):
+    """Time of one upstream call plus the breakdown the service reported"""
+    add_timing(service, seconds)
+    for name, duration in parse_server_timing(server_timing):
+        add_timing(f"{service}.{name}", duration)
+
+def server_timing_header(total: Optional[float] = None) -> Optional[str]:
+    """Server-Timing value of the current request, ending with the gateway total"""
+    timings = dict(_timings.get() or {})
+    if total is not None:
+        timings['total'] = total
+    if not timings:
+        return None
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request ID to every record for the log format"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get() or '-'
+        return True
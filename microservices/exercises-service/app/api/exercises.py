@@ -1,8 +1,12 @@
 from sqlalchemy import exc
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app.models import Exercise, db
 from app.utils import authenticate, is_admin
 from app.logger import get_logger
+from app.sandbox import SandboxBusy, SandboxError, execute
+from app.compiled_tests import TestCaseError, compile_tests
+from app.result_cache import result_key
+from app.tracing import timed
 from app.constants import (
     FULL_TRACEBACK_MSG,
     INTERNAL_SERVER_ERROR,
@@ -14,6 +18,13 @@ logger = get_logger('exercises_api')
 
 exercises_blueprint = Blueprint("exercises", __name__)
 
+def run_submission(answer, tests):
+    """Run a submission in the sandbox pool, or in this process when the pool is disabled"""
+    pool = current_app.extensions.get("sandbox_pool")
+    if pool is None:
+        return execute(answer, tests)
+    return pool.run(answer, tests)
+
 @exercises_blueprint.route("/ping", methods=["GET"])
 def ping_pong():
     return jsonify({"status": "success", "message": "pong!"})
@@ -82,6 +93,8 @@ def validate_code():
 
         tests = exercise.test_cases
         solutions = exercise.solutions
+        test_cache = current_app.extensions.get("test_cache")
+        compiled_tests = test_cache.get(exercise) if test_cache is not None else None
 
         if len(tests) != len(solutions):
             logger.error(f"Tests and solutions length mismatch for exercise {exercise_id}")
@@ -90,51 +103,48 @@ def validate_code():
                 "message": "Tests and solutions length mismatch!"
             }), 500
 
-        results = []
-        user_results = []
+        result_cache = current_app.extensions.get("result_cache")
+        version = getattr(exercise, "version", None)
+        cache_key = result_key(exercise.id, version, answer) if result_cache is not None and version is not None else None
+        if cache_key is not None:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Code validation for exercise {exercise_id} served from cache: {cached['all_correct']}")
+                return jsonify(cached), 200
 
-        namespace = {}
         try:
-            exec(answer, namespace)
-        except Exception as e:
-            logger.warning(f"Code compilation failed for exercise {exercise_id}: {str(e)}")
+            with timed("sandbox"):
+                outcome = run_submission(answer, compiled_tests if compiled_tests is not None else tests)
+        except SandboxBusy as e:
+            logger.warning(f"Code validation for exercise {exercise_id} shed: {str(e)}")
+            return jsonify({"status": "error", "message": "Code execution is busy, please retry"}), 503
+        except SandboxError as e:
+            logger.warning(f"Code execution failed for exercise {exercise_id}: {str(e)}")
+            return jsonify({"status": "fail", "message": f"Code execution failed: {str(e)}!"}), 400
+
+        if not outcome["compiled"]:
+            logger.warning(f"Code compilation failed for exercise {exercise_id}: {outcome['error']}")
             return jsonify({
                 "status": "fail",
-                "message": f"Code compilation failed: {str(e)}!"
+                "message": f"Code compilation failed: {outcome['error']}!"
             }), 400
 
-        for test, sol in zip(tests, solutions):
-            try:
-                # Capture stdout to get print() output
-                import io
-                import sys
-                captured_output = io.StringIO()
-                old_stdout = sys.stdout
-                sys.stdout = captured_output
-
-                try:
-                    res = eval(test, namespace)
-                    output = captured_output.getvalue().strip()
-
-                    # Use output if available, otherwise use return value
-                    user_str = output if output else str(res)
-                    user_results.append(user_str)
-                    results.append(user_str == sol)
-                finally:
-                    sys.stdout = old_stdout
-            except Exception as e:
-                user_results.append(f"Error: {str(e)}")
-                results.append(False)
+        user_results = outcome["outputs"]
+        results = [user_str == sol for user_str, sol in zip(user_results, solutions)]
 
         all_correct = all(results)
         logger.info(f"Code validation completed for exercise {exercise_id}: {all_correct}")
         
-        return jsonify({
+        response_object = {
             "status": "success",
             "results": results,
             "user_results": user_results,
             "all_correct": all_correct,
-        }), 200
+        }
+        # A test cut short by a sandbox limit might pass on a quieter host
+        if cache_key is not None and not outcome.get("limited"):
+            result_cache.put(cache_key, response_object)
+        return jsonify(response_object), 200
         
     except Exception as e:
         logger.error(f"Error during code validation: {str(e)}")
@@ -163,6 +173,12 @@ def add_exercise(user_data):
         logger.warning("Missing required fields for add exercise")
         response_object = {"status": "fail", "message": "Missing required fields"}
         return jsonify(response_object), 400
+
+    try:
+        compile_tests(test_cases)
+    except TestCaseError as e:
+        logger.warning(f"Rejected exercise {title}: {str(e)}")
+        return jsonify({"status": "fail", "message": str(e)}), 400
     
     logger.debug(f"Attempting to add exercise: {title}")
     
@@ -224,6 +240,13 @@ def update_exercise(user_data, exercise_id):
             response_object = {"status": "fail", "message": "Sorry. That exercise does not exist."}
             return jsonify(response_object), 404
 
+        if test_cases is not None:
+            try:
+                compile_tests(test_cases)
+            except TestCaseError as e:
+                logger.warning(f"Rejected update of exercise {exercise_id}: {str(e)}")
+                return jsonify({"status": "fail", "message": str(e)}), 400
+
         # Update fields
         if title is not None:
             exercise.title = title
@@ -231,12 +254,12 @@ def update_exercise(user_data, exercise_id):
             exercise.body = body
         if difficulty is not None:
             exercise.difficulty = difficulty
-        if test_cases is not None:
-            exercise.test_cases = test_cases
-        if solutions is not None:
-            exercise.solutions = solutions
-            
+        content_changed = exercise.set_content(test_cases, solutions)
+
         db.session.commit()
+        test_cache = current_app.extensions.get("test_cache")
+        if content_changed and test_cache is not None:
+            test_cache.invalidate(exercise.id)
         
         logger.info(f"Successfully updated exercise {exercise_id}")
         response_object = {
@@ -258,7 +281,13 @@ def update_exercise(user_data, exercise_id):
 @exercises_blueprint.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
+    pool = current_app.extensions.get("sandbox_pool")
+    test_cache = current_app.extensions.get("test_cache")
+    result_cache = current_app.extensions.get("result_cache")
     return jsonify({
         "status": "success",
-        "message": "Exercises service is healthy"
+        "message": "Exercises service is healthy",
+        "sandbox": pool.stats() if pool is not None else None,
+        "test_cache": test_cache.stats() if test_cache is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None
     }), 200
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""Compiled test cases, cached per exercise version.
+
+Test cases are Python expressions stored as source. Rather than have every
+submission parse and compile them again, they are compiled once per
+(exercise_id, version) and kept in an LRU as a marshalled list of code
+objects, which is what crosses the pipe to a sandbox executor. Exercises are
+checked with `compile_tests` when created or updated, so a test case that
+does not compile is rejected then instead of failing every submission.
+"""
+import marshal
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class TestCaseError(ValueError):
+    """An authored test case is not a valid Python expression"""
+
+
+def compile_tests(tests: List[Any]) -> bytes:
+    """Marshalled code objects for `tests`; raises TestCaseError naming the first bad one"""
+    if not isinstance(tests, list):
+        raise TestCaseError("Test cases must be a list of expressions")
+    codes = []
+    for index, test in enumerate(tests, start=1):
+        if not isinstance(test, str):
+            raise TestCaseError(f"Test case {index} must be a string expression")
+        try:
+            # Same filename and mode as eval() on the source, so errors read the same
+            codes.append(compile(test, "<string>", "eval"))
+        except (SyntaxError, ValueError) as e:
+            raise TestCaseError(f"Test case {index} does not compile: {e}") from e
+    return marshal.dumps(codes)
+
+
+def load_tests(packed: bytes) -> list:
+    return marshal.loads(packed)
+
+
+class CompiledTestCache:
+    """Thread-safe LRU of compiled test cases keyed by (exercise_id, version)"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, Optional[bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["CompiledTestCache"]:
+        """Cache of TEST_CACHE_SIZE exercises; None when the size is 0"""
+        maxsize = config.get("TEST_CACHE_SIZE", 256)
+        if maxsize <= 0:
+            return None
+        return cls(maxsize)
+
+    def get(self, exercise) -> Optional[bytes]:
+        """Compiled test cases of `exercise`, or None to run them from source.
+
+        Exercises stored before create/update checked their test cases may
+        hold ones that do not compile; those keep running from source so each
+        test still reports its own error.
+        """
+        version = getattr(exercise, "version", None)
+        if version is None:
+            # Unversioned, so a cached entry could go stale unnoticed
+            return None
+        key = (exercise.id, version)
+        with self._lock:
+            if key in self._entries:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._misses += 1
+        try:
+            packed = compile_tests(exercise.test_cases)
+        except TestCaseError:
+            packed = None
+        with self._lock:
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return packed
+
+    def invalidate(self, exercise_id: int):
+        """Drop every cached version of an exercise"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == exercise_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self._hits, "misses": self._misses}
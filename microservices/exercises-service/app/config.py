@@ -20,6 +20,30 @@ class Config:
     
     # CORS Configuration
     CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173"]
+    
+    # Executor processes for validate_code (disabled: answers run in the web worker)
+    SANDBOX_ENABLED = os.environ.get('SANDBOX_ENABLED', 'true').lower() == 'true'
+    SANDBOX_POOL_SIZE = int(os.environ.get('SANDBOX_POOL_SIZE', '2'))
+    SANDBOX_MAX_QUEUE = int(os.environ.get('SANDBOX_MAX_QUEUE', '8'))
+    SANDBOX_QUEUE_TIMEOUT = float(os.environ.get('SANDBOX_QUEUE_TIMEOUT', '5'))
+    SANDBOX_JOB_TIMEOUT = float(os.environ.get('SANDBOX_JOB_TIMEOUT', '10'))
+    SANDBOX_MAX_JOBS_PER_EXECUTOR = int(os.environ.get('SANDBOX_MAX_JOBS_PER_EXECUTOR', '100'))
+    # Limits reported per test in user_results; SANDBOX_JOB_TIMEOUT kills whatever escapes them
+    SANDBOX_TEST_TIMEOUT = float(os.environ.get('SANDBOX_TEST_TIMEOUT', '2'))
+    SANDBOX_TEST_CPU_SECONDS = float(os.environ.get('SANDBOX_TEST_CPU_SECONDS', '1'))
+    SANDBOX_SUBMISSION_TIMEOUT = float(os.environ.get('SANDBOX_SUBMISSION_TIMEOUT', '5'))
+    SANDBOX_SUBMISSION_CPU_SECONDS = float(os.environ.get('SANDBOX_SUBMISSION_CPU_SECONDS', '4'))
+    SANDBOX_MEMORY_LIMIT_MB = int(os.environ.get('SANDBOX_MEMORY_LIMIT_MB', '256'))
+    SANDBOX_OUTPUT_LIMIT_CHARS = int(os.environ.get('SANDBOX_OUTPUT_LIMIT_CHARS', '65536'))
+
+    # Exercises whose compiled test cases are kept per worker (0 disables the cache)
+    TEST_CACHE_SIZE = int(os.environ.get('TEST_CACHE_SIZE', '256'))
+
+    # Results of resubmitted identical answers (0 disables); a RESULT_CACHE_PATH
+    # SQLite file shares them between the workers on a host
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', '1024'))
+    RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', '')
+    RESULT_CACHE_STORE_ENTRIES = int(os.environ.get('RESULT_CACHE_STORE_ENTRIES', '100000'))
 
 def get_config():
     return Config
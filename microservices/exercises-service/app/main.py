@@ -14,8 +14,13 @@ except ImportError:
 import os
 from flask import request, abort
 from app.config import get_config
-from app.models import db
+from app.models import db, add_missing_columns
 from app.logger import setup_logger
+from app.tracing import init_tracing
+from app.deadline import init_deadline
+from app.sandbox import SandboxPool
+from app.compiled_tests import CompiledTestCache
+from app.result_cache import ValidationResultCache
 from app.api.exercises import exercises_blueprint
 
 def create_app():
@@ -28,8 +33,15 @@ def create_app():
     # Load configuration
     app.config.from_object(get_config())
     
+    # Request IDs, Server-Timing and deadlines, ahead of the other request hooks
+    init_tracing(app)
+    init_deadline(app)
+    
     # Initialize extensions
     db.init_app(app)
+    app.extensions["sandbox_pool"] = SandboxPool.from_config(app.config)
+    app.extensions["test_cache"] = CompiledTestCache.from_config(app.config)
+    app.extensions["result_cache"] = ValidationResultCache.from_config(app.config)
     # Initialize DB migrations (ignore return to avoid unused variable)
     Migrate(app, db)
     # Restrict CORS: only allow explicit origins, headers, and methods
@@ -91,6 +103,7 @@ def create_app():
     with app.app_context():
         try:
             db.create_all()
+            add_missing_columns(db.engine)
             print("Database tables created successfully")
         except Exception as e:
             print(f"Database connection failed: {e}")
@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from sqlalchemy.types import JSON
 from app.logger import get_logger
 from app.constants import FULL_TRACEBACK_MSG
@@ -10,6 +11,24 @@ logger = get_logger("models")
 # Initialize extensions
 db = SQLAlchemy()
 
+# Columns added after the first release; db.create_all() never alters existing tables
+ADDED_COLUMNS = {
+    "exercises": {"version": "INTEGER NOT NULL DEFAULT 1"},
+}
+
+def add_missing_columns(engine):
+    """Add ADDED_COLUMNS that are missing from existing tables; safe to run on every startup"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    logger.info(f"Adding column {table}.{name}")
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
 class Exercise(db.Model):
     __tablename__ = "exercises"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -18,6 +37,8 @@ class Exercise(db.Model):
     difficulty = db.Column(db.Integer, nullable=False)
     test_cases = db.Column(JSON, nullable=False)
     solutions = db.Column(JSON, nullable=False)
+    # Bumped whenever test_cases or solutions change; keys cached compiled tests
+    version = db.Column(db.Integer, default=1, server_default="1", nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
 
@@ -30,6 +51,25 @@ class Exercise(db.Model):
         self.difficulty = difficulty
         self.test_cases = test_cases
         self.solutions = solutions
+        self.version = 1
+
+    def set_content(self, test_cases=None, solutions=None):
+        """Replace test_cases and/or solutions, bumping the version if either changed"""
+        changed = False
+        if test_cases is not None and test_cases != self.test_cases:
+            self.test_cases = test_cases
+            changed = True
+        if solutions is not None and solutions != self.solutions:
+            self.solutions = solutions
+            changed = True
+        if changed:
+            if inspect(self).persistent:
+                # Incremented by the UPDATE itself, so concurrent updates each get their own version
+                self.version = Exercise.version + 1
+            else:
+                self.version = (self.version or 1) + 1
+            logger.debug(f"Exercise {self.id} content changed, version bumped")
+        return changed
 
     def to_json(self):
         logger.debug(f"Converting Exercise {self.id} to JSON")
@@ -40,6 +80,7 @@ class Exercise(db.Model):
             "difficulty": self.difficulty,
             "test_cases": self.test_cases,
             "solutions": self.solutions,
+            "version": self.version,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
@@ -87,6 +128,7 @@ class Exercise(db.Model):
         logger.info(f"Updating exercise {self.id}")
 
         try:
+            self.set_content(kwargs.pop("test_cases", None), kwargs.pop("solutions", None))
             for key, value in kwargs.items():
                 if hasattr(self, key) and value is not None:
                     setattr(self, key, value)
@@ -0,0 +1,142 @@
+"""Memoized validate_code results.
+
+Students often resubmit byte-identical answers, and the frontend's auto-save
+and retries add more. A successful validation is stored under
+(exercise_id, exercise version, SHA-256 of the answer) and returned as is
+for the same answer, without running anything. The version changes with the
+exercise's test cases and solutions, so old results are never served for
+new content; they are simply evicted.
+
+Results live in a per-worker LRU, optionally backed by a SQLite file that
+every gunicorn worker on the host shares. Results in which a test hit a
+sandbox limit are not stored, since they depend on load as much as on the
+answer.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.logger import get_logger
+
+logger = get_logger("result_cache")
+
+
+def result_key(exercise_id: int, version: int, answer: str) -> str:
+    return f"{exercise_id}:{version}:{hashlib.sha256(answer.encode('utf-8')).hexdigest()}"
+
+
+class SQLiteResultStore:
+    """Results in a SQLite file shared by every worker on the host, at most `max_entries` of them"""
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._puts = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and opened lazily, i.e. after gunicorn forks
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS results "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO results (key, value, stored) VALUES (?, ?, ?)",
+                     (key, json.dumps(value), time.time()))
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            conn.execute("DELETE FROM results WHERE key IN "
+                         "(SELECT key FROM results ORDER BY stored DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+class ValidationResultCache:
+    """Thread-safe LRU of validation results, optionally in front of a shared store"""
+
+    def __init__(self, maxsize: int = 1024, store: Optional[SQLiteResultStore] = None):
+        self.maxsize = maxsize
+        self.store = store
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "store_hits": 0, "misses": 0, "store_errors": 0}
+
+    @classmethod
+    def from_config(cls, config) -> Optional["ValidationResultCache"]:
+        """Cache of RESULT_CACHE_SIZE results, shared through RESULT_CACHE_PATH if set; None when the size is 0"""
+        maxsize = config.get("RESULT_CACHE_SIZE", 1024)
+        if maxsize <= 0:
+            return None
+        path = config.get("RESULT_CACHE_PATH")
+        store = SQLiteResultStore(path, config.get("RESULT_CACHE_STORE_ENTRIES", 100000)) if path else None
+        return cls(maxsize, store)
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        """Add to the LRU; called with the lock held"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+        value = None
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+            except (sqlite3.Error, ValueError) as e:
+                # A broken store only costs us the cache
+                logger.warning(f"Result store read failed: {str(e)}")
+                self._counters["store_errors"] += 1
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["store_hits"] += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._remember(key, value)
+        if self.store is not None:
+            try:
+                self.store.put(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Result store write failed: {str(e)}")
+                self._counters["store_errors"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["store_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["store_hits"]
+            return dict(
+                self._counters,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+                shared=self.store is not None,
+                hit_rate=round(hits / lookups, 3) if lookups else 0.0
+            )
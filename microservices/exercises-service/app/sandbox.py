@@ -0,0 +1,600 @@
+"""Pool of executor processes for submitted code.
+
+`validate_code` runs untrusted answers. Running them inside the gunicorn
+worker lets a slow or hostile answer hold the worker and leave state behind
+(patched modules, stray threads). Instead each answer runs in one of a few
+pre-started executor processes, which receive the answer and the test
+expressions over a pipe and send back what each test printed or returned.
+
+Executors are started from a fork server that has already imported this
+module and the stdlib modules answers commonly use, so starting one costs a
+fork, not an interpreter start. An executor is replaced after `max_jobs`
+jobs, after a job that hit a limit, and when it dies. Callers wait at most
+`queue_timeout` seconds for a free executor, and at most `max_queue` callers
+wait at once; beyond that SandboxBusy is raised.
+
+Inside an executor each test runs under `Limits`: a test that runs too long,
+burns too much CPU, runs out of memory or prints too much reports e.g.
+"Time limit exceeded" as its output instead of failing the submission.
+Executors send each test's output as soon as it is known, and the pool kills
+an executor that goes quiet for longer than a test may take (or past
+`job_timeout` for the whole job), so code the in-process limits cannot
+interrupt, such as a long call into C, still ends as per-test "Time limit
+exceeded" entries for the tests that did not finish. A hard RLIMIT_CPU lets
+the kernel kill an executor whose code gets around the signal handlers.
+
+Before its first job an executor drops what it inherited from the web
+worker: the environment is cut down to ENV_ALLOWLIST (and its original copy
+wiped, so /proc/self/environ shows nothing either) and every file
+descriptor but its pipe and the standard streams is closed. Secrets such as
+DB_PASSWORD or SECRET_KEY are therefore out of reach of submitted code.
+
+The pool is started lazily in the process that first uses it, so a pool
+created before gunicorn forks its workers is not shared between them.
+"""
+import ctypes
+import io
+import math
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Union
+from app.compiled_tests import load_tests
+
+# Imported by the fork server so executors start warm
+WARM_MODULES = ["math", "re", "string", "itertools", "functools", "collections", "json", "random", "heapq"]
+# Environment variables an executor keeps; everything else may be a secret of the web worker
+ENV_ALLOWLIST = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ")
+
+class SandboxError(Exception):
+    """The submission could not be run to completion"""
+
+class SandboxBusy(SandboxError):
+    """Every executor is busy and the wait queue is full or timed out"""
+
+class SandboxCrashed(SandboxError):
+    """The executor died while running the submission"""
+
+class Limits:
+    """Resource limits applied inside an executor.
+
+    Wall-clock time is enforced with ITIMER_REAL, per-test CPU time with
+    ITIMER_PROF and per-submission CPU time with RLIMIT_CPU; each raises
+    LimitExceeded in the running code. Memory is capped with RLIMIT_AS for the
+    executor's lifetime, and captured output with `output_chars`.
+    """
+
+    def __init__(self, test_seconds: float = 2.0, test_cpu_seconds: float = 1.0,
+                 submission_seconds: float = 5.0, submission_cpu_seconds: float = 4.0,
+                 memory_mb: int = 256, output_chars: int = 64 * 1024):
+        self.test_seconds = test_seconds
+        self.test_cpu_seconds = test_cpu_seconds
+        self.submission_seconds = submission_seconds
+        self.submission_cpu_seconds = submission_cpu_seconds
+        self.memory_mb = memory_mb
+        self.output_chars = output_chars
+
+class LimitExceeded(BaseException):
+    """Raised inside submitted code; a BaseException so `except Exception` in the answer cannot swallow it"""
+
+TIME_LIMIT = "Time limit exceeded"
+CPU_LIMIT = "CPU time limit exceeded"
+MEMORY_LIMIT = "Memory limit exceeded"
+OUTPUT_LIMIT = "Output limit exceeded"
+
+# Signals the limits are delivered by; submitted code may not touch them
+_LIMIT_SIGNALS = {signal.SIGALRM, signal.SIGPROF, signal.SIGXCPU}
+# The originals, kept for the sandbox's own use once _lock_limits has replaced them
+_signal = signal.signal
+_setitimer = signal.setitimer
+_setrlimit = resource.setrlimit
+# Extra wall time the pool allows a test on top of its limit before killing the executor
+STEP_GRACE_SECONDS = 1.0
+
+class _CappedOutput(io.StringIO):
+    """stdout replacement that refuses to grow past `limit` characters"""
+
+    def __init__(self, limit: Optional[int]):
+        super().__init__()
+        self.limit = limit
+
+    def write(self, s):
+        if self.limit is not None and self.tell() + len(s) > self.limit:
+            raise LimitExceeded(OUTPUT_LIMIT)
+        return super().write(s)
+
+# Buffer that sys.stdout writes go to in the current thread or task
+_captured_stdout: ContextVar[Optional[io.StringIO]] = ContextVar("sandbox_stdout", default=None)
+_router_lock = threading.Lock()
+
+class _StdoutRouter:
+    """sys.stdout stand-in that writes to the capture buffer of the current context.
+
+    Swapping sys.stdout itself per execution is process-global, so concurrent
+    executions in one process would capture each other's output. With the
+    router installed once, each execution only sets a context variable.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def _target(self):
+        buffer = _captured_stdout.get()
+        return self._stream if buffer is None else buffer
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+@contextmanager
+def capture_stdout(buffer: io.StringIO):
+    """Send what this thread or task prints to `buffer` while the block runs"""
+    if not isinstance(sys.stdout, _StdoutRouter):
+        with _router_lock:
+            if not isinstance(sys.stdout, _StdoutRouter):
+                sys.stdout = _StdoutRouter(sys.stdout)
+    token = _captured_stdout.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _captured_stdout.reset(token)
+
+def _raise_limit(message):
+    def handler(signum, frame):
+        raise LimitExceeded(message)
+    return handler
+
+def _install_handlers():
+    """(Re)install the limit signal handlers, undoing anything submitted code did to them"""
+    _signal(signal.SIGALRM, _raise_limit(TIME_LIMIT))
+    _signal(signal.SIGPROF, _raise_limit(CPU_LIMIT))
+    _signal(signal.SIGXCPU, _raise_limit(CPU_LIMIT))
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, _LIMIT_SIGNALS)
+
+def _reserved(what):
+    raise PermissionError(f"{what} is reserved by the sandbox")
+
+def _lock_limits():
+    """Stop submitted code from disarming the limits through the signal and resource modules"""
+    original_sigmask = signal.pthread_sigmask
+
+    def guarded_signal(signalnum, handler):
+        if signalnum in _LIMIT_SIGNALS:
+            _reserved(f"Signal {signalnum}")
+        return _signal(signalnum, handler)
+
+    def guarded_setitimer(which, seconds, interval=0.0):
+        if which in (signal.ITIMER_REAL, signal.ITIMER_PROF):
+            _reserved("This timer")
+        return _setitimer(which, seconds, interval)
+
+    def guarded_sigmask(how, mask):
+        if how != signal.SIG_UNBLOCK and _LIMIT_SIGNALS & set(mask):
+            _reserved("Blocking the limit signals")
+        return original_sigmask(how, mask)
+
+    def guarded_setrlimit(which, limits):
+        if which in (resource.RLIMIT_CPU, resource.RLIMIT_AS):
+            _reserved("This resource limit")
+        return _setrlimit(which, limits)
+
+    signal.signal = guarded_signal
+    signal.setitimer = guarded_setitimer
+    signal.alarm = lambda seconds: _reserved("signal.alarm")
+    signal.pthread_sigmask = guarded_sigmask
+    resource.setrlimit = guarded_setrlimit
+
+def _wipe_initial_environ():
+    """Zero the environment block the process was started with, which /proc/self/environ shows.
+
+    os.environ no longer points into it once cleared; Linux only, elsewhere a no-op.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # env_start and env_end are fields 50 and 51, counted after the parenthesised command name
+            fields = f.read().rsplit(")", 1)[1].split()
+        start, end = int(fields[47]), int(fields[48])
+    except (OSError, IndexError, ValueError):
+        return
+    if 0 < start < end:
+        ctypes.memset(start, 0, end - start)
+
+def _isolate(keep_fds: List[int]):
+    """Drop the environment and file descriptors inherited from the web worker"""
+    kept = {name: os.environ[name] for name in ENV_ALLOWLIST if name in os.environ}
+    os.environ.clear()
+    os.environ.update(kept)
+    _wipe_initial_environ()
+    keep = {0, 1, 2, *keep_fds}
+    try:
+        fds = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        fds = range(3, resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+    for fd in fds:
+        if fd not in keep:
+            try:
+                os.close(fd)
+            except OSError:
+                # e.g. the descriptor listdir itself used, already closed
+                pass
+
+def _install_limits(limits: Limits):
+    """Process-wide part of the limits; only ever called in an executor.
+
+    The hard RLIMIT_CPU can only be lowered, so it is set once for the
+    executor's lifetime: two submissions' worth of CPU. The kernel kills the
+    executor when it is reached, and an executor left with less than one
+    submission's worth before that retires (see `_cpu_headroom`).
+    """
+    _install_handlers()
+    memory = limits.memory_mb * 1024 * 1024
+    _setrlimit(resource.RLIMIT_AS, (memory, memory))
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    lifetime = math.ceil(time.process_time() + 2 * limits.submission_cpu_seconds + 1)
+    if hard == resource.RLIM_INFINITY or lifetime < hard:
+        hard = lifetime
+    _setrlimit(resource.RLIMIT_CPU, (hard, hard))
+    _lock_limits()
+
+def _cpu_headroom() -> float:
+    """CPU seconds left before the hard RLIMIT_CPU"""
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    return math.inf if hard == resource.RLIM_INFINITY else hard - time.process_time()
+
+def _set_cpu_limit(seconds: Optional[float]):
+    """Soft RLIMIT_CPU `seconds` of CPU time from now, or lifted to the hard limit when None"""
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard
+    if seconds is not None:
+        soft = math.ceil(time.process_time() + seconds)
+        if hard != resource.RLIM_INFINITY:
+            # Below the hard limit, so SIGXCPU comes before the kernel's SIGKILL
+            soft = min(soft, hard - 1)
+    _setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+@contextmanager
+def _timers(limits: Optional[Limits], deadline: float):
+    """Arm the per-test wall and CPU timers, never past the submission deadline"""
+    if limits is None:
+        yield
+        return
+    _install_handlers()
+    _setitimer(signal.ITIMER_REAL, max(min(limits.test_seconds, deadline - time.monotonic()), 0.001))
+    _setitimer(signal.ITIMER_PROF, limits.test_cpu_seconds)
+    try:
+        yield
+    finally:
+        _setitimer(signal.ITIMER_REAL, 0)
+        _setitimer(signal.ITIMER_PROF, 0)
+
+def _cut_short(count: int, outputs: List[str], message: str) -> Dict[str, Any]:
+    """Result of a job stopped by `message`: tests that did not finish report it"""
+    return {"compiled": True, "outputs": outputs + [message] * (count - len(outputs)), "limited": True}
+
+def execute(answer: str, tests: Union[List[str], bytes], limits: Optional[Limits] = None,
+            progress: Optional[Callable[[str, Optional[str]], None]] = None) -> Dict[str, Any]:
+    """Run `answer`, then evaluate each test expression in its namespace.
+
+    `tests` is either the test sources or, from CompiledTestCache, their
+    compiled code objects marshalled into bytes.
+
+    Returns {"compiled": False, "error": message} when the answer itself
+    fails, otherwise {"compiled": True, "outputs": [...]} with what each test
+    printed, or its value when it printed nothing, or "Error: ..." when it raised.
+    With `limits` (executors only, they rely on signals and rlimits) a test
+    that breaks one reports e.g. "Time limit exceeded" as its output, and
+    "limited" is set in the result; when the answer itself breaks one, every
+    test reports it. `progress` is called with ("compiled", None) once the
+    answer has run, then with ("output", text) for each test as it finishes.
+    """
+    if isinstance(tests, bytes):
+        tests = load_tests(tests)
+    namespace = {}
+    deadline = time.monotonic() + (limits.submission_seconds if limits else 0)
+    cpu_deadline = time.process_time() + (limits.submission_cpu_seconds if limits else 0)
+    output_limit = limits.output_chars if limits else None
+    limited = False
+    if limits:
+        _set_cpu_limit(limits.submission_cpu_seconds)
+    try:
+        try:
+            with _timers(limits, deadline), capture_stdout(_CappedOutput(output_limit)):
+                exec(answer, namespace)
+        except LimitExceeded as e:
+            return _cut_short(len(tests), [], str(e))
+        except MemoryError:
+            return _cut_short(len(tests), [], MEMORY_LIMIT)
+        except Exception as e:
+            return {"compiled": False, "error": str(e)}
+        if progress is not None:
+            progress("compiled", None)
+
+        outputs = []
+        for test in tests:
+            try:
+                if limits and time.monotonic() >= deadline:
+                    raise LimitExceeded(TIME_LIMIT)
+                if limits and time.process_time() >= cpu_deadline:
+                    raise LimitExceeded(CPU_LIMIT)
+                # Capture stdout to get print() output
+                captured_output = _CappedOutput(output_limit)
+                with _timers(limits, deadline), capture_stdout(captured_output):
+                    res = eval(test, namespace)
+                output = captured_output.getvalue().strip()
+                # Use output if available, otherwise use return value
+                output = output if output else str(res)
+                if output_limit is not None and len(output) > output_limit:
+                    raise LimitExceeded(OUTPUT_LIMIT)
+                outputs.append(output)
+            except LimitExceeded as e:
+                limited = True
+                outputs.append(str(e))
+            except MemoryError:
+                limited = True
+                outputs.append(MEMORY_LIMIT)
+            except Exception as e:
+                outputs.append(f"Error: {str(e)}")
+            if progress is not None:
+                progress("output", outputs[-1])
+        return {"compiled": True, "outputs": outputs, "limited": limited}
+    finally:
+        if limits:
+            _set_cpu_limit(None)
+
+def _executor_main(conn, limits: Optional[Limits] = None):
+    """Executor loop until the pipe closes: one (answer, tests) job in, then
+    ("compiled", None), ("output", text) per test as it finishes and finally
+    ("result", result) without the outputs already sent"""
+    _isolate([conn.fileno()])
+    if limits:
+        _install_limits(limits)
+    while True:
+        try:
+            answer, tests = conn.recv()
+        except (EOFError, OSError):
+            return
+        streamed = []
+
+        def progress(kind, value):
+            if kind == "output":
+                streamed.append(value)
+            conn.send((kind, value))
+
+        try:
+            result = execute(answer, tests, limits, progress)
+        except BaseException as e:
+            # e.g. SystemExit raised by the answer; report it rather than die
+            result = {"compiled": False, "error": f"{type(e).__name__}: {e}", "limited": True}
+        if result.get("compiled"):
+            result["outputs"] = result["outputs"][len(streamed):]
+        if limits and _cpu_headroom() < limits.submission_cpu_seconds + 1:
+            result["retire"] = True
+        conn.send(("result", result))
+
+class _Executor:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+        self.retire = False
+
+    def kill(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+
+class SandboxPool:
+    """Fixed-size pool of executor processes with a bounded wait queue"""
+
+    def __init__(self, size: int = 2, max_queue: int = 8, queue_timeout: float = 5.0,
+                 job_timeout: float = 10.0, max_jobs: int = 100, start_method: str = "forkserver",
+                 limits: Optional[Limits] = None):
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.job_timeout = job_timeout
+        self.max_jobs = max_jobs
+        self.start_method = start_method
+        self.limits = limits if limits is not None else Limits()
+        self._cond = threading.Condition()
+        self._pid = None
+        self._idle: List[_Executor] = []
+        self._executors: List[_Executor] = []
+        self._waiting = 0
+        self._counters = {"jobs": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "rejected": 0, "limited": 0,
+                          "dead_idle": 0}
+        self._job_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["SandboxPool"]:
+        """Pool from SANDBOX_* settings; None runs submissions in the web worker itself"""
+        if not config.get("SANDBOX_ENABLED", True):
+            return None
+        return cls(
+            size=config.get("SANDBOX_POOL_SIZE", 2),
+            max_queue=config.get("SANDBOX_MAX_QUEUE", 8),
+            queue_timeout=config.get("SANDBOX_QUEUE_TIMEOUT", 5.0),
+            job_timeout=config.get("SANDBOX_JOB_TIMEOUT", 10.0),
+            max_jobs=config.get("SANDBOX_MAX_JOBS_PER_EXECUTOR", 100),
+            start_method=config.get("SANDBOX_START_METHOD", "forkserver"),
+            limits=Limits(
+                test_seconds=config.get("SANDBOX_TEST_TIMEOUT", 2.0),
+                test_cpu_seconds=config.get("SANDBOX_TEST_CPU_SECONDS", 1.0),
+                submission_seconds=config.get("SANDBOX_SUBMISSION_TIMEOUT", 5.0),
+                submission_cpu_seconds=config.get("SANDBOX_SUBMISSION_CPU_SECONDS", 4.0),
+                memory_mb=config.get("SANDBOX_MEMORY_LIMIT_MB", 256),
+                output_chars=config.get("SANDBOX_OUTPUT_LIMIT_CHARS", 64 * 1024)
+            )
+        )
+
+    def _start_executor(self) -> _Executor:
+        """Start a new executor process; touches no pool state, so it needs no lock"""
+        context = multiprocessing.get_context(self.start_method)
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_executor_main, args=(child_conn, self.limits), name="sandbox-executor", daemon=True)
+        process.start()
+        child_conn.close()
+        return _Executor(process, parent_conn)
+
+    def _spawn(self) -> _Executor:
+        """Start an executor and add it to the pool; called with the lock held"""
+        executor = self._start_executor()
+        self._executors.append(executor)
+        return executor
+
+    def _ensure_started(self):
+        """Start the executors of this process; called with the lock held"""
+        if self._pid == os.getpid():
+            return
+        if self.start_method == "forkserver":
+            multiprocessing.set_forkserver_preload([__name__] + WARM_MODULES)
+        # Executors inherited from a parent process belong to it
+        self._idle, self._executors = [], []
+        self._pid = os.getpid()
+        for _ in range(self.size):
+            self._idle.append(self._spawn())
+
+    def _acquire(self) -> _Executor:
+        with self._cond:
+            self._ensure_started()
+            if self._idle:
+                return self._idle.pop()
+            if self._waiting >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise SandboxBusy("Sandbox queue is full")
+            self._waiting += 1
+            try:
+                expires = time.monotonic() + self.queue_timeout
+                while not self._idle:
+                    left = expires - time.monotonic()
+                    if left <= 0:
+                        self._counters["rejected"] += 1
+                        raise SandboxBusy("Timed out waiting for a sandbox")
+                    self._cond.wait(left)
+                return self._idle.pop()
+            finally:
+                self._waiting -= 1
+
+    def _release(self, executor: _Executor, healthy: bool):
+        replace = not healthy or executor.retire or executor.jobs >= self.max_jobs
+        replacement = None
+        if replace:
+            # Killing and starting processes takes a while; waiting callers should not wait on it
+            executor.kill()
+            replacement = self._start_executor()
+        with self._cond:
+            if replace:
+                if healthy:
+                    self._counters["recycled"] += 1
+                if executor in self._executors:
+                    self._executors.remove(executor)
+                if self._pid != os.getpid():
+                    # The pool was closed meanwhile
+                    replacement.kill()
+                    return
+                self._executors.append(replacement)
+                executor = replacement
+            self._idle.append(executor)
+            self._cond.notify()
+
+    def _dispatch(self, answer: str, tests: Union[List[str], bytes]) -> _Executor:
+        """Hand the job to a free executor, retrying once on a fresh one when it had died while idle"""
+        executor = self._acquire()
+        for attempt in range(2):
+            executor.jobs += 1
+            try:
+                executor.conn.send((answer, tests))
+                return executor
+            except OSError as e:
+                # The job never reached it, so nothing the answer did killed it
+                self._release(executor, False)
+                if attempt:
+                    self._counters["crashes"] += 1
+                    raise SandboxCrashed("Code execution process died") from e
+                self._counters["dead_idle"] += 1
+                executor = self._acquire()
+
+    def _receive(self, executor: _Executor, count: int, started: float) -> Dict[str, Any]:
+        """Collect a job's outputs and result, killing the executor when a test overruns.
+
+        Each message must arrive within a test's time limit (plus grace) of
+        the previous one, and all of them within `job_timeout`.
+        """
+        outputs = []
+        job_deadline = started + self.job_timeout
+        step = self.limits.test_seconds + STEP_GRACE_SECONDS
+        while True:
+            wait = min(job_deadline, time.monotonic() + step) - time.monotonic()
+            if not executor.conn.poll(max(wait, 0)):
+                self._counters["timeouts"] += 1
+                return _cut_short(count, outputs, TIME_LIMIT)
+            try:
+                kind, value = executor.conn.recv()
+            except (EOFError, OSError) as e:
+                executor.process.join(1)
+                if executor.process.exitcode in (-signal.SIGKILL, -signal.SIGXCPU):
+                    # The kernel enforcing the hard RLIMIT_CPU
+                    return _cut_short(count, outputs, CPU_LIMIT)
+                self._counters["crashes"] += 1
+                raise SandboxCrashed("Code execution process died") from e
+            if kind == "compiled":
+                continue
+            if kind == "output":
+                outputs.append(value)
+                continue
+            executor.retire = value.pop("retire", False)
+            if value.get("compiled"):
+                value["outputs"] = outputs + value["outputs"]
+            return value
+
+    def run(self, answer: str, tests: Union[List[str], bytes]) -> Dict[str, Any]:
+        """Result of `execute(answer, tests)` run in an executor; raises SandboxError"""
+        started = time.monotonic()
+        executor = self._dispatch(answer, tests)
+        healthy = False
+        try:
+            count = len(load_tests(tests) if isinstance(tests, bytes) else tests)
+            result = self._receive(executor, count, started)
+            # Code interrupted by a limit may have left the executor half-updated
+            healthy = not result.get("limited", False)
+            if not healthy:
+                self._counters["limited"] += 1
+            return result
+        except OSError as e:
+            self._counters["crashes"] += 1
+            raise SandboxCrashed("Code execution process died") from e
+        finally:
+            with self._cond:
+                self._counters["jobs"] += 1
+                self._job_seconds += time.monotonic() - started
+            self._release(executor, healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            jobs = self._counters["jobs"]
+            return dict(
+                self._counters,
+                size=self.size,
+                idle=len(self._idle) if self._pid == os.getpid() else self.size,
+                queued=self._waiting,
+                avg_job_ms=round(self._job_seconds / jobs * 1000, 1) if jobs else 0.0
+            )
+
+    def close(self):
+        with self._cond:
+            if self._pid == os.getpid():
+                for executor in self._executors:
+                    executor.kill()
+            self._idle, self._executors, self._pid = [], [], None
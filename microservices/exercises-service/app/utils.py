@@ -3,6 +3,9 @@ import os
 from functools import wraps
 from flask import request, jsonify
 from app.logger import get_logger
+from app.tracing import REQUEST_ID_HEADER, current_request_id, timed
+from app.deadline import DEADLINE_HEADER, call_timeout, current_deadline
+from app.identity import verified_identity
 
 # Get logger for this module
 logger = get_logger("exercises_utils")
@@ -44,7 +47,8 @@ def authenticate(f):
             response_object["message"] = "Invalid token format."
             return jsonify(response_object), code
 
-        user_data = verify_token_with_user_service(auth_token)
+        # A gateway-signed identity saves the round trip to the user service
+        user_data = verified_identity(auth_token) or verify_token_with_user_service(auth_token)
         if not user_data:
             logger.warning("Invalid or expired auth token")
             response_object["message"] = "Invalid token. Please log in again."
@@ -57,10 +61,19 @@ def authenticate(f):
 
 def verify_token_with_user_service(token):
     """Call user-management service to verify token and return user data or None."""
+    # Never wait on the user service longer than the caller waits for us
+    timeout = call_timeout(3)
     try:
         url = f"{_get_user_service_url()}/api/auth/verify"
         headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(url, headers=headers, timeout=3)
+        request_id = current_request_id()
+        if request_id:
+            headers[REQUEST_ID_HEADER] = request_id
+        deadline = current_deadline()
+        if deadline is not None:
+            headers[DEADLINE_HEADER] = f"{deadline:.3f}"
+        with timed("auth"):
+            resp = requests.get(url, headers=headers, timeout=timeout)
         if resp.status_code != 200:
             logger.warning(f"verify_token_with_user_service: non-200 {resp.status_code}")
             return None
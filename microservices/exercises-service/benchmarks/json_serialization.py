@@ -0,0 +1,112 @@
+"""Benchmark list-endpoint serialization before and after FastJSONProvider.
+
+Builds `--rows` model instances of each service (Exercise, Score, User) in
+memory and times what `get_all_exercises`, `get_all_scores` and
+`get_all_users` do to answer: `to_json()` per row, then encoding the Flask
+JSON response, which is reported per provider. Providers compared: Flask's default (stdlib json), the fast
+provider without orjson (stdlib fallback) and the fast provider with orjson.
+
+    python benchmarks/json_serialization.py --rows 1000 --repeat 50
+
+Run from any directory; the sibling services are found next to this one.
+"""
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import configure_mappers
+
+MICROSERVICES_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _exercise(i):
+    return dict(id=i, title=f"Exercise {i}", body="Write a function that returns the sum of two numbers. " * 4,
+                difficulty=i % 3, test_cases=[{"input": [i, i + 1], "output": 2 * i + 1}] * 5,
+                solutions=["def solution(a, b):\n    return a + b"])
+
+def _score(i):
+    return dict(id=i, user_id=i % 50, exercise_id=i % 40, answer="def solution(a, b):\n    return a + b",
+                results=[True, True, False, True, True], user_results=[3, 5, 8, 13, 21])
+
+def _user(i):
+    return dict(id=i, username=f"user{i}", email=f"user{i}@example.com", password="x" * 60,
+                active=True, admin=i % 10 == 0)
+
+SERVICES = {
+    # name: (service directory, model, row factory, response key)
+    "exercises": ("exercises-service", "Exercise", _exercise, "exercises"),
+    "scores": ("scores-service", "Score", _score, "scores"),
+    "users": ("user-management-service", "User", _user, "users"),
+}
+
+def _load_service(directory):
+    """Import the `app` package of one service, dropping the previously loaded one"""
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        del sys.modules[name]
+    sys.path.insert(0, os.path.join(MICROSERVICES_DIR, directory))
+    try:
+        return importlib.import_module("app.models"), importlib.import_module("app.json_provider")
+    finally:
+        sys.path.pop(0)
+
+def _rows(model, factory, count):
+    configure_mappers()
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        # Skip __init__ (User hashes its password there); to_json only reads attributes
+        row = model.__mapper__.class_manager.new_instance()
+        for key, value in factory(i).items():
+            setattr(row, key, value)
+        row.created_at = created + timedelta(minutes=i)
+        row.updated_at = row.created_at
+        rows.append(row)
+    return rows
+
+def _time(app, rows, key, repeat):
+    """Median milliseconds of (to_json for all rows, encoding the response) and the body size"""
+    rows_ms, encode_ms = [], []
+    with app.app_context():
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = {"status": "success", "data": {key: [row.to_json() for row in rows]}}
+            converted = time.perf_counter()
+            body = app.json.response(payload).get_data()
+            rows_ms.append((converted - started) * 1000)
+            encode_ms.append((time.perf_counter() - converted) * 1000)
+    return statistics.median(rows_ms), statistics.median(encode_ms), len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=list(SERVICES))
+    args = parser.parse_args()
+
+    print(f"rows={args.rows} repeat={args.repeat} (median per response)")
+    for name in args.services:
+        directory, model_name, factory, key = SERVICES[name]
+        models, json_provider = _load_service(directory)
+        rows = _rows(getattr(models, model_name), factory, args.rows)
+        app = Flask(name)
+        # Rows are built once; keep debug logging in to_json from skewing the numbers
+        models.logger.disabled = True
+
+        app.json = DefaultJSONProvider(app)
+        to_json_ms, baseline, size = _time(app, rows, key, args.repeat)
+        app.json = json_provider.FastJSONProvider(app)
+        with patch.object(json_provider, "orjson", None):
+            fallback = _time(app, rows, key, args.repeat)[1]
+        results = [("flask default", baseline), ("fast, stdlib", fallback)]
+        if json_provider.orjson is not None:
+            results.append(("fast, orjson", _time(app, rows, key, args.repeat)[1]))
+        print(f"{name:>9} ({size / 1024:.0f} KiB, to_json {to_json_ms:.2f}ms) encode: " + "  ".join(
+            f"{label}={ms:.2f}ms (x{baseline / ms:.1f})" for label, ms in results))
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,11 @@ def setup_database():
     flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Exercise ids restart with each database, so cached entries would go stale
+    for cache in ("test_cache", "result_cache"):
+        if flask_app.extensions.get(cache) is not None:
+            flask_app.extensions[cache].clear()
+
     with flask_app.app_context():
         db.create_all()
         yield
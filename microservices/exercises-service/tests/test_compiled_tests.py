@@ -0,0 +1,112 @@
+"""
+Tests for compiled test cases cached per exercise version
+"""
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app import compiled_tests
+from app.models import Exercise, db
+from app.sandbox import execute
+from app.compiled_tests import CompiledTestCache, compile_tests
+
+HEADERS = {'Authorization': 'Bearer token'}
+USER = {'id': 1, 'username': 'author', 'admin': False}
+
+
+def _exercise(app, test_cases, solutions):
+    with app.app_context():
+        exercise = Exercise(title='Add', body='Add', difficulty=1, test_cases=test_cases, solutions=solutions)
+        db.session.add(exercise)
+        db.session.commit()
+        return exercise.id
+
+
+def test_compiled_tests_run_like_sources():
+    answer = "def add(a, b):\n    print(a + b)\n"
+    tests = ["add(1, 2)", "add(2, 2) or 'none'", "missing()"]
+    assert execute(answer, compile_tests(tests)) == execute(answer, tests)
+
+
+@pytest.mark.parametrize("tests, message", [
+    (["1 +"], "Test case 1 does not compile"),
+    (["1", {"input": "1"}], "Test case 2 must be a string expression"),
+    ("1 + 1", "must be a list"),
+])
+def test_bad_test_cases_are_rejected(tests, message):
+    with pytest.raises(compiled_tests.TestCaseError, match=message):
+        compile_tests(tests)
+
+
+def test_cache_is_keyed_by_version_and_bounded(app):
+    cache = CompiledTestCache(maxsize=2)
+    exercise = Exercise(title='t', body='b', difficulty=1, test_cases=["1"], solutions=["1"])
+    exercise.id = 1
+    first = cache.get(exercise)
+    assert cache.get(exercise) is first
+    assert exercise.set_content(test_cases=["2"]) and exercise.version == 2
+    assert cache.get(exercise) != first
+    assert not exercise.set_content(test_cases=["2"], solutions=["1"])
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 2}
+
+    other = Exercise(title='t', body='b', difficulty=1, test_cases=["1 +"], solutions=["1"])
+    other.id = 2
+    assert cache.get(other) is None
+    assert cache.stats()["size"] == 2
+    cache.invalidate(1)
+    assert cache.stats()["size"] == 1
+
+
+def test_concurrent_updates_get_distinct_versions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'exercises.db'}")
+    db.metadata.create_all(engine, tables=[Exercise.__table__])
+    with Session(engine) as session:
+        session.add(Exercise(title='t', body='b', difficulty=1, test_cases=["1"], solutions=["1"]))
+        session.commit()
+    # Both read version 1 before either commits
+    first, second = Session(engine), Session(engine)
+    try:
+        one, two = first.get(Exercise, 1), second.get(Exercise, 1)
+        assert one.version == two.version == 1
+        assert one.set_content(test_cases=["2"])
+        first.commit()
+        assert one.version == 2
+        assert two.set_content(test_cases=["3"])
+        second.commit()
+        assert two.version == 3
+    finally:
+        first.close()
+        second.close()
+
+
+@patch('app.utils.verify_token_with_user_service', return_value=USER)
+def test_create_and_update_check_test_cases(_, client, app):
+    response = client.post('/api/exercises/', headers=HEADERS, json={
+        'title': 'Add', 'body': 'Add', 'difficulty': 1, 'test_cases': ['add(1,'], 'solutions': ['3']})
+    assert response.status_code == 400
+    assert "Test case 1 does not compile" in response.get_json()['message']
+
+    exercise_id = _exercise(app, ["add(1, 2)"], ["3"])
+    response = client.put(f'/api/exercises/{exercise_id}', headers=HEADERS, json={'test_cases': ['add(1, 2', 'x']})
+    assert response.status_code == 400
+    response = client.put(f'/api/exercises/{exercise_id}', headers=HEADERS, json={'title': 'Renamed'})
+    assert response.get_json()['data']['version'] == 1
+    response = client.put(f'/api/exercises/{exercise_id}', headers=HEADERS, json={'solutions': ['4']})
+    assert response.get_json()['data']['version'] == 2
+
+
+@patch('app.utils.verify_token_with_user_service', return_value=USER)
+def test_validate_code_sees_updated_test_cases(_, client, app):
+    exercise_id = _exercise(app, ["add(1, 2)"], ["3"])
+    answer = "def add(a, b):\n    return a + b\n"
+
+    def validate():
+        return client.post('/api/exercises/validate_code',
+                           json={"exercise_id": exercise_id, "answer": answer}).get_json()
+
+    assert validate()["user_results"] == ["3"]
+    assert validate()["user_results"] == ["3"]
+    client.put(f'/api/exercises/{exercise_id}', headers=HEADERS, json={'test_cases': ['add(2, 2)']})
+    assert validate()["user_results"] == ["4"]
+    stats = app.extensions["test_cache"].stats()
+    assert stats["hits"] >= 1 and stats["size"] == 1
@@ -0,0 +1,55 @@
+"""
+Tests for honouring the gateway's request deadline
+"""
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+from flask import g
+from app.deadline import DeadlineExceeded, call_timeout, _limit_statement, _clear_statement_limit
+from app.models import Exercise
+
+
+def test_late_request_is_rejected_without_work(client):
+    with patch('app.utils.requests.get') as mock_get:
+        response = client.post('/api/exercises/', json={},
+                               headers={'Authorization': 'Bearer t', 'X-Request-Deadline': str(time.time() - 1)})
+    assert response.status_code == 504
+    mock_get.assert_not_called()
+
+
+@patch('app.utils.requests.get')
+def test_token_verification_fits_remaining_budget(mock_get, client):
+    mock_get.return_value = MagicMock(status_code=401, json=lambda: {})
+    deadline = time.time() + 1.5
+    client.post('/api/exercises/', json={}, headers={'Authorization': 'Bearer t', 'X-Request-Deadline': str(deadline)})
+    assert mock_get.call_args[1]['timeout'] <= 1.5
+    assert mock_get.call_args[1]['headers']['X-Request-Deadline'] == f"{deadline:.3f}"
+
+
+def test_statements_stop_once_deadline_passed(app):
+    with app.test_request_context('/'):
+        g.deadline = time.time() - 0.1
+        with pytest.raises(DeadlineExceeded):
+            Exercise.query.all()
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(3)
+
+
+def test_no_deadline_keeps_default_timeout(app):
+    with app.test_request_context('/'):
+        assert call_timeout(3) == 3
+
+
+def test_statement_timeout_is_set_once_per_transaction(app):
+    conn = MagicMock(info={})
+    conn.dialect.name = "postgresql"
+    cursor = MagicMock()
+    with app.test_request_context('/'):
+        g.deadline = time.time() + 5
+        _limit_statement(conn, cursor, "SELECT 1", (), None, False)
+        _limit_statement(conn, cursor, "SELECT 2", (), None, False)
+        assert cursor.execute.call_count == 1
+        assert cursor.execute.call_args[0][0].startswith("SET LOCAL statement_timeout = ")
+        _clear_statement_limit(conn)
+        _limit_statement(conn, cursor, "SELECT 3", (), None, False)
+        assert cursor.execute.call_count == 2
@@ -0,0 +1,78 @@
+"""
+Tests for trusting the gateway-signed identity header
+"""
+import base64
+import json
+import time
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from flask import Flask
+import app.utils as utils_mod
+from app.identity import IDENTITY_HEADER, token_digest
+
+USER = {"id": 7, "username": "u", "admin": False}
+KEY, PREVIOUS_KEY, WRONG_KEY = (Ed25519PrivateKey.generate() for _ in range(3))
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _public(key):
+    return _b64(key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+
+def _sign(token="tok", key=KEY, exp=None, user=USER):
+    claims = {"user": user, "exp": exp if exp is not None else time.time() + 30, "tok": token_digest(token)}
+    payload = json.dumps(claims).encode()
+    return f"{_b64(payload)}.{_b64(key.sign(payload))}"
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Tokens the user service was asked to verify"""
+    monkeypatch.setenv("GATEWAY_IDENTITY_PUBLIC_KEY", f"{_public(KEY)},{_public(PREVIOUS_KEY)}")
+    verified = []
+
+    def verify(token):
+        verified.append(token)
+        return {"id": 1, "username": "from-user-service"}
+
+    monkeypatch.setattr(utils_mod, "verify_token_with_user_service", verify)
+    return verified
+
+
+def _authenticate(identity_header=None, token="tok"):
+    @utils_mod.authenticate
+    def _inner(user_data):
+        return user_data
+
+    headers = {"Authorization": f"Bearer {token}"}
+    if identity_header is not None:
+        headers[IDENTITY_HEADER] = identity_header
+    with Flask(__name__).test_request_context("/", headers=headers):
+        return _inner()
+
+
+def test_valid_identity_skips_user_service(calls):
+    assert _authenticate(_sign()) == USER
+    assert _authenticate(_sign(key=PREVIOUS_KEY)) == USER
+    assert calls == []
+
+
+@pytest.mark.parametrize("header", [
+    _sign(key=WRONG_KEY),
+    _sign(exp=1),
+    _sign(token="other"),
+    "not-a-signed-value",
+    _sign()[:-4] + "AAAA",
+])
+def test_doubtful_identity_falls_back(calls, header):
+    assert _authenticate(header)["username"] == "from-user-service"
+    assert calls == ["tok"]
+
+
+def test_ignored_without_public_key(calls, monkeypatch):
+    monkeypatch.delenv("GATEWAY_IDENTITY_PUBLIC_KEY")
+    assert _authenticate(_sign())["username"] == "from-user-service"
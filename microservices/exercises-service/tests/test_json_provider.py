@@ -0,0 +1,65 @@
+"""
+Tests for the orjson-backed JSON provider and its stdlib fallback
+"""
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+import pytest
+from app import json_provider
+from app.json_provider import FastJSONProvider
+
+PAYLOAD = {
+    "status": "success",
+    "data": {
+        "title": "Ünïcode",
+        "created_at": datetime(2026, 1, 11, 8, 30, tzinfo=timezone.utc),
+        "score": Decimal("1.5"),
+    },
+}
+EXPECTED = {
+    "status": "success",
+    "data": {"title": "Ünïcode", "created_at": "2026-01-11T08:30:00+00:00", "score": "1.5"},
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request, app):
+    if request.param == "stdlib":
+        with patch.object(json_provider, "orjson", None):
+            yield FastJSONProvider(app)
+    else:
+        if json_provider.orjson is None:
+            pytest.skip("orjson is not installed")
+        yield FastJSONProvider(app)
+
+
+def test_encoders_agree(provider):
+    text = provider.dumps(PAYLOAD, separators=(",", ":"))
+    assert json.loads(text) == EXPECTED
+
+
+def test_indented_output(provider):
+    assert provider.dumps({"b": 1, "a": [1]}, indent=2) == '{\n  "a": [\n    1\n  ],\n  "b": 1\n}'
+
+
+def test_round_trip(provider):
+    assert provider.loads(provider.dumps(EXPECTED)) == EXPECTED
+    assert provider.loads(b'{"a": 1}') == {"a": 1}
+
+
+def test_unsupported_types_are_rejected(provider):
+    with pytest.raises(TypeError):
+        provider.dumps({"obj": object()})
+
+
+def test_large_integers_fall_back_to_stdlib(app):
+    assert FastJSONProvider(app).dumps({"n": 2 ** 70}) == '{"n": 1180591620717411303424}'
+
+
+def test_list_endpoint_uses_provider(client, sample_exercise):
+    response = client.get('/api/exercises/')
+    assert response.status_code == 200
+    exercise = response.get_json()["data"]["exercises"][0]
+    assert exercise["id"] == sample_exercise
+    assert datetime.fromisoformat(exercise["created_at"])
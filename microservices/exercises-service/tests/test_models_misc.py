@@ -1,4 +1,5 @@
-from app.models import Exercise
+from sqlalchemy import create_engine, text
+from app.models import Exercise, add_missing_columns
 
 def test_model_repr_and_from_json_and_to_json():
     data = {
@@ -15,4 +16,15 @@ def test_model_repr_and_from_json_and_to_json():
     # to_json basic shape; created_at/updated_at may be None before DB insert
     j = ex.to_json()
     assert j["title"] == "T" and isinstance(j, dict)
-    assert "created_at" in j and "updated_at" in j
\ No newline at end of file
+    assert "created_at" in j and "updated_at" in j
+
+def test_add_missing_columns_upgrades_existing_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE exercises (id INTEGER PRIMARY KEY, title VARCHAR(255))"))
+        connection.execute(text("INSERT INTO exercises (id, title) VALUES (1, 'old')"))
+    add_missing_columns(engine)
+    # Running again on an up-to-date table is a no-op
+    add_missing_columns(engine)
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version FROM exercises WHERE id = 1")).scalar() == 1
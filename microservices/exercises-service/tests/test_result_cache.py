@@ -0,0 +1,90 @@
+"""
+Tests for memoized validate_code results
+"""
+from unittest.mock import patch
+from app.models import Exercise, db
+from app.result_cache import SQLiteResultStore, ValidationResultCache, result_key
+
+HEADERS = {'Authorization': 'Bearer token'}
+ANSWER = "def add(a, b):\n    return a + b\n"
+RESULT = {"status": "success", "results": [True], "user_results": ["3"], "all_correct": True}
+
+
+def _exercise(app):
+    with app.app_context():
+        exercise = Exercise(title='Add', body='Add', difficulty=1, test_cases=["add(1, 2)"], solutions=["3"])
+        db.session.add(exercise)
+        db.session.commit()
+        return exercise.id
+
+
+def test_key_depends_on_version_and_exact_answer():
+    key = result_key(1, 1, ANSWER)
+    assert key == result_key(1, 1, ANSWER)
+    assert key != result_key(1, 2, ANSWER)
+    assert key != result_key(1, 1, ANSWER + " ")
+
+
+def test_memory_cache_is_bounded_lru():
+    cache = ValidationResultCache(maxsize=2)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    assert cache.get("a") == RESULT
+    cache.put("c", RESULT)
+    assert cache.get("b") is None
+    assert cache.get("a") == RESULT
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 2, 1, 0.667)
+
+
+def test_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "results.db")
+    first = ValidationResultCache(maxsize=10, store=SQLiteResultStore(path))
+    second = ValidationResultCache(maxsize=10, store=SQLiteResultStore(path))
+    first.put("k", RESULT)
+    assert second.get("k") == RESULT
+    assert second.get("k") == RESULT
+    assert second.stats()["store_hits"] == 1 and second.stats()["hits"] == 1
+
+
+def test_store_keeps_newest_entries(tmp_path):
+    store = SQLiteResultStore(str(tmp_path / "results.db"), max_entries=3)
+    store.PRUNE_EVERY = 5
+    for i in range(5):
+        store.put(str(i), {"n": i})
+    assert [store.get(str(i)) for i in range(5)] == [None, None, {"n": 2}, {"n": 3}, {"n": 4}]
+
+
+def test_broken_store_only_costs_the_cache(tmp_path):
+    cache = ValidationResultCache(maxsize=10, store=SQLiteResultStore(str(tmp_path)))
+    cache.put("k", RESULT)
+    assert cache.get("other") is None
+    assert cache.stats()["store_errors"] == 2
+
+
+@patch('app.utils.verify_token_with_user_service', return_value={'id': 1, 'username': 'author'})
+def test_resubmission_skips_execution(_, client, app):
+    exercise_id = _exercise(app)
+    hits = app.extensions["result_cache"].stats()["hits"]
+
+    def validate(answer=ANSWER):
+        return client.post('/api/exercises/validate_code', json={"exercise_id": exercise_id, "answer": answer})
+
+    first = validate().get_json()
+    with patch('app.api.exercises.run_submission') as run:
+        assert validate().get_json() == first
+        run.assert_not_called()
+
+    client.put(f'/api/exercises/{exercise_id}', headers=HEADERS, json={'solutions': ['4']})
+    assert validate().get_json()["results"] == [False]
+    assert app.extensions["result_cache"].stats()["hits"] == hits + 1
+    assert client.get('/api/exercises/health').get_json()["result_cache"]["hit_rate"] > 0
+
+
+def test_limited_results_are_not_cached(client, app):
+    exercise_id = _exercise(app)
+    outcome = {"compiled": True, "outputs": ["Time limit exceeded"], "limited": True}
+    with patch('app.api.exercises.run_submission', return_value=outcome) as run:
+        for _ in range(2):
+            client.post('/api/exercises/validate_code', json={"exercise_id": exercise_id, "answer": ANSWER})
+    assert run.call_count == 2
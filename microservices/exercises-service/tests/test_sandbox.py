@@ -0,0 +1,263 @@
+"""
+Tests for the sandbox executor pool behind validate_code
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.models import Exercise, db
+from app.sandbox import Limits, SandboxBusy, SandboxCrashed, SandboxPool, execute
+
+
+@pytest.fixture
+def pool():
+    pool = SandboxPool(size=1, max_queue=1, queue_timeout=2, job_timeout=2, max_jobs=10)
+    yield pool
+    pool.close()
+
+
+def test_execute_captures_prints_and_values():
+    answer = "def hello():\n    print('Hello World')\n\ndef add(a, b):\n    return a + b\n"
+    assert execute(answer, ["hello()", "add(1, 2)", "missing()"]) == {
+        "compiled": True, "outputs": ["Hello World", "3", "Error: name 'missing' is not defined"], "limited": False}
+    assert execute("def f(", ["f()"])["compiled"] is False
+
+
+def test_pool_runs_jobs_in_executor_process(pool):
+    result = pool.run("import os\npid = os.getpid()", ["pid"])
+    assert result["compiled"] is True
+    assert result["outputs"] != [str(__import__("os").getpid())]
+    assert pool.stats()["jobs"] == 1
+
+
+def test_runaway_job_is_killed_and_replaced(pool):
+    pool.job_timeout = 0.5
+    # One long C call, which the in-process timers cannot interrupt
+    result = pool.run("", ["1 + 1", "sum(range(10 ** 12))", "2 + 2"])
+    assert result["outputs"] == ["2", "Time limit exceeded", "Time limit exceeded"]
+    assert pool.run("", ["1 + 1"])["outputs"] == ["2"]
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_dead_executor_is_replaced(pool):
+    with pytest.raises(SandboxCrashed):
+        pool.run("import os\nos._exit(1)", [])
+    assert pool.run("", ["2 * 3"])["outputs"] == ["6"]
+    assert pool.run("raise SystemExit(3)", [])["compiled"] is False
+
+
+def test_executor_state_is_dropped_on_recycle(pool):
+    pool.max_jobs = 1
+    pool.run("import math\nmath.leaked = True", [])
+    assert pool.run("import math", ["hasattr(math, 'leaked')"])["outputs"] == ["False"]
+    assert pool.stats()["recycled"] == 2
+
+
+def test_full_queue_is_rejected(pool):
+    pool.max_queue = 0
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        pool.run("import time", ["time.sleep(0.5)"])
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    started.wait()
+    time.sleep(0.1)
+    with pytest.raises(SandboxBusy):
+        pool.run("", ["1"])
+    holder.join()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_executor_drops_inherited_secrets_and_fds(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_PASSWORD", "hunter2")
+    monkeypatch.setenv("GATEWAY_IDENTITY_PUBLIC_KEY", "public")
+    inherited = open(tmp_path / "inherited", "w")
+    # Forked straight from this process, so it starts with the variables and the open file
+    pool = SandboxPool(size=1, start_method="fork")
+    try:
+        answer = ("import os\n"
+                  "env = sorted(os.environ)\n"
+                  "initial = [e.split(b'=')[0] for e in open('/proc/self/environ', 'rb').read().split(b'\\0') if b'=' in e]\n"
+                  "fds = [int(fd) for fd in os.listdir('/proc/self/fd')]")
+        result = pool.run(answer, ["set(env) <= {'PATH', 'LANG', 'LC_ALL', 'LC_CTYPE', 'TZ'}", "initial",
+                                   f"{inherited.fileno()} in fds"])
+        assert result["outputs"] == ["True", "[]", "False"]
+    finally:
+        inherited.close()
+        pool.close()
+
+
+def test_dead_idle_executor_is_replaced_before_the_job(pool):
+    pool.run("", ["1"])
+    idle = pool._idle[0]
+    idle.process.kill()
+    idle.process.join(1)
+    assert pool.run("", ["2 * 3"])["outputs"] == ["6"]
+    assert pool.stats()["dead_idle"] == 1
+    assert pool.stats()["crashes"] == 0
+
+
+def test_replacement_is_started_outside_the_lock(pool):
+    pool.max_jobs = 1
+    pool.run("", ["1"])
+    start_executor = pool._start_executor
+    spawning = threading.Event()
+
+    def slow_start():
+        spawning.set()
+        time.sleep(0.5)
+        return start_executor()
+
+    pool._start_executor = slow_start
+    recycler = threading.Thread(target=pool.run, args=("", ["1"]))
+    recycler.start()
+    spawning.wait(2)
+    started = time.monotonic()
+    pool.stats()
+    assert time.monotonic() - started < 0.25
+    recycler.join()
+
+
+@pytest.fixture
+def limited_pool():
+    # Wall limits well above the CPU ones, so a loaded machine cannot turn a CPU limit into a time limit
+    limits = Limits(test_seconds=1, test_cpu_seconds=0.2, submission_seconds=3,
+                    submission_cpu_seconds=1, memory_mb=256, output_chars=100)
+    pool = SandboxPool(size=1, job_timeout=5, limits=limits)
+    yield pool
+    pool.close()
+
+
+def test_limits_are_reported_per_test(limited_pool):
+    answer = "import time\ndef spin():\n    while True:\n        pass\n"
+    result = limited_pool.run(answer, [
+        "time.sleep(3)",
+        "spin()",
+        "len(bytearray(512 * 1024 * 1024))",
+        "print('x' * 1000)",
+        "'y' * 1000",
+        "1 + 1",
+    ])
+    assert result["outputs"] == ["Time limit exceeded", "CPU time limit exceeded", "Memory limit exceeded",
+                                 "Output limit exceeded", "Output limit exceeded", "2"]
+    assert limited_pool.stats()["limited"] == 1
+    assert limited_pool.run("", ["3 * 3"])["outputs"] == ["9"]
+
+
+def test_limits_cannot_be_caught_by_the_answer(limited_pool):
+    answer = "def stubborn():\n    try:\n        while True:\n            pass\n    except Exception:\n        return 'caught'\n"
+    assert limited_pool.run(answer, ["stubborn()"])["outputs"] == ["CPU time limit exceeded"]
+
+
+def test_limit_handlers_cannot_be_disarmed(limited_pool):
+    answer = "import signal, _signal\n_signal.signal(signal.SIGALRM, _signal.SIG_IGN)\n"
+    result = limited_pool.run(answer, [
+        "signal.signal(signal.SIGALRM, signal.SIG_IGN)",
+        "__import__('resource').setrlimit(__import__('resource').RLIMIT_CPU, (-1, -1))",
+        "__import__('time').sleep(3)",
+    ])
+    assert result["outputs"] == ["Error: Signal 14 is reserved by the sandbox",
+                                 "Error: This resource limit is reserved by the sandbox", "Time limit exceeded"]
+
+
+def test_overrunning_test_is_cut_off_by_the_pool(limited_pool):
+    # Ignoring the limit signals behind the sandbox's back leaves only the pool's kill
+    escape = "[_signal.signal(s, 1) for s in (14, 24, 27)] and sum(range(10 ** 12))"
+    result = limited_pool.run("import _signal", ["1", escape, "2"])
+    assert result["outputs"] == ["1", "Time limit exceeded", "Time limit exceeded"]
+
+
+def test_kernel_enforces_hard_cpu_limit():
+    limits = Limits(test_seconds=30, test_cpu_seconds=30, submission_seconds=30, submission_cpu_seconds=0.2)
+    pool = SandboxPool(size=1, job_timeout=30, limits=limits)
+    try:
+        escape = "[_signal.signal(s, 1) for s in (14, 24, 27)] and sum(range(10 ** 12))"
+        started = time.monotonic()
+        result = pool.run("import _signal", ["1", escape])
+        assert result["outputs"] == ["1", "CPU time limit exceeded"]
+        assert time.monotonic() - started < 10
+    finally:
+        pool.close()
+
+
+def test_submission_budget_is_shared_by_tests(limited_pool):
+    limited_pool.limits.submission_seconds = 0.5
+    outputs = limited_pool.run("import time", ["time.sleep(0.2)"] * 4 + ["1"])["outputs"]
+    assert outputs[:2] == ["None", "None"]
+    assert outputs[2:] == ["Time limit exceeded"] * 3
+
+
+def test_validate_code_reports_timeout(client, app, sample_exercise):
+    pool = SandboxPool(size=1, job_timeout=0.3)
+    previous, app.extensions["sandbox_pool"] = app.extensions["sandbox_pool"], pool
+    try:
+        response = client.post('/api/exercises/validate_code',
+                                json={"exercise_id": sample_exercise, "answer": "while True:\n    pass"})
+    finally:
+        app.extensions["sandbox_pool"] = previous
+        pool.close()
+    assert response.status_code == 200
+    assert response.get_json()["user_results"] == ["Time limit exceeded"]
+
+
+def test_validate_code_reports_limits_per_test(client, app):
+    with app.app_context():
+        exercise = Exercise(title='Limits', body='Add', difficulty=1,
+                            test_cases=["spin()", "add(1, 2)"], solutions=["None", "3"])
+        db.session.add(exercise)
+        db.session.commit()
+        exercise_id = exercise.id
+    pool = SandboxPool(size=1, limits=Limits(test_seconds=1, test_cpu_seconds=0.3))
+    previous, app.extensions["sandbox_pool"] = app.extensions["sandbox_pool"], pool
+    try:
+        response = client.post('/api/exercises/validate_code', json={
+            "exercise_id": exercise_id,
+            "answer": "def spin():\n    while True:\n        pass\n\ndef add(a, b):\n    return a + b\n"})
+    finally:
+        app.extensions["sandbox_pool"] = previous
+        pool.close()
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["user_results"] == ["CPU time limit exceeded", "3"]
+    assert data["results"] == [False, True]
+
+
+def test_concurrent_executions_capture_their_own_output():
+    # Sleeping between prints hands the GIL to the other threads mid-capture
+    answer = "import time\ndef shout(tag, n):\n    for i in range(n):\n        print(tag, i)\n        time.sleep(0.0001)\n"
+
+    def run(tag):
+        return execute(answer, [f"shout({tag!r}, 50)", f"print({tag!r})"])["outputs"]
+
+    tags = [f"t{i}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(run, tags))
+    for tag, outputs in zip(tags, results):
+        assert outputs == ["\n".join(f"{tag} {i}" for i in range(50)), tag]
+
+
+def test_concurrent_validations_in_process(client, app):
+    with app.app_context():
+        exercise = Exercise(title='Echo', body='Echo', difficulty=1,
+                            test_cases=["echo()", "echo()"], solutions=["", ""])
+        db.session.add(exercise)
+        db.session.commit()
+        exercise_id = exercise.id
+    previous, app.extensions["sandbox_pool"] = app.extensions["sandbox_pool"], None
+
+    def validate(n):
+        answer = f"import time\ndef echo():\n    for _ in range(20):\n        print({n})\n        time.sleep(0.0001)\n"
+        response = app.test_client().post('/api/exercises/validate_code',
+                                          json={"exercise_id": exercise_id, "answer": answer})
+        return n, response.get_json()["user_results"]
+
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(validate, range(100)))
+    finally:
+        app.extensions["sandbox_pool"] = previous
+    for n, user_results in results:
+        assert user_results == ["\n".join([str(n)] * 20)] * 2
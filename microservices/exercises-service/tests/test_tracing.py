@@ -0,0 +1,30 @@
+"""
+Tests for request ID propagation and Server-Timing
+"""
+from unittest.mock import patch, MagicMock
+
+
+def test_request_id_is_echoed(client):
+    response = client.get('/api/exercises/', headers={'X-Request-ID': 'abc-123'})
+    assert response.headers['X-Request-ID'] == 'abc-123'
+
+
+def test_invalid_request_id_is_replaced(client):
+    response = client.get('/api/exercises/', headers={'X-Request-ID': 'bad id!'})
+    assert response.headers['X-Request-ID'] != 'bad id!'
+    assert len(response.headers['X-Request-ID']) == 32
+
+
+def test_server_timing_reports_db_and_serialization(client, sample_exercise):
+    response = client.get('/api/exercises/')
+    assert response.status_code == 200
+    names = [entry.split(';')[0].strip() for entry in response.headers['Server-Timing'].split(',')]
+    assert 'db' in names
+    assert 'serialize' in names
+
+
+@patch('app.utils.requests.get')
+def test_request_id_forwarded_to_user_service(mock_get, client, headers):
+    mock_get.return_value = MagicMock(status_code=401, json=lambda: {'status': 'fail'})
+    client.post('/api/exercises/', json={}, headers=dict(headers, **{'X-Request-ID': 'trace-1'}))
+    assert mock_get.call_args[1]['headers']['X-Request-ID'] == 'trace-1'
@@ -141,7 +141,8 @@ def update_score(user_data, exercise_id):
         else:
             response_object["message"] = "Sorry. That score does not exist."
             logger.warning(f"Score for exercise {exercise_id} not found for user {user_id}")
-            return jsonify(response_object), 400
+            # 404, unlike the payload and database errors, tells callers to create the score instead
+            return jsonify(response_object), 404
             
     except (exc.IntegrityError, ValueError, TypeError) as e:
         logger.error(f"Database error updating score for exercise {exercise_id}: {str(e)}")
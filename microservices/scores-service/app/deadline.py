@@ -0,0 +1,83 @@
+"""Request deadlines set by the API gateway.
+
+X-Request-Deadline is the Unix time by which the gateway stops waiting for
+the answer. A request that arrives later is answered 504 without doing any
+work; otherwise nested calls (token verification) and SQL statements only
+get the time that is left.
+"""
+import time
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+DEADLINE_HEADER = "X-Request-Deadline"
+# conn.info flag: statement_timeout is already set for the open transaction
+_TIMEOUT_SET = "deadline_statement_timeout"
+
+class DeadlineExceeded(Exception):
+    """The caller's deadline passed before the work was done"""
+
+def current_deadline():
+    if has_request_context():
+        return g.get("deadline")
+    return None
+
+def remaining():
+    """Seconds left for the request being served, or None without a deadline"""
+    deadline = current_deadline()
+    return None if deadline is None else deadline - time.time()
+
+def call_timeout(timeout):
+    """`timeout` capped to the time left; raises DeadlineExceeded when none is"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(timeout, left)
+
+def _deadline_exceeded_response():
+    return jsonify({"status": "fail", "message": "Request deadline exceeded"}), 504
+
+# Runs ahead of the Server-Timing listener so a rejected statement is not timed
+@event.listens_for(Engine, "before_cursor_execute", insert=True)
+def _limit_statement(conn, cursor, statement, parameters, context, executemany):
+    left = remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded()
+    # SET LOCAL lasts until the transaction ends, so one per transaction is enough
+    if conn.dialect.name == "postgresql" and not conn.info.get(_TIMEOUT_SET):
+        cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
+        conn.info[_TIMEOUT_SET] = True
+
+@event.listens_for(Engine, "commit")
+@event.listens_for(Engine, "rollback")
+@event.listens_for(Engine, "rollback_savepoint")
+def _clear_statement_limit(conn, *args):
+    conn.info.pop(_TIMEOUT_SET, None)
+
+# Connections returned to the pool end their transaction without a Connection event
+@event.listens_for(Pool, "checkin")
+def _clear_statement_limit_on_checkin(dbapi_connection, connection_record):
+    if connection_record is not None:
+        connection_record.info.pop(_TIMEOUT_SET, None)
+
+def init_deadline(app):
+    """Read the deadline of each request and drop requests that are already late"""
+
+    @app.before_request
+    def _check_deadline():
+        try:
+            g.deadline = float(request.headers[DEADLINE_HEADER])
+        except (KeyError, ValueError):
+            return None
+        if g.deadline <= time.time():
+            return _deadline_exceeded_response()
+        return None
+
+    @app.errorhandler(DeadlineExceeded)
+    def _handle_deadline_exceeded(error):
+        return _deadline_exceeded_response()
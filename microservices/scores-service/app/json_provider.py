@@ -0,0 +1,59 @@
+"""Fast JSON responses.
+
+FastJSONProvider encodes with orjson when it is installed and with the
+stdlib json module otherwise. Dates and datetimes are written as ISO 8601
+either way (orjson does so natively), matching the `isoformat()` strings
+of the models' `to_json`, instead of Flask's default RFC 822 dates.
+"""
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+def _default(o):
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib"""
+
+    default = staticmethod(_default)
+    # orjson always writes UTF-8; keep the stdlib fallback byte-compatible
+    ensure_ascii = False
+
+    def _orjson_option(self, kwargs):
+        """orjson option for the dumps arguments, or None when orjson cannot honour them"""
+        if orjson is None:
+            return None
+        option = orjson.OPT_NON_STR_KEYS
+        for key, value in kwargs.items():
+            if key == "indent" and value == 2:
+                option |= orjson.OPT_INDENT_2
+            elif key == "separators" and tuple(value) == (",", ":"):
+                continue
+            elif key == "sort_keys" or (key == "default" and value is self.default):
+                continue
+            else:
+                return None
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs)
+        if option is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode()
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits; let the stdlib encoder deal with (or reject) them
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
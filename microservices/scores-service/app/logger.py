@@ -1,7 +1,17 @@
 import logging
 import os
+from flask import g, has_request_context
 from logging.handlers import RotatingFileHandler
 
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request ID (set by app.tracing) to every record"""
+
+    def filter(self, record):
+        record.request_id = g.get("request_id", "-") if has_request_context() else "-"
+        return True
+
 def get_logger(name):
     """Get logger instance with consistent formatting"""
     logger = logging.getLogger(name)
@@ -10,14 +20,13 @@ def get_logger(name):
         logger.setLevel(logging.INFO)
         
         # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        formatter = logging.Formatter(LOG_FORMAT)
         
         # Console handler only (to avoid conflicts with gunicorn)
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
+        console_handler.addFilter(RequestIdFilter())
         logger.addHandler(console_handler)
     
     return logger
@@ -26,5 +35,8 @@ def setup_logger():
     """Setup root logger"""
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
\ No newline at end of file
+        format=LOG_FORMAT
+    )
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
\ No newline at end of file
@@ -5,6 +5,8 @@ from sqlalchemy import text
 from app.config import get_config
 from app.models import db
 from app.logger import setup_logger
+from app.tracing import init_tracing
+from app.deadline import init_deadline
 from app.api.scores import scores_blueprint
 from app.api import scores as scores_api
 
@@ -18,6 +20,10 @@ def create_app():
     # Load configuration
     app.config.from_object(get_config())
     
+    # Request IDs, Server-Timing and deadlines, ahead of the other request hooks
+    init_tracing(app)
+    init_deadline(app)
+    
     # Initialize extensions
     db.init_app(app)
     migrate = Migrate(app, db)
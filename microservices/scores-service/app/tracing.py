@@ -0,0 +1,74 @@
+"""Request IDs and Server-Timing.
+
+The API gateway sends an X-Request-ID with every call. It is echoed back,
+forwarded on calls to other services and added to every log record (see
+app.logger). Time spent on auth, database and JSON serialization is summed
+per request and reported in the Server-Timing response header.
+"""
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.json_provider import FastJSONProvider
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+def current_request_id():
+    """Request ID of the request being served, or None"""
+    if has_request_context():
+        return g.get("request_id")
+    return None
+
+def add_timing(name, seconds):
+    if has_request_context() and "server_timing" in g:
+        g.server_timing[name] = g.server_timing.get(name, 0.0) + seconds
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the request's Server-Timing entry `name`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - started)
+
+def server_timing_header(timings):
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+class TimedJSONProvider(FastJSONProvider):
+    """Flask JSON provider that reports serialization time"""
+
+    def dumps(self, obj, **kwargs):
+        with timed("serialize"):
+            return super().dumps(obj, **kwargs)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    add_timing("db", time.perf_counter() - started)
+
+def init_tracing(app):
+    """Register request ID and Server-Timing handling; call before other request hooks"""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_request_trace():
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        g.server_timing = {}
+
+    @app.after_request
+    def _finish_request_trace(response):
+        if "request_id" in g:
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        if g.get("server_timing"):
+            response.headers["Server-Timing"] = server_timing_header(g.server_timing)
+        return response
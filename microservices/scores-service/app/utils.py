@@ -3,6 +3,9 @@ import os
 from functools import wraps
 from flask import request, jsonify
 from app.logger import get_logger
+from app.tracing import REQUEST_ID_HEADER, current_request_id, timed
+from app.deadline import DEADLINE_HEADER, call_timeout, current_deadline
+from app.identity import verified_identity
 
 # Get logger for this module
 logger = get_logger("scores_utils")
@@ -35,7 +38,8 @@ def authenticate(f):
             response_object["message"] = "Invalid token format."
             return jsonify(response_object), code
 
-        user_data = verify_token_with_user_service(auth_token)
+        # A gateway-signed identity saves the round trip to the user service
+        user_data = verified_identity(auth_token) or verify_token_with_user_service(auth_token)
         if not user_data:
             logger.warning("Invalid or expired auth token")
             response_object["message"] = "Invalid token. Please log in again."
@@ -48,10 +52,19 @@ def authenticate(f):
 
 def verify_token_with_user_service(token):
     """Gọi user-service xác thực token, chỉ trả về dict user_data hợp lệ; sai cấu trúc -> None."""
+    # Never wait on the user service longer than the caller waits for us
+    timeout = call_timeout(3)
     try:
         url = f"{USER_MANAGEMENT_SERVICE_URL}/auth/status"
         headers = {"Authorization": f"Bearer {token}"}
-        resp = requests.get(url, headers=headers, timeout=3)
+        request_id = current_request_id()
+        if request_id:
+            headers[REQUEST_ID_HEADER] = request_id
+        deadline = current_deadline()
+        if deadline is not None:
+            headers[DEADLINE_HEADER] = f"{deadline:.3f}"
+        with timed("auth"):
+            resp = requests.get(url, headers=headers, timeout=timeout)
         if resp.status_code != 200:
             return None
         body = resp.json() or {}
@@ -134,14 +134,14 @@ def test_update_score_branches(monkeypatch, client):
     with app.test_request_context("/api/scores/3", method="PUT", json={}):
         resp2 = scores_api.update_score.__wrapped__({"id": 1}, "3")
         assert isinstance(resp2, tuple) and resp2[1] == 400
-    # not found -> 400
+    # not found -> 404
     class QNot:
         def filter_by(self_inner, **kw):
             return types.SimpleNamespace(first=lambda : None)
     monkeypatch.setattr(scores_api, "Score", types.SimpleNamespace(query=QNot()), raising=False)
     with app.test_request_context("/api/scores/9", method="PUT", json={"answer": "x"}):
         resp3 = scores_api.update_score.__wrapped__({"id": 1}, "9")
-        assert isinstance(resp3, tuple) and resp3[1] == 400
+        assert isinstance(resp3, tuple) and resp3[1] == 404
     # found -> success 200
     s = ScoreStub(id=5, user_id=1, exercise_id=9)
     class QFound:
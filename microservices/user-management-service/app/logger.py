@@ -2,6 +2,17 @@ import logging
 import sys
 import os
 from datetime import datetime
+from flask import g, has_request_context
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request ID (set by app.tracing) to every record"""
+
+    def filter(self, record):
+        record.request_id = g.get("request_id", "-") if has_request_context() else "-"
+        return True
 
 
 def setup_logger():
@@ -19,26 +30,28 @@ def setup_logger():
         logger.removeHandler(handler)
 
     # Create formatters
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    formatter = logging.Formatter(LOG_FORMAT)
+    request_id_filter = RequestIdFilter()
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
+    console_handler.addFilter(request_id_filter)
     logger.addHandler(console_handler)
 
     # File handler for general logs
     file_handler = logging.FileHandler(f'{log_dir}/auth_service.log')
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(formatter)
+    file_handler.addFilter(request_id_filter)
     logger.addHandler(file_handler)
 
     # File handler for error logs
     error_handler = logging.FileHandler(f'{log_dir}/auth_error.log')
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(formatter)
+    error_handler.addFilter(request_id_filter)
     logger.addHandler(error_handler)
 
     return logger
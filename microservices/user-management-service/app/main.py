@@ -4,6 +4,8 @@ from flask_migrate import Migrate
 from app.config import get_config
 from app.models import db, bcrypt
 from app.logger import setup_logger
+from app.tracing import init_tracing
+from app.deadline import init_deadline
 from app.api.auth import auth_blueprint
 from app.api.users import users_blueprint
 
@@ -17,6 +19,10 @@ def create_app():
     # Load configuration
     app.config.from_object(get_config())
     
+    # Request IDs, Server-Timing and deadlines, ahead of the other request hooks
+    init_tracing(app)
+    init_deadline(app)
+    
     # Initialize extensions
     db.init_app(app)
     bcrypt.init_app(app)
@@ -4,6 +4,7 @@ from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from app.logger import get_logger
+from app.tracing import timed
 
 # Initialize extensions
 db = SQLAlchemy()
@@ -93,11 +94,12 @@ class User(db.Model):
         logger.debug("Decoding auth token")
 
         try:
-            payload = jwt.decode(
-                auth_token,
-                current_app.config.get("SECRET_KEY"),
-                algorithms=["HS256"],
-            )
+            with timed("auth"):
+                payload = jwt.decode(
+                    auth_token,
+                    current_app.config.get("SECRET_KEY"),
+                    algorithms=["HS256"],
+                )
             user_id_str = payload["sub"]
             logger.debug(f"Token payload sub: {user_id_str} (type: {type(user_id_str)})")
 